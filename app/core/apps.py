@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from core import checks, signals  # noqa: F401
+        from core.timing import install_query_timer, instrument_serializers
+        instrument_serializers()
+        connection_created.connect(install_query_timer)
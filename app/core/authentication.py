@@ -0,0 +1,170 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import partial
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connection, transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from core.checks import cache_is_shared
+
+
+def token_cache_key(key):
+    return f'auth:token:{key}'
+
+
+class LocalLRUCache:
+    # Small per-process LRU in front of the shared cache. Entries expire
+    # after `ttl` seconds so invalidations made by other processes (which
+    # only reach the shared cache) are picked up within that window.
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+local_token_cache = LocalLRUCache(
+    maxsize=settings.AUTH_TOKEN_LOCAL_CACHE_SIZE,
+    ttl=settings.AUTH_TOKEN_LOCAL_CACHE_TTL,
+)
+
+
+# the password hash never goes into a cache, see cached_values()
+UNCACHED_USER_FIELDS = ('password',)
+
+
+def cached_values(token):
+    # (token field values, user field values), plain data that is rebuilt
+    # into instances by from_cached_values()
+    user_fields = [
+        field.attname for field in get_user_model()._meta.concrete_fields
+        if field.attname not in UNCACHED_USER_FIELDS
+    ]
+    return (
+        [getattr(token, field.attname) for field in Token._meta.fields],
+        [getattr(token.user, field) for field in user_fields],
+        user_fields,
+    )
+
+
+def from_cached_values(values):
+    # Fresh instances for every request, so views that modify request.user
+    # can't leak changes into the cache. The password stays deferred: it is
+    # loaded on access and left alone by user.save().
+    token_values, user_values, user_fields = values
+    token = Token.from_db(
+        DEFAULT_DB_ALIAS, [field.attname for field in Token._meta.fields],
+        token_values
+    )
+    token.user = get_user_model().from_db(
+        DEFAULT_DB_ALIAS, user_fields, user_values
+    )
+    return token
+
+
+def token_cache_timeout():
+    # A process-local cache only hears about invalidations made by its own
+    # process, so entries there live no longer than the local LRU's.
+    if not cache_is_shared():
+        return settings.AUTH_TOKEN_LOCAL_CACHE_TTL
+    return settings.AUTH_TOKEN_CACHE_TIMEOUT
+
+
+def cache_token(token):
+    # `token` must come with its user, see fetch_token()
+    values = cached_values(token)
+    cache.set(token_cache_key(token.key), values, token_cache_timeout())
+    local_token_cache.set(token.key, values)
+
+
+def drop_cached_tokens(keys):
+    for key in keys:
+        local_token_cache.delete(key)
+        cache.delete(token_cache_key(key))
+
+
+def invalidate_tokens(keys):
+    # Dropped now, and again once the transaction commits: until then
+    # other requests still read the old token and user rows and may cache
+    # them again.
+    keys = list(keys)
+    drop_cached_tokens(keys)
+    if connection.in_atomic_block:
+        transaction.on_commit(partial(drop_cached_tokens, keys))
+
+
+def invalidate_user_tokens(user_id):
+    # the keys come from the database, so nothing depends on a cache entry
+    # that may have been evicted on its own; they are read now, a deleted
+    # user's tokens are gone by the commit
+    invalidate_tokens(Token.objects.filter(user_id=user_id).values_list(
+        'key', flat=True
+    ))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    # Resolves token -> user from the local LRU, then the shared cache,
+    # and only falls back to the token/user join on a miss. Entries are
+    # dropped by the signal handlers in core.signals whenever the token or
+    # its user changes.
+
+    def authenticate_credentials(self, key):
+        values = local_token_cache.get(key)
+        if values is None:
+            values = cache.get(token_cache_key(key))
+            if values is None:
+                token = self.fetch_token(key)
+                cache_token(token)
+            else:
+                local_token_cache.set(key, values)
+        if values is not None:
+            token = from_cached_values(values)
+
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(
+                _('User inactive or deleted.')
+            )
+
+        return (token.user, token)
+
+    def fetch_token(self, key):
+        model = self.get_model()
+        try:
+            return model.objects.select_related('user').get(key=key)
+        except model.DoesNotExist:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
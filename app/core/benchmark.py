@@ -0,0 +1,282 @@
+import json
+import math
+import statistics
+import time
+import tracemalloc
+import uuid
+from io import BytesIO
+
+from django.db import connection
+from django.db.models import Exists, OuterRef
+from django.urls import get_resolver, reverse
+from PIL import Image
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+
+
+# URL namespaces every route of which must be in ROUTES
+NAMESPACES = ('recipe', 'user')
+
+
+class Route:
+    # One request to measure. `build(bench)` returns the reverse() args
+    # and the request body and runs before the clock starts, so routes that
+    # consume rows (delete, create) get fresh ones every time. `params` is
+    # the query string, or a function of the bench returning it.
+
+    def __init__(self, name, method='get', variant='', params=None,
+                 build=None, format='json', content_type=None):
+        self.name = name
+        self.method = method
+        self.variant = variant
+        self.params = params or {}
+        self.build = build
+        self.format = format
+        self.content_type = content_type
+
+    @property
+    def label(self):
+        label = f'{self.method.upper()} {self.name}'
+        return f'{label} [{self.variant}]' if self.variant else label
+
+
+def pick_user(users):
+    # The first of `users` owning recipes, tags and ingredients, which
+    # Bench picks route arguments from; None when no user has all three
+    return users.filter(*[
+        Exists(model.objects.filter(user=OuterRef('pk')))
+        for model in (Recipe, Tag, Ingredient)
+    ]).order_by('pk').first()
+
+
+class Bench:
+    # the requesting user, an authenticated client and the rows routes
+    # pick their arguments from
+
+    def __init__(self, user, password):
+        self.user = user
+        self.password = password
+        self.client = APIClient()
+        token, _ = Token.objects.get_or_create(user=user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.recipe_ids = list(
+            Recipe.objects.filter(user=user).values_list('id', flat=True)
+        )
+        self.tag_ids = list(
+            Tag.objects.filter(user=user).values_list('id', flat=True)
+        )
+        self.ingredient_ids = list(
+            Ingredient.objects.filter(user=user).values_list('id', flat=True)
+        )
+        self.counter = 0
+
+    def next(self):
+        self.counter += 1
+        return self.counter
+
+    def existing_recipe(self):
+        return self.recipe_ids[self.next() % len(self.recipe_ids)]
+
+    def recipe_body(self):
+        n = self.next()
+        return {
+            'title': f'bench recipe {n}',
+            'time_min': n % 120 + 1,
+            'price': f'{n % 50 + 1}.50',
+            'tags': self.tag_ids[n % len(self.tag_ids):][:3],
+            'ingrediant': (
+                self.ingredient_ids[n % len(self.ingredient_ids):][:5]
+            ),
+        }
+
+    def new_recipe(self):
+        return Recipe.objects.create(
+            user=self.user, title=f'bench recipe {self.next()}',
+            time_min=10, price=5
+        ).id
+
+
+def png():
+    image = BytesIO()
+    Image.new('RGB', (64, 64)).save(image, format='PNG')
+    image.seek(0)
+    image.name = 'bench.png'
+    return image
+
+
+def ndjson(count):
+    return ''.join(
+        json.dumps({
+            'title': f'imported {i}', 'time_min': 10, 'price': '5.00',
+            'tags': ['bench'], 'ingrediant': ['salt', 'pepper'],
+        }) + '\n'
+        for i in range(count)
+    )
+
+
+def detail(bench):
+    return [bench.existing_recipe()], None
+
+
+ROUTES = [
+    Route('recipe:api-root'),
+    Route('recipe:tag-list'),
+    Route('recipe:tag-list', 'post', build=lambda bench: (
+        [], {'name': f'bench tag {bench.next()}'}
+    )),
+    Route('recipe:ingredient-list'),
+    Route('recipe:ingredient-list', 'post', build=lambda bench: (
+        [], {'name': f'bench ingredient {bench.next()}'}
+    )),
+    Route('recipe:recipe-list'),
+    Route('recipe:recipe-list', variant='fields',
+          params={'fields': 'id,title,price'}),
+    Route('recipe:recipe-list', variant='expand',
+          params={'expand': 'tags,ingrediant'}),
+    Route('recipe:recipe-list', variant='search', params={'q': 'soup'}),
+    Route('recipe:recipe-list', variant='msgpack',
+          params={'format': 'msgpack'}),
+    Route('recipe:recipe-list', 'post', build=lambda bench: (
+        [], bench.recipe_body()
+    )),
+    Route('recipe:recipe-detail', build=detail),
+    Route('recipe:recipe-detail', 'patch', build=lambda bench: (
+        [bench.existing_recipe()], {'title': f'renamed {bench.next()}'}
+    )),
+    Route('recipe:recipe-detail', 'put', build=lambda bench: (
+        [bench.existing_recipe()], bench.recipe_body()
+    )),
+    Route('recipe:recipe-detail', 'delete', build=lambda bench: (
+        [bench.new_recipe()], None
+    )),
+    Route('recipe:recipe-changes'),
+    Route('recipe:recipe-cookable', params=lambda bench: {
+        'ingredients': ','.join(map(str, bench.ingredient_ids[:5]))
+    }),
+    Route('recipe:recipe-stats'),
+    Route('recipe:recipe-export'),
+    Route('recipe:recipe-import-recipes', 'post', build=lambda bench: (
+        [], ndjson(10)
+    ), format=None, content_type='application/x-ndjson'),
+    Route('recipe:recipe-upload-image', 'post', build=lambda bench: (
+        [bench.existing_recipe()], {'image': png()}
+    ), format='multipart'),
+    Route('recipe:async-tag-list'),
+    Route('recipe:async-ingredient-list'),
+    Route('recipe:async-recipe-list'),
+    Route('recipe:async-recipe-detail', build=detail),
+    Route('user:create', 'post', build=lambda bench: (
+        [], {
+            'email': f'{uuid.uuid4().hex}@example.com',
+            'password': 'bench-password',
+            'name': 'bench',
+        }
+    )),
+    Route('user:token', 'post', build=lambda bench: (
+        [], {'email': bench.user.email, 'password': bench.password}
+    )),
+    Route('user:me'),
+    Route('user:me', 'patch', build=lambda bench: (
+        [], {'name': f'bench {bench.next()}'}
+    )),
+]
+
+
+def route_names(namespaces=NAMESPACES):
+    # every named URL in `namespaces`, as 'namespace:name'
+    def walk(patterns, namespace):
+        for pattern in patterns:
+            if hasattr(pattern, 'url_patterns'):
+                yield from walk(
+                    pattern.url_patterns, pattern.namespace or namespace
+                )
+            elif pattern.name and namespace in namespaces:
+                yield f'{namespace}:{pattern.name}'
+    return set(walk(get_resolver().url_patterns, None))
+
+
+def uncovered(routes=ROUTES):
+    return sorted(route_names() - {route.name for route in routes})
+
+
+def percentile(samples, q):
+    # nearest rank
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+def prepare(bench, route):
+    args, data = route.build(bench) if route.build else ([], None)
+    params = route.params(bench) if callable(route.params) else route.params
+    return reverse(route.name, args=args), params, data
+
+
+def send(bench, route, prepared=None):
+    url, params, data = prepared or prepare(bench, route)
+    if route.method == 'get':
+        response = bench.client.get(url, params)
+    else:
+        response = getattr(bench.client, route.method)(
+            url, data, format=route.format, content_type=route.content_type
+        )
+    if response.streaming:
+        b''.join(response.streaming_content)
+    return response
+
+
+def measure(bench, route, requests=100, warmup=5):
+    # latency percentiles over `requests` requests after `warmup` ones,
+    # plus the queries and peak allocated memory of one more request each
+    for _ in range(warmup):
+        send(bench, route)
+    latencies, statuses = [], set()
+    for _ in range(requests):
+        prepared = prepare(bench, route)
+        start = time.perf_counter()
+        response = send(bench, route, prepared)
+        latencies.append((time.perf_counter() - start) * 1000)
+        statuses.add(response.status_code)
+
+    queries = []
+    with connection.execute_wrapper(
+        lambda execute, sql, *args: queries.append(sql) or execute(sql, *args)
+    ):
+        send(bench, route)
+
+    tracemalloc.start()
+    try:
+        send(bench, route)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'route': route.label,
+        'requests': requests,
+        'status': sorted(statuses),
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+        'mean_ms': round(statistics.mean(latencies), 3),
+        'queries': len(queries),
+        'peak_alloc_kib': round(peak / 1024, 1),
+    }
+
+
+def compare(results, baseline):
+    # per route changes against an earlier run, in the same order
+    previous = {row['route']: row for row in baseline['routes']}
+    changes = []
+    for row in results['routes']:
+        before = previous.get(row['route'])
+        if before is None:
+            continue
+        changes.append({
+            'route': row['route'],
+            **{
+                key: (before[key], row[key])
+                for key in ('p50_ms', 'p99_ms', 'queries', 'peak_alloc_kib')
+            },
+        })
+    return changes
@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Tags, Warning, register
+
+
+def process_local_cache(alias=DEFAULT_CACHE_ALIAS):
+    # True when every process has its own copy of the cache, so a delete or
+    # a version bump made by one worker is not seen by the others
+    return isinstance(caches[alias], LocMemCache)
+
+
+def cache_is_shared():
+    # whether invalidations reach every process serving requests: the cache
+    # is shared, or LOCAL_CACHE_SINGLE_PROCESS says there is only one
+    return settings.LOCAL_CACHE_SINGLE_PROCESS or not process_local_cache()
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    if cache_is_shared():
+        return []
+    return [Warning(
+        'The default cache is process-local (LocMemCache).',
+        hint=(
+            'Workers would not see each other\'s invalidations, so list '
+            'caching and the search and cookable indexes are bypassed and '
+            'cached tokens expire within seconds. Point CACHE_BACKEND and '
+            'CACHE_LOCATION at memcached or redis, or set '
+            'LOCAL_CACHE_SINGLE_PROCESS=1 when a single process serves '
+            'every request.'
+        ),
+        id='core.W001',
+    )]
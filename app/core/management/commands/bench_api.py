@@ -0,0 +1,185 @@
+import json
+import platform
+import shutil
+import subprocess
+import tempfile
+import time
+
+import django
+from django.contrib.auth import get_user_model
+from django.core.management import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    override_settings, setup_test_environment, teardown_test_environment
+)
+
+from core import benchmark
+from recipe import seeding
+from recipe.seeding import Distribution
+
+
+PASSWORD = 'bench-password'
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+            check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a throwaway test database and measure p50/p99 latency, '
+        'queries and peak allocated memory of every API route, written '
+        'as JSON'
+    )
+
+    def add_arguments(self, parser):
+        # see recipe.seeding.Distribution for the per user and per recipe
+        # counts
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument(
+            '--recipes', type=Distribution, default='1000', help='per user'
+        )
+        parser.add_argument(
+            '--tags', type=Distribution, default='50', help='per user'
+        )
+        parser.add_argument(
+            '--ingredients', type=Distribution, default='200',
+            help='per user'
+        )
+        parser.add_argument(
+            '--tags-per-recipe', type=Distribution, default='uniform:0-6'
+        )
+        parser.add_argument(
+            '--ingredients-per-recipe', type=Distribution,
+            default='uniform:2-12'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--requests', type=int, default=100)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument(
+            '--route', action='append', default=[],
+            help='only routes whose label contains this, repeatable'
+        )
+        parser.add_argument('--output', default='bench-api.json')
+        parser.add_argument(
+            '--compare', help='earlier results to print the changes against'
+        )
+        parser.add_argument(
+            '--keepdb', action='store_true',
+            help='reuse the seeded test database across runs'
+        )
+
+    def handle(self, *args, **options):
+        missing = benchmark.uncovered()
+        if missing:
+            raise CommandError(
+                f'Routes without a benchmark: {", ".join(missing)}'
+            )
+        baseline = None
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as results:
+                baseline = json.load(results)
+
+        media_root = tempfile.mkdtemp()
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, keepdb=options['keepdb']
+        )
+        try:
+            with override_settings(MEDIA_ROOT=media_root):
+                results = self.run_benchmark(options)
+        finally:
+            connection.creation.destroy_test_db(
+                old_name, verbosity=0, keepdb=options['keepdb']
+            )
+            teardown_test_environment()
+            shutil.rmtree(media_root, ignore_errors=True)
+
+        with open(options['output'], 'w', encoding='utf-8') as output:
+            json.dump(results, output, indent=2)
+        self.report(results, baseline)
+        self.stdout.write(self.style.SUCCESS(
+            f'Results written to {options["output"]}.'
+        ))
+
+    def run_benchmark(self, options):
+        volumes = {
+            name: options[name] for name in (
+                'users', 'recipes', 'tags', 'ingredients',
+                'tags_per_recipe', 'ingredients_per_recipe',
+            )
+        }
+        # requests are made as the first seeded user with recipes, tags and
+        # ingredients; a kept database is only seeded once
+        email = 'bench{}@example.com'
+        users = get_user_model().objects.filter(
+            email__in=[email.format(i) for i in range(options['users'])]
+        )
+        if not users.exists():
+            start = time.perf_counter()
+            seeding.seed(
+                seed=options['seed'], password=PASSWORD, email=email,
+                **volumes
+            )
+            self.stdout.write(
+                f'Seeded in {time.perf_counter() - start:.1f}s.'
+            )
+
+        user = benchmark.pick_user(users)
+        if user is None:
+            raise CommandError(
+                'No seeded user has recipes, tags and ingredients to '
+                'benchmark with; raise --recipes, --tags or --ingredients.'
+            )
+        bench = benchmark.Bench(user, PASSWORD)
+        routes = [
+            route for route in benchmark.ROUTES
+            if not options['route']
+            or any(part in route.label for part in options['route'])
+        ]
+        rows = []
+        for route in routes:
+            rows.append(benchmark.measure(
+                bench, route, options['requests'], options['warmup']
+            ))
+        return {
+            'commit': git_commit(),
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'seed': options['seed'],
+            'volumes': {
+                name: value if isinstance(value, int) else str(value)
+                for name, value in volumes.items()
+            },
+            'routes': rows,
+        }
+
+    def report(self, results, baseline):
+        self.stdout.write(
+            f'{"route":<48}{"p50 ms":>9}{"p99 ms":>9}{"queries":>9}'
+            f'{"KiB":>9}'
+        )
+        for row in results['routes']:
+            self.stdout.write(
+                f'{row["route"]:<48}{row["p50_ms"]:>9.2f}'
+                f'{row["p99_ms"]:>9.2f}{row["queries"]:>9}'
+                f'{row["peak_alloc_kib"]:>9.1f}'
+            )
+        if baseline is None:
+            return
+        self.stdout.write(f'\nChanges against {baseline.get("commit")}:')
+        for change in benchmark.compare(results, baseline):
+            before, after = change['p50_ms']
+            self.stdout.write(
+                f'{change["route"]:<48}'
+                f'p50 {before:.2f} -> {after:.2f} ms, '
+                'queries {} -> {}'.format(*change['queries'])
+            )
@@ -0,0 +1,147 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+from django.db import connections
+from gunicorn.app.base import BaseApplication
+
+from core import metrics, warmup
+from core.checks import process_local_cache
+
+
+def default_workers():
+    return int(os.environ.get(
+        'WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1
+    ))
+
+
+class Application(BaseApplication):
+    # gunicorn driven from the command line options below, with the
+    # Django app loaded once in the master and inherited by every worker.
+    # `warm` holds warmup.warm_up() arguments to prime the caches in the
+    # master too, or None.
+
+    def __init__(self, options, warm=None):
+        self.options = options
+        self.warm = warm
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        from recipes.wsgi import application
+
+        # a freshly forked worker has nothing left to import
+        warmup.import_application()
+        if self.warm is not None:
+            # shared caches keep the entries, a local memory cache is
+            # inherited by every fork
+            warmup.warm_up(**self.warm)
+        # forks must not share connections opened while loading
+        connections.close_all()
+        return application
+
+
+def post_fork(server, worker):
+    # each worker connects before taking requests, which keeps the
+    # connections when DB_CONN_MAX_AGE allows it
+    warmup.open_connections()
+
+
+class Command(BaseCommand):
+    help = (
+        'Serve the API with preforked gunicorn workers. The app is loaded '
+        'before forking and workers are recycled after --max-requests. '
+        'SIGHUP gracefully replaces the workers (new settings, same code), '
+        'SIGUSR2 then SIGQUIT to the old master upgrades to new code with '
+        'no dropped connections.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bind', default='0.0.0.0:8000')
+        parser.add_argument('--workers', type=int, default=default_workers())
+        parser.add_argument(
+            '--threads', type=int, default=1,
+            help='threads per worker, more than one uses gthread workers'
+        )
+        parser.add_argument(
+            '--max-requests', type=int, default=1000,
+            help='recycle a worker after this many requests, 0 disables'
+        )
+        parser.add_argument(
+            '--max-requests-jitter', type=int, default=100,
+            help='random extra requests so workers do not restart together'
+        )
+        parser.add_argument('--timeout', type=int, default=30)
+        parser.add_argument('--graceful-timeout', type=int, default=30)
+        parser.add_argument('--access-log', default=None,
+                            help='"-" logs requests to stdout')
+        parser.add_argument(
+            '--warmup', action='store_true',
+            help='prime the token and list caches before forking'
+        )
+        parser.add_argument(
+            '--warm-users', type=int, default=100,
+            help='users whose token and list caches are primed'
+        )
+        parser.add_argument(
+            '--warm-host', action='append', dest='warm_hosts',
+            help='host clients send, repeatable; list cache keys include '
+                 'it. Defaults to ALLOWED_HOSTS without wildcards.'
+        )
+
+    def get_config(self, options):
+        return {
+            'bind': options['bind'],
+            'workers': options['workers'],
+            'threads': options['threads'],
+            'max_requests': options['max_requests'],
+            'max_requests_jitter': options['max_requests_jitter'],
+            'timeout': options['timeout'],
+            'graceful_timeout': options['graceful_timeout'],
+            'accesslog': options['access_log'],
+            'preload_app': True,
+            'post_fork': post_fork,
+        }
+
+    def check_cache(self, workers):
+        # each worker would get its own LocMemCache
+        if workers < 2 or not process_local_cache():
+            return
+        if settings.LOCAL_CACHE_SINGLE_PROCESS:
+            raise CommandError(
+                f'LOCAL_CACHE_SINGLE_PROCESS is set but {workers} workers '
+                'would each have their own cache and serve stale lists. '
+                'Configure a shared CACHE_BACKEND or use --workers 1.'
+            )
+        self.stderr.write(self.style.WARNING(
+            f'The cache is local to each of the {workers} workers, so list '
+            'caching and the search and cookable indexes are bypassed. '
+            'Configure a shared CACHE_BACKEND.'
+        ))
+
+    def handle(self, *args, **options):
+        self.check_cache(options['workers'])
+        warm = None
+        if options['warmup']:
+            warm = {
+                'users': options['warm_users'],
+                'hosts': options['warm_hosts'],
+                'log': self.stdout.write,
+            }
+        # each worker writes its metrics there, /metrics adds them up
+        directory = settings.METRICS_DIR or tempfile.mkdtemp(
+            prefix='recipe-metrics-'
+        )
+        metrics.share(directory)
+        try:
+            Application(self.get_config(options), warm).run()
+        finally:
+            metrics.share(None)
+            if not settings.METRICS_DIR:
+                shutil.rmtree(directory, ignore_errors=True)
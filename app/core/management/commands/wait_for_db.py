@@ -1,19 +1,41 @@
 import time
 
-from django.db import connections
+from django.core.management import BaseCommand, CommandError
 from django.db.utils import OperationalError
-from django.core.management import BaseCommand
+
+from core import warmup
+
 
 class Command(BaseCommand):
+    help = (
+        'Wait until the database accepts connections, retrying with '
+        'exponential backoff. Warming up is done by serve --warmup, in the '
+        'process that serves the requests.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+        parser.add_argument(
+            '--timeout', type=float, default=60,
+            help='give up after this many seconds'
+        )
 
     def handle(self, *args, **options):
+        start = time.monotonic()
         self.stdout.write('Waiting for database...')
-        db_conn = None
-        while not db_conn:
-            try:
-                db_conn = connections['default']
-            except OperationalError:
-                self.stdout.write('Database unavilable, Wiating for 1 second')
-                time.sleep(1)
-
-        self.stdout.write(self.style.SUCCESS('Database connection successful.'))
\ No newline at end of file
+        try:
+            elapsed = warmup.wait_for_database(
+                options['database'],
+                timeout=options['timeout'],
+                log=self.stdout.write,
+            )
+        except OperationalError as exc:
+            raise CommandError(
+                f'Database unavailable after {options["timeout"]}s: {exc}'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Database connection successful after {elapsed:.2f}s.'
+        ))
+        self.stdout.write(
+            f'Ready in {time.monotonic() - start:.2f}s.'
+        )
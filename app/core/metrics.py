@@ -0,0 +1,298 @@
+import atexit
+import json
+import math
+import os
+import threading
+import uuid
+from bisect import bisect_left
+
+from django.core.signals import request_finished
+from django.dispatch import receiver
+
+
+# Minimal metrics registry rendered in the Prometheus text format by
+# core.views.metrics. Values are kept per process. Preforked workers
+# (manage.py serve) each write theirs to a file in a shared directory, see
+# share(), and a scrape adds up every file, so whichever worker answers
+# it reports the totals of all of them.
+
+DEFAULT_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10
+)
+
+_registry = []
+_directory = None
+_file = None
+_flush_lock = threading.Lock()
+
+
+def format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value))
+
+
+def format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (
+        (name, str(value).replace('\\', r'\\').replace('"', r'\"')
+         .replace('\n', r'\n'))
+        for name, value in pairs
+    )
+    return '{%s}' % ','.join(f'{name}="{value}"' for name, value in escaped)
+
+
+class Metric:
+    type = None
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def key(self, labels):
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                key: self.copy(value) for key, value in self._values.items()
+            }
+
+    def merge(self, values, items):
+        # adds [[key, value], ...] read from a process file to `values`
+        for key, value in items:
+            key = tuple(key)
+            values[key] = (
+                self.add(values[key], value) if key in values else value
+            )
+
+    def render(self, values=None):
+        lines = [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} {self.type}',
+        ]
+        if values is None:
+            values = self.snapshot()
+        for key, value in sorted(values.items()):
+            lines.extend(self.render_value(key, value))
+        return lines
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self.key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def copy(self, value):
+        return value
+
+    def add(self, value, other):
+        return value + other
+
+    def value(self, **labels):
+        return self._values.get(self.key(labels), 0)
+
+    def render_value(self, key, value):
+        labels = format_labels(self.labels, key)
+        return [f'{self.name}{labels} {format_value(value)}']
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labels=(),
+                 buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self.key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.get(
+                key, ([0] * len(self.buckets), 0)
+            )
+            counts[index] += 1
+            self._values[key] = (counts, total + value)
+
+    def copy(self, value):
+        counts, total = value
+        return (list(counts), total)
+
+    def add(self, value, other):
+        (counts, total), (other_counts, other_total) = value, other
+        return (
+            [a + b for a, b in zip(counts, other_counts)],
+            total + other_total
+        )
+
+    def count(self, **labels):
+        counts, _ = self._values.get(self.key(labels), ([], 0))
+        return sum(counts)
+
+    def render_value(self, key, value):
+        counts, total = value
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, counts):
+            cumulative += count
+            labels = format_labels(
+                self.labels, key, [('le', format_value(bound))]
+            )
+            lines.append(f'{self.name}_bucket{labels} {cumulative}')
+        labels = format_labels(self.labels, key)
+        lines.append(f'{self.name}_sum{labels} {format_value(total)}')
+        lines.append(f'{self.name}_count{labels} {cumulative}')
+        return lines
+
+
+def share(directory):
+    # Called by the master before forking: every process then writes its
+    # values to its own file in `directory`, which starts empty. Files of
+    # recycled workers are kept so their counts stay in the totals. None
+    # goes back to values of this process only.
+    global _directory
+    if directory is None:
+        _directory = None
+        return
+    os.makedirs(directory, exist_ok=True)
+    for name in os.listdir(directory):
+        if name.endswith('.json'):
+            os.remove(os.path.join(directory, name))
+    _directory = directory
+    reset_process()
+
+
+def reset_process():
+    # a fork starts from zero in a file of its own, what it inherited is
+    # counted by the parent
+    global _file
+    for metric in _registry:
+        metric._lock = threading.Lock()
+        metric._values = {}
+    _file = None
+
+
+@receiver(request_finished)
+def flush(**kwargs):
+    # writes this process's values to its file in the shared directory,
+    # after every request including streamed ones
+    global _file
+    if _directory is None:
+        return
+    with _flush_lock:
+        if _file is None:
+            _file = os.path.join(
+                _directory, f'{os.getpid()}-{uuid.uuid4().hex}.json'
+            )
+        snapshot = {
+            metric.name: list(metric.snapshot().items())
+            for metric in _registry
+        }
+        partial = f'{_file}.partial'
+        with open(partial, 'w', encoding='utf-8') as output:
+            json.dump(snapshot, output)
+        os.replace(partial, _file)
+
+
+def read_shared():
+    # {metric name: {key: value}} summed over every process file
+    flush()
+    values = {metric.name: {} for metric in _registry}
+    metrics = {metric.name: metric for metric in _registry}
+    for name in os.listdir(_directory):
+        if not name.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(_directory, name), encoding='utf-8') as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            continue
+        for metric_name, items in snapshot.items():
+            if metric_name in metrics:
+                metrics[metric_name].merge(values[metric_name], items)
+    return values
+
+
+def render():
+    shared = read_shared() if _directory is not None else {}
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render(shared.get(metric.name)))
+    return '\n'.join(lines) + '\n'
+
+
+def flush_at_exit():
+    # recycled workers leave their final counts behind
+    if _file is not None:
+        flush()
+
+
+os.register_at_fork(after_in_child=reset_process)
+atexit.register(flush_at_exit)
+
+
+response_latency = Histogram(
+    'http_response_latency_seconds',
+    'Time from request to response headers, by content encoding',
+    labels=('encoding',),
+)
+compressed_responses = Counter(
+    'http_compressed_responses_total',
+    'Responses compressed by the compression middleware',
+    labels=('encoding', 'streaming'),
+)
+compression_bytes = Counter(
+    'http_compression_bytes_total',
+    'Bytes before (in) and after (out) compression',
+    labels=('encoding', 'direction'),
+)
+compression_cpu = Histogram(
+    'http_compression_cpu_seconds',
+    'CPU time spent compressing one response body',
+    labels=('encoding',),
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+             0.05, 0.1, 0.25, 1),
+)
+
+# per view timings, see core.middleware.TimingMiddleware
+VIEW_LABELS = ('view', 'method')
+view_duration = Histogram(
+    'http_view_duration_seconds',
+    'Time from request to response headers, by view',
+    labels=VIEW_LABELS,
+)
+view_db = Histogram(
+    'http_view_db_seconds',
+    'Time spent in SQL queries during one request',
+    labels=VIEW_LABELS,
+)
+view_queries = Histogram(
+    'http_view_db_queries',
+    'SQL queries made during one request',
+    labels=VIEW_LABELS,
+    buckets=(0, 1, 2, 3, 5, 8, 13, 20, 30, 50, 100),
+)
+view_serialize = Histogram(
+    'http_view_serialize_seconds',
+    'Time spent validating, saving and representing with serializers',
+    labels=VIEW_LABELS,
+)
+view_render = Histogram(
+    'http_view_render_seconds',
+    'Time spent rendering the response body',
+    labels=VIEW_LABELS,
+)
@@ -0,0 +1,331 @@
+import re
+import time
+import zlib
+from urllib.parse import urlparse
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.views import View
+
+from core import metrics, timing
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+ACCEPT_ENCODING = re.compile(r'\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([\d.]+))?')
+
+
+class GzipCompressor:
+    def __init__(self, level):
+        self.compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + 15)
+
+    def compress(self, data):
+        return self.compressor.compress(data)
+
+    def flush(self):
+        return self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self.compressor.flush()
+
+
+class BrotliCompressor:
+    def __init__(self, level):
+        self.compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data):
+        return self.compressor.process(data)
+
+    def flush(self):
+        return self.compressor.flush()
+
+    def finish(self):
+        return self.compressor.finish()
+
+
+def available_encodings():
+    # best first
+    encodings = {'gzip': GzipCompressor}
+    if brotli is not None:
+        encodings = {'br': BrotliCompressor, **encodings}
+    return encodings
+
+
+def choose_encoding(accept_encoding, encodings):
+    weights = {}
+    for coding, q in ACCEPT_ENCODING.findall(accept_encoding.lower()):
+        try:
+            weights[coding] = float(q) if q else 1.0
+        except ValueError:
+            continue
+    best = None
+    for coding in encodings:
+        weight = weights.get(coding, weights.get('*', 0))
+        if weight > 0 and (best is None or weight > best[1]):
+            best = (coding, weight)
+    return best and best[0]
+
+
+def url_path(url):
+    return '/' + urlparse(url).path.strip('/') + '/'
+
+
+def count_compressed(encoding, size_in, size_out, streaming):
+    metrics.compressed_responses.inc(
+        encoding=encoding, streaming=str(streaming).lower()
+    )
+    metrics.compression_bytes.inc(size_in, encoding=encoding, direction='in')
+    metrics.compression_bytes.inc(
+        size_out, encoding=encoding, direction='out'
+    )
+
+
+class StreamedCompression:
+    # the state of one streamed response, shared by the sync and async
+    # iterators of CompressionMiddleware
+
+    def __init__(self, compressor, encoding):
+        self.compressor = compressor
+        self.encoding = encoding
+        self.size_in = self.size_out = 0
+        self.cpu = 0.0
+
+    def compress(self, chunk):
+        started = time.thread_time()
+        data = self.compressor.compress(chunk) + self.compressor.flush()
+        self.cpu += time.thread_time() - started
+        self.size_in += len(chunk)
+        self.size_out += len(data)
+        return data
+
+    def finish(self):
+        data = self.compressor.finish()
+        self.size_out += len(data)
+        metrics.compression_cpu.observe(self.cpu, encoding=self.encoding)
+        count_compressed(self.encoding, self.size_in, self.size_out, True)
+        return data
+
+
+class CompressionMiddleware:
+    # gzip or brotli, whichever the client prefers (brotli when the brotli
+    # package is installed and the client weighs both equally). Bodies
+    # under COMPRESSION_MIN_SIZE, media and static files, already
+    # compressed content types and routes given level 0 in
+    # COMPRESSION_ROUTE_LEVELS are left alone. Streaming responses are
+    # compressed chunk by chunk, flushed after each one so clients still
+    # see data as it is produced. Runs natively under both WSGI and ASGI.
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.skip_paths = tuple(
+            url_path(url) for url in (settings.MEDIA_URL, settings.STATIC_URL)
+            if url
+        )
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        start = time.perf_counter()
+        response = self.get_response(request)
+        return self.finish(request, response, start)
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        return self.finish(request, response, start)
+
+    def finish(self, request, response, start):
+        encoding = self.compress(request, response) or 'identity'
+        metrics.response_latency.observe(
+            time.perf_counter() - start, encoding=encoding
+        )
+        return response
+
+    def get_level(self, request, encoding):
+        match = getattr(request, 'resolver_match', None)
+        levels = settings.COMPRESSION_ROUTE_LEVELS.get(
+            match and match.view_name, settings.COMPRESSION_LEVELS
+        )
+        return levels.get(encoding, 0) if isinstance(levels, dict) else levels
+
+    def should_compress(self, request, response):
+        if response.has_header('Content-Encoding'):
+            return False
+        if not response.streaming and (
+            len(response.content) < settings.COMPRESSION_MIN_SIZE
+        ):
+            return False
+        if request.path_info.startswith(self.skip_paths):
+            return False
+        content_type = response.get('Content-Type', '').split(';')[0]
+        return not content_type.startswith(settings.COMPRESSION_SKIP_TYPES)
+
+    def compress(self, request, response):
+        if not self.should_compress(request, response):
+            return None
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encodings = available_encodings()
+        encoding = choose_encoding(
+            request.META.get('HTTP_ACCEPT_ENCODING', ''), encodings
+        )
+        level = encoding and self.get_level(request, encoding)
+        if not level:
+            return None
+        compressor = encodings[encoding](level)
+
+        if response.streaming:
+            # async iterators are streamed by Django 4.2 and later
+            stream = (
+                self.astream if getattr(response, 'is_async', False)
+                else self.stream
+            )
+            response.streaming_content = stream(
+                compressor, encoding, response.streaming_content
+            )
+            del response['Content-Length']
+        else:
+            started = time.thread_time()
+            body = compressor.compress(response.content) + compressor.finish()
+            if len(body) >= len(response.content):
+                return None
+            metrics.compression_cpu.observe(
+                time.thread_time() - started, encoding=encoding
+            )
+            count_compressed(
+                encoding, len(response.content), len(body), False
+            )
+            response.content = body
+            response['Content-Length'] = str(len(body))
+
+        # the compressed bytes differ, so a strong validator would lie
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return encoding
+
+    def stream(self, compressor, encoding, chunks):
+        streamed = StreamedCompression(compressor, encoding)
+        for chunk in chunks:
+            data = streamed.compress(chunk)
+            if data:
+                yield data
+        yield streamed.finish()
+
+    async def astream(self, compressor, encoding, chunks):
+        streamed = StreamedCompression(compressor, encoding)
+        async for chunk in chunks:
+            data = streamed.compress(chunk)
+            if data:
+                yield data
+        yield streamed.finish()
+
+
+def view_label(request):
+    # 'RecipeViewSet.list' for viewsets, the class name for other API
+    # views and the url name for plain views
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    view_class = getattr(match.func, 'cls', None)
+    if view_class is None:
+        return match.view_name
+    actions = getattr(match.func, 'actions', None) or {}
+    action = actions.get(request.method.lower())
+    return f'{view_class.__name__}.{action}' if action else view_class.__name__
+
+
+class TimingMiddleware:
+    # Times each request and the database, serializer and render phases
+    # inside it (see core.timing) into the per view http_view_*
+    # histograms. With SERVER_TIMING_HEADER the same figures are sent to
+    # the client as a Server-Timing header; it reveals query counts, so
+    # leave it off where clients are not trusted. Streamed bodies are
+    # produced after the response leaves, their work is not counted. Runs
+    # natively under both WSGI and ASGI.
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+            # Django runs sync hooks of async middleware in a thread
+            self.process_template_response = (
+                self.aprocess_template_response
+            )
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not settings.REQUEST_TIMING:
+            return self.get_response(request)
+        token = timing.start()
+        timings = timing.current()
+        try:
+            response = self.get_response(request)
+        finally:
+            timing.stop(token)
+        return self.finish(request, response, timings)
+
+    async def __acall__(self, request):
+        if not settings.REQUEST_TIMING:
+            return await self.get_response(request)
+        token = timing.start()
+        timings = timing.current()
+        try:
+            response = await self.get_response(request)
+        finally:
+            timing.stop(token)
+        return self.finish(request, response, timings)
+
+    def finish(self, request, response, timings):
+        # queries are counted by core.timing.record_query
+        timings.finish()
+        self.observe(request, timings)
+        if settings.SERVER_TIMING_HEADER:
+            response['Server-Timing'] = timings.header()
+        return response
+
+    def process_template_response(self, request, response):
+        # rendering happens after this, ending in the post render callbacks
+        timings = timing.current()
+        if timings is not None and not response.is_rendered:
+            start = time.perf_counter()
+
+            def rendered(response):
+                timings.durations['render'] += time.perf_counter() - start
+
+            response.add_post_render_callback(rendered)
+        return response
+
+    async def aprocess_template_response(self, request, response):
+        return TimingMiddleware.process_template_response(
+            self, request, response
+        )
+
+    def observe(self, request, timings):
+        method = request.method.lower()
+        labels = {
+            'view': view_label(request),
+            'method': method if method in View.http_method_names else 'other',
+        }
+        metrics.view_duration.observe(timings.total, **labels)
+        metrics.view_db.observe(timings.durations['db'], **labels)
+        metrics.view_queries.observe(timings.queries, **labels)
+        metrics.view_serialize.observe(
+            timings.durations['serialize'], **labels
+        )
+        metrics.view_render.observe(timings.durations['render'], **labels)
@@ -0,0 +1,45 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+# Full text and trigram indexes backing recipe.search on PostgreSQL. The
+# tsvector expressions must match SearchVector(field, config='simple').
+SEARCH_INDEXES = [
+    ('core_recipe', 'title'),
+    ('core_tag', 'name'),
+    ('core_ingredient', 'name'),
+]
+
+
+def create_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table, column in SEARCH_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX {table}_{column}_tsv ON {table} USING gin '
+            f"(to_tsvector('simple'::regconfig, COALESCE({column}, '')))"
+        )
+        schema_editor.execute(
+            f'CREATE INDEX {table}_{column}_trgm ON {table} USING gin '
+            f'({column} gin_trgm_ops)'
+        )
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table, column in SEARCH_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {table}_{column}_tsv')
+        schema_editor.execute(f'DROP INDEX IF EXISTS {table}_{column}_trgm')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_content_addressed_recipe_image'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,137 @@
+# Generated by Django 4.0.10 on 2026-10-18 20:02
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# Reverse lookups on the many to many tables (recipes of a tag or an
+# ingredient) get an index leading with the target column that also covers
+# recipe_id. Django's single column indexes are dropped: the new index and
+# the (recipe_id, target) unique constraint lead with those columns.
+THROUGH_INDEXES = [
+    ('core_recipe_tags', 'tag_id'),
+    ('core_recipe_ingrediant', 'ingredient_id'),
+]
+
+
+def single_column_indexes(schema_editor, table, column):
+    constraints = schema_editor.connection.introspection.get_constraints(
+        schema_editor.connection.cursor(), table
+    )
+    return [
+        name for name, info in constraints.items()
+        if info['index'] and not info['unique'] and not info['primary_key']
+        and info['columns'] == [column]
+    ]
+
+
+def create_through_indexes(apps, schema_editor):
+    for table, column in THROUGH_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX {table}_{column}_recipe ON {table} '
+            f'({column}, recipe_id)'
+        )
+        for indexed in ('recipe_id', column):
+            for name in single_column_indexes(schema_editor, table, indexed):
+                schema_editor.execute(f'DROP INDEX {name}')
+
+
+def drop_through_indexes(apps, schema_editor):
+    for table, column in THROUGH_INDEXES:
+        for indexed in ('recipe_id', column):
+            schema_editor.execute(
+                f'CREATE INDEX {table}_{indexed} ON {table} ({indexed})'
+            )
+        schema_editor.execute(f'DROP INDEX {table}_{column}_recipe')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_recipe_stats'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ingredient',
+            index=models.Index(fields=['user', 'id'], name='ingredient_user_id'),
+        ),
+        migrations.AddIndex(
+            model_name='ingredient',
+            index=models.Index(fields=['user', 'name'], name='ingredient_user_name'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['user', 'id'], name='recipe_user_id'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['user', 'updated_at', 'id'], name='recipe_user_updated'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['user', 'title'], name='recipe_user_title'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['user', 'price'], name='recipe_user_price'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['user', 'time_min'], name='recipe_user_time_min'),
+        ),
+        migrations.AddIndex(
+            model_name='recipetombstone',
+            index=models.Index(fields=['user', 'deleted_at', 'id'], name='tombstone_user_deleted'),
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(fields=['user', 'id'], name='tag_user_id'),
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(fields=['user', 'name'], name='tag_user_name'),
+        ),
+        # top tags and ingredients are ordered by count then value
+        migrations.RemoveIndex(
+            model_name='recipestatcount',
+            name='recipe_stat_count_top',
+        ),
+        migrations.AddIndex(
+            model_name='recipestatcount',
+            index=models.Index(fields=['user', 'kind', '-count', 'value'], name='recipe_stat_count_top'),
+        ),
+        migrations.RunPython(create_through_indexes, drop_through_indexes),
+        # the single column indexes the composite ones make redundant
+        migrations.AlterField(
+            model_name='ingredient',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='recipetombstone',
+            name='deleted_at',
+            field=models.DateTimeField(auto_now_add=True),
+        ),
+        migrations.AlterField(
+            model_name='recipetombstone',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='tag',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+    ]
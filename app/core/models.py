@@ -1,15 +1,26 @@
-from django.db import models
+from contextvars import ContextVar
+
+from django.db import models, transaction
 import uuid
 import os
 from django.contrib.auth.models import AbstractBaseUser,BaseUserManager,PermissionsMixin
 from django.conf import settings
 
+from core.storage import recipe_image_storage
+
+
+RECIPE_IMAGE_DIR = 'uploads/recipe/'
+
+# pks of the users whose delete() is running. Their recipes go with them,
+# so recipe.signals skips the per-recipe bookkeeping the cascade makes moot.
+deleting_users = ContextVar('deleting_users', default=frozenset())
+
 
 def recipe_image_file_path(instance, filename):
     ext = filename.split('.')[-1]
     filename = f'{uuid.uuid4()}.{ext}'
 
-    return os.path.join('uploads/recipe/', filename)
+    return os.path.join(RECIPE_IMAGE_DIR, filename)
 
 
 class UserManager(BaseUserManager):
@@ -43,14 +54,31 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     USERNAME_FIELD = 'email'
 
+    def delete(self, *args, **kwargs):
+        token = deleting_users.set(deleting_users.get() | {self.pk})
+        try:
+            return super().delete(*args, **kwargs)
+        finally:
+            deleting_users.reset(token)
+
 
 class Tag(models.Model):
     name = models.CharField(max_length=255)
+    # indexed through the composite indexes below, which lead with it
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
+        db_index=False
     )
 
+    class Meta:
+        indexes = [
+            # keyset pages: WHERE user_id = %s AND id < %s ORDER BY id DESC
+            models.Index(fields=['user', 'id'], name='tag_user_id'),
+            # name lookups of get_or_create and the importer
+            models.Index(fields=['user', 'name'], name='tag_user_name'),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -59,15 +87,25 @@ class Ingredient(models.Model):
     name = models.CharField(max_length=255)
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
-        on_delete=models.CASCADE
+        on_delete=models.CASCADE,
+        db_index=False
     )
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'id'], name='ingredient_user_id'),
+            models.Index(
+                fields=['user', 'name'], name='ingredient_user_name'
+            ),
+        ]
+
     def __str__(self):
         return self.name
 class Recipe(models.Model):
     user=models.ForeignKey(
         settings.AUTH_USER_MODEL,
-        on_delete=models.CASCADE
+        on_delete=models.CASCADE,
+        db_index=False
     )
     title=models.CharField(max_length=255)
     time_min=models.IntegerField()
@@ -75,7 +113,112 @@ class Recipe(models.Model):
     link=models.CharField(max_length=255, blank=True)
     ingrediant=models.ManyToManyField(Ingredient)
     tags=models.ManyToManyField(Tag)
-    image = models.ImageField(null=True, upload_to=recipe_image_file_path)
+    # identical uploads share one file, indexed to count references
+    image = models.ImageField(
+        null=True,
+        upload_to=recipe_image_file_path,
+        storage=recipe_image_storage,
+        db_index=True
+    )
+    # {width: {format: name}} filled in by recipe.thumbnails
+    thumbnails = models.JSONField(default=dict, blank=True)
+    # bumped on every change to the recipe or its tags/ingredients, see
+    # recipe.signals
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # keyset pages of the list and the export cursor
+            models.Index(fields=['user', 'id'], name='recipe_user_id'),
+            # delta syncs and collection Last-Modified
+            models.Index(
+                fields=['user', 'updated_at', 'id'], name='recipe_user_updated'
+            ),
+            models.Index(fields=['user', 'title'], name='recipe_user_title'),
+            # the price and time_min groupings of recipe.stats.compute()
+            models.Index(fields=['user', 'price'], name='recipe_user_price'),
+            models.Index(
+                fields=['user', 'time_min'], name='recipe_user_time_min'
+            ),
+        ]
 
     def __str__(self):
-        return self.title
\ No newline at end of file
+        return self.title
+
+    def save(self, *args, **kwargs):
+        # recipe.signals locks the row to read the values being replaced,
+        # the lock has to last until the statistics are updated
+        with transaction.atomic(using=kwargs.get('using'), savepoint=False):
+            super().save(*args, **kwargs)
+
+
+class RecipeTombstone(models.Model):
+    # left behind when a recipe is deleted so delta syncs can report it
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        db_index=False
+    )
+    recipe_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', 'deleted_at', 'id'],
+                name='tombstone_user_deleted'
+            ),
+        ]
+
+
+class RecipeStats(models.Model):
+    # running totals of a user's recipes, kept up to date by
+    # recipe.signals and rebuilt by manage.py rebuild_recipe_stats
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True
+    )
+    recipe_count = models.IntegerField(default=0)
+    price_total = models.DecimalField(
+        max_digits=14, decimal_places=2, default=0
+    )
+    time_total = models.BigIntegerField(default=0)
+
+
+class RecipeStatCount(models.Model):
+    # how many of a user's recipes have each price (in cents) and each
+    # time_min, and use each tag and ingredient (by id). Min, max, the
+    # histogram and the most used names are read from these rows.
+    PRICE = 'price'
+    TIME = 'time'
+    TAG = 'tag'
+    INGREDIENT = 'ingredient'
+    KINDS = [
+        (PRICE, 'price'),
+        (TIME, 'time_min'),
+        (TAG, 'tag'),
+        (INGREDIENT, 'ingredient'),
+    ]
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE
+    )
+    kind = models.CharField(max_length=16, choices=KINDS)
+    value = models.BigIntegerField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'kind', 'value'],
+                name='recipe_stat_count_unique'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', 'kind', '-count', 'value'],
+                name='recipe_stat_count_top'
+            ),
+        ]
@@ -0,0 +1,30 @@
+import msgpack
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+
+
+def from_columns(data):
+    # inverse of core.renderers.to_columns for request bodies
+    if isinstance(data, dict) and set(data) == {'columns', 'rows'}:
+        try:
+            return [dict(zip(data['columns'], row)) for row in data['rows']]
+        except TypeError:
+            raise ParseError('Columnar body must hold lists of values.')
+    return data
+
+
+class ColumnarJSONParser(JSONParser):
+    media_type = 'application/vnd.recipe.columnar+json'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        return from_columns(super().parse(stream, media_type, parser_context))
+
+
+class MessagePackParser(BaseParser):
+    media_type = 'application/msgpack'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read())
+        except (ValueError, msgpack.UnpackException) as exc:
+            raise ParseError(f'MessagePack parse error - {exc}')
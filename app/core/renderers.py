@@ -0,0 +1,77 @@
+import msgpack
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class ORJSONRenderer(JSONRenderer):
+    # Produces the same bytes as JSONRenderer, several times faster, when
+    # orjson is installed. Indented output (Accept: application/json;
+    # indent=4) and anything orjson refuses go through JSONRenderer.
+    # Datetimes are handed to DRF's encoder so they keep its format.
+    options = 0 if orjson is None else (
+        orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+    )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or self.get_indent(
+            accepted_media_type, renderer_context or {}
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(
+                data, default=self.encoder_class().default,
+                option=self.options
+            )
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # JSONRenderer escapes these so the output is valid javascript
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(
+            b'\xe2\x80\xa9', b'\\u2029'
+        )
+
+
+def to_columns(data):
+    # [{'id': 1, 'name': 'a'}, ...] -> {'columns': ['id', 'name'],
+    # 'rows': [[1, 'a'], ...]}, also for the results of a paginated page.
+    # Anything else is returned unchanged.
+    if isinstance(data, dict) and isinstance(data.get('results'), list):
+        return {**data, 'results': to_columns(data['results'])}
+    if not isinstance(data, list) or not all(
+        isinstance(item, dict) for item in data
+    ):
+        return data
+    columns = list(data[0]) if data else []
+    if any(list(item) != columns for item in data):
+        return data
+    return {
+        'columns': columns,
+        'rows': [list(item.values()) for item in data],
+    }
+
+
+class ColumnarJSONRenderer(ORJSONRenderer):
+    # JSON with the keys of list items sent once instead of per item
+    media_type = 'application/vnd.recipe.columnar+json'
+    format = 'columnar'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return super().render(
+            to_columns(data), accepted_media_type, renderer_context
+        )
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=JSONEncoder().default)
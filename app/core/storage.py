@@ -0,0 +1,82 @@
+import hashlib
+import os
+import tempfile
+import time
+import uuid
+
+from django.core.files.storage import FileSystemStorage
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    # Files are named after the SHA-256 of their bytes:
+    # `<upload_to dir>/<first 2 hex>/<digest><ext>`. The digest is computed
+    # chunk by chunk while the upload is copied to a temporary file, which
+    # is then either renamed into place or dropped if the same content is
+    # already stored, in which case the stored file is touched. Deleting
+    # files that are no longer referenced is up to the models using the
+    # storage, through delete_stale().
+
+    def get_available_name(self, name, max_length=None):
+        # the final name comes from the content, see _save
+        return name
+
+    def _save(self, name, content):
+        directory = os.path.dirname(name)
+        ext = os.path.splitext(name)[1].lower()
+        full_directory = self.path(directory)
+        os.makedirs(full_directory, exist_ok=True)
+
+        digest = hashlib.sha256()
+        fd, temp_path = tempfile.mkstemp(dir=full_directory, suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    temp_file.write(chunk)
+
+            hexdigest = digest.hexdigest()
+            name = os.path.join(directory, hexdigest[:2], hexdigest + ext)
+            full_path = self.path(name)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            if self.touch(full_path):
+                os.remove(temp_path)
+            else:
+                if self.file_permissions_mode is not None:
+                    os.chmod(temp_path, self.file_permissions_mode)
+                os.replace(temp_path, full_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        return name.replace('\\', '/')
+
+    def touch(self, path):
+        # False when there is no file to reuse
+        try:
+            os.utime(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def delete_stale(self, name, max_age):
+        # Deletes `name` unless it was written or reused by _save() within
+        # the last `max_age` seconds. The file is moved aside first, so a
+        # concurrent _save() of the same content either touched it before
+        # (and it is put back) or finds it gone and writes it again. Returns
+        # whether the file was deleted.
+        path = self.path(name)
+        aside = f'{path}.{uuid.uuid4().hex}.deleting'
+        try:
+            os.rename(path, aside)
+        except FileNotFoundError:
+            return False
+        if time.time() - os.stat(aside).st_mtime < max_age:
+            os.replace(aside, path)
+            return False
+        os.remove(aside)
+        return True
+
+
+def recipe_image_storage():
+    return ContentAddressedStorage()
@@ -0,0 +1,125 @@
+from unittest.mock import patch
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.authentication import (
+    local_token_cache, token_cache_key, token_cache_timeout
+)
+from user.views import ManageUserView
+
+
+ME_URL = reverse('user:me')
+
+
+class CachedTokenAuthenticationTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        local_token_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email='test@gmail.com',
+            password='test123',
+            name='test'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def queries_for_request(self):
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(ME_URL)
+        return res, len(queries)
+
+    def test_queries_per_request_before_and_after(self):
+        # ManageUserView.get does no queries of its own, so everything
+        # counted here is authentication
+        with patch.object(
+            ManageUserView, 'authentication_classes', (TokenAuthentication,)
+        ):
+            uncached = [self.queries_for_request()[1] for _ in range(3)]
+        cached = [self.queries_for_request()[1] for _ in range(3)]
+
+        self.assertEqual(uncached, [1, 1, 1])
+        self.assertEqual(cached, [1, 0, 0])
+
+    def test_invalid_token_rejected(self):
+        self.client.credentials(HTTP_AUTHORIZATION='Token invalid')
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_rotated_token_rejected(self):
+        self.queries_for_request()
+        self.token.delete()
+        Token.objects.create(user=self.user)
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_token_cached_before_commit_dropped(self):
+        self.queries_for_request()
+        key = self.token.key
+        stale = cache.get(token_cache_key(key))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.token.delete()
+            # a concurrent request still reading the committed token
+            cache.set(token_cache_key(key), stale)
+            local_token_cache.set(key, stale)
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_rejected(self):
+        self.queries_for_request()
+        self.user.is_active = False
+        self.user.save()
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_profile_update_refreshes_cached_user(self):
+        self.queries_for_request()
+
+        self.client.patch(ME_URL, {'name': 'new name', 'password': 'newpass'})
+        res, num_queries = self.queries_for_request()
+
+        self.assertEqual(num_queries, 1)
+        self.assertEqual(res.data['name'], 'new name')
+
+    def test_password_hash_not_cached(self):
+        self.queries_for_request()
+
+        cached = cache.get(token_cache_key(self.token.key))
+        self.assertNotIn(self.user.password, repr(cached))
+        res, _ = self.queries_for_request()
+        self.assertEqual(res.data['email'], self.user.email)
+
+    def test_invalidation_reads_keys_from_database(self):
+        self.queries_for_request()
+        # what another worker sees: only the shared entry is left
+        local_token_cache.clear()
+        self.user.is_active = False
+        self.user.save()
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(AUTH_TOKEN_CACHE_TIMEOUT=3600,
+                       AUTH_TOKEN_LOCAL_CACHE_TTL=5)
+    def test_process_local_cache_entries_are_short_lived(self):
+        # the test settings use LocMemCache
+        self.assertEqual(token_cache_timeout(), 5)
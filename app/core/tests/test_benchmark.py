@@ -0,0 +1,55 @@
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from core import benchmark
+from core.models import Recipe, Tag, Ingredient
+from recipe import seeding
+
+
+@override_settings(RECIPE_THUMBNAIL_WORKERS=0)
+class BenchmarkTests(TestCase):
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_every_route_is_benchmarked(self):
+        self.assertEqual(benchmark.uncovered(), [])
+
+    def test_every_route_succeeds(self):
+        user_ids = seeding.seed(users=2, recipes=10, tags=5, ingredients=10)
+        user = get_user_model().objects.get(pk=user_ids[0])
+        bench = benchmark.Bench(user, 'password')
+
+        for route in benchmark.ROUTES:
+            result = benchmark.measure(bench, route, requests=2, warmup=0)
+            self.assertTrue(
+                all(status < 400 for status in result['status']), result
+            )
+            self.assertGreater(result['peak_alloc_kib'], 0)
+
+    def test_pick_user_skips_users_without_rows(self):
+        User = get_user_model()
+        empty = User.objects.create_user('empty@example.com', 'password')
+        no_tags = User.objects.create_user('no-tags@example.com', 'password')
+        Recipe.objects.create(user=no_tags, title='soup', time_min=1, price=1)
+        Ingredient.objects.create(user=no_tags, name='kale')
+        users = User.objects.filter(pk__in=[empty.pk, no_tags.pk])
+
+        self.assertIsNone(benchmark.pick_user(users))
+
+        Tag.objects.create(user=no_tags, name='vegan')
+        self.assertEqual(benchmark.pick_user(users), no_tags)
+
+    def test_percentile(self):
+        samples = list(range(1, 101))
+
+        self.assertEqual(benchmark.percentile(samples, 50), 50)
+        self.assertEqual(benchmark.percentile(samples, 99), 99)
+        self.assertEqual(benchmark.percentile([3], 99), 3)
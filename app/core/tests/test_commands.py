@@ -1,19 +1,107 @@
+from io import StringIO
 from unittest.mock import patch
-from django.core.management import call_command
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command, CommandError
 from django.db.utils import OperationalError
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.authentication import local_token_cache
+from core.management.commands import serve
+from core.models import Tag
+
+
+ENSURE_CONNECTION = (
+    'django.db.backends.base.base.BaseDatabaseWrapper.ensure_connection'
+)
+
 
 class CommandTests(TestCase):
     def test_wait_for_db_ready(self):
-        with patch('django.db.utils.ConnectionHandler.__getitem__') as gi:
-            gi.return_value = True
-            call_command('wait_for_db')
-            self.assertEqual(gi.call_count, 1)
+        with patch(ENSURE_CONNECTION) as ec:
+            call_command('wait_for_db', stdout=StringIO())
+            self.assertEqual(ec.call_count, 1)
 
 
     @patch('time.sleep', return_value=True)
     def test_wait_for_db(self, ts):
-        with patch('django.db.utils.ConnectionHandler.__getitem__') as gi:
-            gi.side_effect=[OperationalError] * 5 + [True]
-            call_command('wait_for_db')
-            self.assertEqual(gi.call_count, 6)
\ No newline at end of file
+        with patch(ENSURE_CONNECTION) as ec:
+            ec.side_effect = [OperationalError] * 5 + [None]
+            call_command('wait_for_db', stdout=StringIO())
+            self.assertEqual(ec.call_count, 6)
+            # exponential backoff
+            self.assertEqual(
+                [call.args[0] for call in ts.call_args_list],
+                [0.1, 0.2, 0.4, 0.8, 1.6]
+            )
+
+    @patch('time.sleep', return_value=True)
+    def test_wait_for_db_timeout(self, ts):
+        with patch(ENSURE_CONNECTION, side_effect=OperationalError):
+            with self.assertRaises(CommandError):
+                call_command('wait_for_db', timeout=1, stdout=StringIO())
+
+
+class ServeCommandTests(TestCase):
+
+    def test_serve_config(self):
+        command = serve.Command()
+        options = vars(command.create_parser('manage.py', 'serve').parse_args(
+            ['--workers', '3', '--max-requests', '50']
+        ))
+        app = serve.Application(command.get_config(options))
+
+        self.assertEqual(app.cfg.workers, 3)
+        self.assertEqual(app.cfg.max_requests, 50)
+        self.assertTrue(app.cfg.preload_app)
+
+    @override_settings(LOCAL_CACHE_SINGLE_PROCESS=True)
+    def test_serve_refuses_workers_without_shared_cache(self):
+        with patch.object(serve.Application, 'run') as run:
+            with self.assertRaises(CommandError):
+                call_command('serve', workers=2)
+            call_command('serve', workers=1)
+
+        run.assert_called_once()
+
+    @override_settings(LOCAL_CACHE_SINGLE_PROCESS=False)
+    def test_serve_warns_about_bypassed_caches(self):
+        err = StringIO()
+        with patch.object(serve.Application, 'run'):
+            call_command('serve', workers=2, stderr=err)
+
+        self.assertIn('shared CACHE_BACKEND', err.getvalue())
+
+    @override_settings(LOCAL_CACHE_SINGLE_PROCESS=True)
+    def test_serve_warmup_primes_caches_before_fork(self):
+        user = get_user_model().objects.create_user(
+            email='test@gmail.com',
+            password='test123'
+        )
+        token = Token.objects.create(user=user)
+        Tag.objects.create(user=user, name='vegan')
+        cache.clear()
+        local_token_cache.clear()
+        out = StringIO()
+
+        serve.Application({}, warm={
+            'users': 10, 'hosts': ['testserver'], 'log': out.write
+        }).load()
+
+        self.assertIn('Warmed caches', out.getvalue())
+        self.assertIsNotNone(local_token_cache.get(token.key))
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        with self.assertNumQueries(0):
+            res = client.get(reverse('recipe:tag-list'))
+        self.assertEqual(res.data['results'][0]['name'], 'vegan')
+
+    def test_serve_preloads_urlconf(self):
+        with patch.object(serve.warmup, 'import_application') as ia:
+            application = serve.Application({}).load()
+
+        self.assertTrue(callable(application))
+        ia.assert_called_once()
@@ -0,0 +1,156 @@
+import asyncio
+import gzip
+import zlib
+
+import brotli
+from asgiref.sync import iscoroutinefunction
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from core import metrics
+from core.middleware import (
+    CompressionMiddleware, available_encodings, choose_encoding
+)
+
+
+BODY = b'{"title": "soup"}' * 200
+
+
+def gunzip_stream(data):
+    return zlib.decompressobj(16 + 15).decompress(data)
+
+
+class ChooseEncodingTests(TestCase):
+
+    def test_negotiation(self):
+        encodings = {'br': None, 'gzip': None}
+
+        self.assertEqual(choose_encoding('gzip, br', encodings), 'br')
+        self.assertEqual(choose_encoding('br;q=0.5, gzip', encodings), 'gzip')
+        self.assertEqual(choose_encoding('*', encodings), 'br')
+        self.assertIsNone(choose_encoding('identity', encodings))
+        self.assertIsNone(choose_encoding('gzip;q=0', {'gzip': None}))
+
+
+class CompressionMiddlewareTests(TestCase):
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def process(self, response, path='/api/recipe/recipe/',
+                accept='gzip, deflate, br'):
+        request = self.factory.get(path, HTTP_ACCEPT_ENCODING=accept)
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_brotli_preferred(self):
+        response = self.process(HttpResponse(BODY))
+
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(response.content), BODY)
+        self.assertEqual(
+            response['Content-Length'], str(len(response.content))
+        )
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_gzip(self):
+        response = HttpResponse(BODY)
+        response['ETag'] = '"abc"'
+
+        response = self.process(response, accept='gzip')
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), BODY)
+        self.assertEqual(response['ETag'], 'W/"abc"')
+
+    def test_small_bodies_skipped(self):
+        response = self.process(HttpResponse(b'{}'))
+
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_media_and_compressed_types_skipped(self):
+        response = self.process(HttpResponse(BODY), path='/media/a.json')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+        response = self.process(HttpResponse(BODY, content_type='image/png'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_streaming_compressed_incrementally(self):
+        chunks = [BODY, BODY]
+        response = self.process(
+            StreamingHttpResponse(iter(chunks)), accept='gzip'
+        )
+
+        parts = list(response.streaming_content)
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        # the first chunk is readable before the stream ends
+        self.assertEqual(gunzip_stream(parts[0]), BODY)
+        self.assertEqual(gzip.decompress(b''.join(parts)), BODY * 2)
+
+    def test_async_get_response(self):
+        async def get_response(request):
+            return HttpResponse(BODY)
+
+        middleware = CompressionMiddleware(get_response)
+        request = self.factory.get('/', HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertTrue(iscoroutinefunction(middleware))
+        response = asyncio.run(middleware(request))
+        self.assertEqual(gzip.decompress(response.content), BODY)
+
+    def test_async_streaming(self):
+        async def chunks():
+            yield BODY
+            yield BODY
+
+        async def read(stream):
+            return [part async for part in stream]
+
+        middleware = CompressionMiddleware(lambda request: None)
+        compressor = available_encodings()['gzip'](6)
+
+        parts = asyncio.run(
+            read(middleware.astream(compressor, 'gzip', chunks()))
+        )
+
+        self.assertEqual(gunzip_stream(parts[0]), BODY)
+        self.assertEqual(gzip.decompress(b''.join(parts)), BODY * 2)
+
+    @override_settings(COMPRESSION_ROUTE_LEVELS={'recipe:recipe-list': 0})
+    def test_route_level(self):
+        request = self.factory.get(
+            reverse('recipe:recipe-list'), HTTP_ACCEPT_ENCODING='gzip'
+        )
+        request.resolver_match = type(
+            'Match', (), {'view_name': 'recipe:recipe-list'}
+        )()
+
+        response = CompressionMiddleware(
+            lambda request: HttpResponse(BODY)
+        )(request)
+
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_metrics_recorded(self):
+        before = metrics.compressed_responses.value(
+            encoding='gzip', streaming='false'
+        )
+
+        self.process(HttpResponse(BODY), accept='gzip')
+
+        self.assertEqual(metrics.compressed_responses.value(
+            encoding='gzip', streaming='false'
+        ), before + 1)
+        with override_settings(METRICS_TOKEN='secret'):
+            res = self.client.get(
+                reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret'
+            )
+        self.assertIn(
+            b'http_compression_cpu_seconds_count{encoding="gzip"}',
+            res.content
+        )
+        self.assertIn(
+            b'http_response_latency_seconds_bucket{encoding="gzip",le="+Inf"}',
+            res.content
+        )
@@ -0,0 +1,55 @@
+import os
+import shutil
+import tempfile
+
+from django.test import SimpleTestCase
+
+from core import metrics
+
+
+class SharedMetricsTests(SimpleTestCase):
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        metrics.share(directory)
+        self.addCleanup(metrics.share, None)
+        self.counter = metrics.Counter('test_total', 'Test', labels=('a',))
+        self.histogram = metrics.Histogram(
+            'test_seconds', 'Test', buckets=(1,)
+        )
+        self.addCleanup(metrics._registry.remove, self.counter)
+        self.addCleanup(metrics._registry.remove, self.histogram)
+
+    def fork(self, function):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                function()
+                metrics.flush()
+            finally:
+                os._exit(0)
+        os.waitpid(pid, 0)
+
+    def test_render_adds_up_every_process(self):
+        def worker():
+            self.counter.inc(2, a='x')
+            self.histogram.observe(5)
+
+        self.counter.inc(a='x')
+        self.histogram.observe(0.5)
+        self.fork(worker)
+        self.fork(worker)
+
+        rendered = metrics.render()
+
+        self.assertIn('test_total{a="x"} 5.0', rendered)
+        self.assertIn('test_seconds_bucket{le="1.0"} 1', rendered)
+        self.assertIn('test_seconds_bucket{le="+Inf"} 3', rendered)
+        self.assertIn('test_seconds_sum 10.5', rendered)
+
+    def test_fork_starts_from_zero(self):
+        self.counter.inc(a='x')
+        self.fork(lambda: None)
+
+        self.assertIn('test_total{a="x"} 1.0', metrics.render())
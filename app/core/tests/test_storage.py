@@ -0,0 +1,65 @@
+import hashlib
+import os
+import shutil
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.test import TestCase
+
+from core.storage import ContentAddressedStorage
+
+
+class ContentAddressedStorageTests(TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.storage = ContentAddressedStorage(location=self.root)
+
+    def test_name_is_content_hash(self):
+        content = b'image bytes'
+        digest = hashlib.sha256(content).hexdigest()
+
+        name = self.storage.save(
+            'uploads/recipe/photo.JPG', ContentFile(content)
+        )
+
+        self.assertEqual(name, f'uploads/recipe/{digest[:2]}/{digest}.jpg')
+        with self.storage.open(name) as stored:
+            self.assertEqual(stored.read(), content)
+
+    def test_identical_content_stored_once(self):
+        first = self.storage.save('uploads/recipe/a.jpg', ContentFile(b'x'))
+        second = self.storage.save('uploads/recipe/b.jpg', ContentFile(b'x'))
+        other = self.storage.save('uploads/recipe/c.jpg', ContentFile(b'y'))
+
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+        directory = os.path.dirname(self.storage.path(first))
+        self.assertEqual(os.listdir(directory), [os.path.basename(first)])
+
+    def test_large_upload_hashed_in_chunks(self):
+        content = os.urandom(3 * 64 * 1024 + 7)
+        upload = ContentFile(content)
+        upload.DEFAULT_CHUNK_SIZE = 64 * 1024
+
+        name = self.storage.save('uploads/recipe/big.png', upload)
+
+        self.assertIn(hashlib.sha256(content).hexdigest(), name)
+        self.assertEqual(
+            os.path.getsize(self.storage.path(name)), len(content)
+        )
+
+    def test_delete_stale_keeps_reused_content(self):
+        name = self.storage.save('uploads/recipe/a.jpg', ContentFile(b'x'))
+        path = self.storage.path(name)
+        os.utime(path, (0, 0))
+
+        # an upload of the same bytes, not committed yet, touches the file
+        self.storage.save('uploads/recipe/b.jpg', ContentFile(b'x'))
+
+        self.assertFalse(self.storage.delete_stale(name, 60))
+        self.assertTrue(os.path.exists(path))
+        os.utime(path, (0, 0))
+        self.assertTrue(self.storage.delete_stale(name, 60))
+        self.assertEqual(os.listdir(os.path.dirname(path)), [])
@@ -0,0 +1,146 @@
+import re
+
+from asgiref.sync import sync_to_async
+
+from django.contrib.auth import get_user_model
+from django.test import AsyncClient, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core import metrics, timing
+from core.models import Recipe
+
+
+SERVER_TIMING = re.compile(
+    r'db;dur=[\d.]+;desc="(\d+) queries", serialize;dur=([\d.]+), '
+    r'render;dur=([\d.]+), total;dur=([\d.]+)'
+)
+
+
+class TimedTests(TestCase):
+
+    def test_nested_phases_count_once(self):
+        token = timing.start()
+        try:
+            with timing.timed('serialize'):
+                with timing.timed('serialize'):
+                    pass
+                nested = timing.current().durations['serialize']
+        finally:
+            timing.stop(token)
+
+        self.assertEqual(nested, 0)
+        self.assertIsNone(timing.current())
+
+    def test_no_op_outside_a_request(self):
+        with timing.timed('serialize'):
+            self.assertIsNone(timing.current())
+
+
+class TimingMiddlewareTests(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'timing@example.com', 'testpass'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.recipe = Recipe.objects.create(
+            user=self.user, title='soup', time_min=5, price=5
+        )
+
+    @override_settings(SERVER_TIMING_HEADER=True)
+    def test_server_timing_header(self):
+        url = reverse('recipe:recipe-detail', args=[self.recipe.id])
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(url)
+
+        match = SERVER_TIMING.fullmatch(res['Server-Timing'])
+        self.assertIsNotNone(match, res['Server-Timing'])
+        self.assertEqual(int(match[1]), len(queries))
+        serialize, render, total = map(float, match.groups()[1:])
+        self.assertGreater(serialize, 0)
+        self.assertGreater(render, 0)
+        self.assertGreaterEqual(total, serialize + render)
+
+    def test_header_off_by_default(self):
+        res = self.client.get(reverse('user:me'))
+
+        self.assertFalse(res.has_header('Server-Timing'))
+
+    def test_histograms_per_view(self):
+        labels = {'view': 'ManageUserView', 'method': 'get'}
+        before = metrics.view_duration.count(**labels)
+
+        self.client.get(reverse('user:me'))
+        self.client.get(reverse('recipe:recipe-list'))
+        self.client.get(reverse('recipe:async-recipe-list'))
+
+        self.assertEqual(metrics.view_duration.count(**labels), before + 1)
+        with override_settings(METRICS_TOKEN='secret'):
+            res = self.client.get(
+                reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret'
+            )
+        for view in ('RecipeViewSet.list', 'recipe:async-recipe-list'):
+            self.assertIn(
+                f'http_view_db_queries_count{{view="{view}",method="get"}}',
+                res.content.decode()
+            )
+
+    @override_settings(REQUEST_TIMING=False)
+    def test_disabled(self):
+        labels = {'view': 'ManageUserView', 'method': 'get'}
+        before = metrics.view_duration.count(**labels)
+
+        self.client.get(reverse('user:me'))
+
+        self.assertEqual(metrics.view_duration.count(**labels), before)
+
+
+class MetricsViewTests(TestCase):
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_requires_token(self):
+        url = reverse('metrics')
+
+        for authorization in ('', 'Bearer wrong', 'Token secret'):
+            res = self.client.get(url, HTTP_AUTHORIZATION=authorization)
+            self.assertEqual(res.status_code, 404, authorization)
+        res = self.client.get(url, HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(res.status_code, 200)
+
+    @override_settings(METRICS_TOKEN='')
+    def test_hidden_without_token_setting(self):
+        res = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer ')
+
+        self.assertEqual(res.status_code, 404)
+
+
+class AsyncTimingTests(TestCase):
+
+    # DEBUG makes the handler log every middleware it adapts
+    @override_settings(SERVER_TIMING_HEADER=True, DEBUG=True)
+    async def test_timed_over_asgi_without_adapting(self):
+        def create_token():
+            user = get_user_model().objects.create_user(
+                'timing@example.com', 'testpass'
+            )
+            Recipe.objects.create(
+                user=user, title='soup', time_min=5, price=5
+            )
+            return Token.objects.create(user=user)
+        token = await sync_to_async(create_token)()
+
+        with self.assertNoLogs('django.request', 'DEBUG'):
+            res = await AsyncClient().get(
+                reverse('recipe:async-recipe-list'),
+                authorization=f'Token {token.key}'
+            )
+
+        self.assertEqual(res.status_code, 200)
+        match = SERVER_TIMING.fullmatch(res['Server-Timing'])
+        self.assertIsNotNone(match, res['Server-Timing'])
+        self.assertGreater(int(match[1]), 0)
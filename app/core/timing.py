@@ -0,0 +1,124 @@
+import functools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from rest_framework import serializers
+
+
+# Where the time of a request goes, collected by
+# core.middleware.TimingMiddleware. Code anywhere in the request marks a
+# phase with timed(); entering a phase that is already running counts
+# nothing, so nested serializers and a ListSerializer's items are only
+# timed once. Phases can overlap: the queries a serializer triggers count
+# both as db and as serialize time. Outside a request these are no-ops.
+
+PHASES = ('db', 'serialize', 'render')
+
+_current = ContextVar('request_timings', default=None)
+
+
+class Timings:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.total = None
+        self.queries = 0
+        self.durations = dict.fromkeys(PHASES, 0.0)
+        self.running = set()
+
+    def record_query(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.durations['db'] += time.perf_counter() - start
+            self.queries += 1
+
+    def finish(self):
+        self.total = time.perf_counter() - self.start
+
+    def header(self):
+        # Server-Timing, durations in milliseconds
+        def metric(name, seconds, desc=None):
+            desc = f';desc="{desc}"' if desc else ''
+            return f'{name};dur={seconds * 1000:.2f}{desc}'
+
+        return ', '.join([
+            metric('db', self.durations['db'], f'{self.queries} queries'),
+            metric('serialize', self.durations['serialize']),
+            metric('render', self.durations['render']),
+            metric('total', self.total),
+        ])
+
+
+def current():
+    return _current.get()
+
+
+def record_query(execute, sql, params, many, context):
+    # an execute wrapper on every connection, see install_query_timer().
+    # The request's timings are found through the context, which follows
+    # it into the sync_to_async threads that run its queries under ASGI.
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    return timings.record_query(execute, sql, params, many, context)
+
+
+def install_query_timer(sender, connection, **kwargs):
+    # connection_created receiver, connected in CoreConfig.ready()
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def start():
+    # returns the token to pass to stop()
+    return _current.set(Timings())
+
+
+def stop(token):
+    _current.reset(token)
+
+
+@contextmanager
+def timed(phase):
+    timings = _current.get()
+    if timings is None or phase in timings.running:
+        yield
+        return
+    timings.running.add(phase)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.durations[phase] += time.perf_counter() - start
+        timings.running.discard(phase)
+
+
+def timed_function(phase, function):
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        with timed(phase):
+            return function(*args, **kwargs)
+    wrapper.timed = True
+    return wrapper
+
+
+def instrument_serializers():
+    # DRF has no hook around serialization, so its entry points are
+    # wrapped: validation, saving and reading .data
+    classes = (
+        serializers.BaseSerializer, serializers.Serializer,
+        serializers.ListSerializer,
+    )
+    for cls in classes:
+        for name in ('is_valid', 'save', 'data'):
+            attribute = cls.__dict__.get(name)
+            if isinstance(attribute, property):
+                if not getattr(attribute.fget, 'timed', False):
+                    setattr(cls, name, property(
+                        timed_function('serialize', attribute.fget)
+                    ))
+            elif attribute is not None:
+                if not getattr(attribute, 'timed', False):
+                    setattr(cls, name, timed_function('serialize', attribute))
@@ -0,0 +1,21 @@
+import hmac
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+
+from core import metrics as registry
+
+
+def metrics(request):
+    # Prometheus scrape target. The view timings and counters describe
+    # the whole service, so only a scraper holding METRICS_TOKEN sees it.
+    expected = settings.METRICS_TOKEN.encode()
+    header = request.headers.get('Authorization', '')
+    scheme, _, token = header.partition(' ')
+    if not expected or scheme.lower() != 'bearer' or (
+        not hmac.compare_digest(token.encode(), expected)
+    ):
+        raise Http404
+    return HttpResponse(
+        registry.render(), content_type='text/plain; version=0.0.4'
+    )
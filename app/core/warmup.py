@@ -0,0 +1,94 @@
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.db.utils import OperationalError
+from django.test import RequestFactory
+from django.urls import get_resolver, reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import force_authenticate
+
+from core.authentication import cache_token
+
+
+def wait_for_database(alias='default', timeout=60, delay=0.1, max_delay=5,
+                      log=None):
+    # Opens a real connection, retrying with exponential backoff until
+    # `timeout` seconds have passed. Returns the time it took.
+    connection = connections[alias]
+    start = time.monotonic()
+    while True:
+        try:
+            connection.ensure_connection()
+            return time.monotonic() - start
+        except OperationalError:
+            elapsed = time.monotonic() - start
+            if elapsed + delay > timeout:
+                raise
+            if log:
+                log(f'Database unavailable, waiting {delay:.1f} seconds')
+            time.sleep(delay)
+            delay = min(delay * 2, max_delay)
+
+
+def open_connections():
+    # only kept past the current request when CONN_MAX_AGE allows it
+    for connection in connections.all():
+        connection.ensure_connection()
+
+
+def import_application():
+    # the URLconf imports every view, serializer and model
+    get_resolver().url_patterns
+
+
+def default_hosts():
+    # the hosts clients may send, without wildcards
+    hosts = [
+        host for host in settings.ALLOWED_HOSTS
+        if host != '*' and not host.startswith('.')
+    ]
+    return hosts or ['localhost']
+
+
+def prime_caches(users=100, hosts=None):
+    # Loads the newest tokens of active users into the token caches, then
+    # renders their first page of tags and ingredients for each of `hosts`
+    # so the list caches are filled too. List cache keys include the URL,
+    # whose host ends up in the pagination links, so only requests with
+    # one of these hosts hit the primed pages.
+    from recipe.views import TagViewSet, IngredientViewSet
+
+    tokens = list(
+        Token.objects.select_related('user')
+        .filter(user__is_active=True)
+        .order_by('-created')[:users]
+    )
+    factory = RequestFactory()
+    for token in tokens:
+        cache_token(token)
+        for host in hosts or default_hosts():
+            for viewset, url in [
+                (TagViewSet, 'recipe:tag-list'),
+                (IngredientViewSet, 'recipe:ingredient-list'),
+            ]:
+                request = factory.get(reverse(url), HTTP_HOST=host)
+                force_authenticate(request, token.user, token)
+                viewset.as_view({'get': 'list'})(request)
+    return len(tokens)
+
+
+def warm_up(users=100, hosts=None, log=None):
+    # Imports the app and primes the caches of the serving process, see
+    # core.management.commands.serve. Returns the time taken by each step.
+    timings = {}
+    for step, run in [
+        ('imports', import_application),
+        ('caches', lambda: prime_caches(users, hosts)),
+    ]:
+        start = time.monotonic()
+        run()
+        timings[step] = time.monotonic() - start
+        if log:
+            log(f'Warmed {step} in {timings[step]:.3f}s')
+    return timings
@@ -0,0 +1,67 @@
+from asgiref.sync import sync_to_async
+from rest_framework.exceptions import MethodNotAllowed
+
+from core.renderers import (
+    ColumnarJSONRenderer, MessagePackRenderer, ORJSONRenderer
+)
+from core.timing import timed
+from .views import TagViewSet, IngredientViewSet, RecipeViewSet
+
+
+# Async variants of the list, retrieve and create paths for ASGI
+# deployments. They run the viewsets from recipe.views, so authentication,
+# querysets, serializers, pagination and validators are shared and both
+# paths return the same representations.
+#
+# Django 4.0 has no async ORM (QuerySet.aget() and friends arrive in 4.1),
+# so the database work of a request happens in a single sync_to_async call.
+# A sync DRF view under ASGI holds its thread for the whole request; here
+# the thread is released before the response is rendered and written,
+# which happens on the event loop. The browsable API is not offered, its
+# renderer queries the database while rendering.
+
+
+def run_action(viewset_class, actions, request, kwargs):
+    # APIView.dispatch() up to, but not including, rendering
+    view = viewset_class(action_map=actions, renderer_classes=[
+        ORJSONRenderer, ColumnarJSONRenderer, MessagePackRenderer
+    ])
+    view.setup(request, **kwargs)
+    view.format_kwarg = None
+    request = view.initialize_request(request, **kwargs)
+    view.request = request
+    view.headers = view.default_response_headers
+    try:
+        view.initial(request, **kwargs)
+        action = actions.get(request.method.lower())
+        if action is None:
+            raise MethodNotAllowed(request.method)
+        response = getattr(view, action)(request, **kwargs)
+    except Exception as exc:
+        response = view.handle_exception(exc)
+    return view.finalize_response(request, response, **kwargs)
+
+
+def async_action(viewset_class, actions):
+    # `actions` maps HTTP methods to viewset actions, as with as_view()
+    async def view(request, **kwargs):
+        response = await sync_to_async(run_action)(
+            viewset_class, actions, request, kwargs
+        )
+        # a 304 from a conditional GET has nothing to render
+        if hasattr(response, 'render'):
+            with timed('render'):
+                response.render()
+        return response
+
+    # tokens travel in a header, so there is no session to protect
+    view.csrf_exempt = True
+    return view
+
+
+tag_list = async_action(TagViewSet, {'get': 'list', 'post': 'create'})
+ingredient_list = async_action(
+    IngredientViewSet, {'get': 'list', 'post': 'create'}
+)
+recipe_list = async_action(RecipeViewSet, {'get': 'list', 'post': 'create'})
+recipe_detail = async_action(RecipeViewSet, {'get': 'retrieve'})
@@ -0,0 +1,77 @@
+import hashlib
+import time
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from rest_framework.response import Response
+
+from core.checks import cache_is_shared
+
+
+def list_version_key(model, user_id):
+    return f'list-version:{model._meta.label_lower}:{user_id}'
+
+
+def new_version():
+    # time based so a version key evicted from the cache never comes back
+    # with a number that still has stale bodies stored under it
+    return time.time_ns()
+
+
+def get_list_version(model, user_id):
+    key = list_version_key(model, user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, new_version(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_list_version(model, user_id):
+    # Bumped now so later reads in this transaction miss the cache, and
+    # again once it commits: until then other connections still see the
+    # old rows, and a request among them may cache them under the first
+    # bump.
+    increment_list_version(model, user_id)
+    if connection.in_atomic_block:
+        transaction.on_commit(partial(increment_list_version, model, user_id))
+
+
+def increment_list_version(model, user_id):
+    key = list_version_key(model, user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, new_version(), None)
+
+
+def list_cache_key(model, user_id, url):
+    version = get_list_version(model, user_id)
+    digest = hashlib.md5(url.encode()).hexdigest()
+    return f'list:{model._meta.label_lower}:{user_id}:{version}:{digest}'
+
+
+class CachedListMixin:
+    # Serves list responses from a per-user versioned cache. The version is
+    # bumped by the signal handlers in recipe.signals whenever one of the
+    # user's rows changes, which orphans every cached page at once. Without
+    # a shared cache other workers would miss the bump, so nothing is
+    # cached (see core.checks).
+
+    def list(self, request, *args, **kwargs):
+        if not cache_is_shared():
+            return super().list(request, *args, **kwargs)
+        key = list_cache_key(
+            self.queryset.model,
+            request.user.pk,
+            request.build_absolute_uri()
+        )
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+
+        response = super().list(request, *args, **kwargs)
+        cache.set(key, response.data, settings.LIST_CACHE_TIMEOUT)
+        return response
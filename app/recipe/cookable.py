@@ -0,0 +1,178 @@
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+
+from core.authentication import LocalLRUCache
+from core.checks import cache_is_shared
+from core.models import Recipe
+from recipe.caching import new_version
+
+
+_indexes = LocalLRUCache(
+    maxsize=settings.COOKABLE_INDEX_CACHE_SIZE,
+    ttl=settings.COOKABLE_INDEX_CACHE_TTL,
+)
+# versions are checked and applied one update at a time in this process
+_update_lock = threading.Lock()
+
+
+def version_key(user_id):
+    return f'cookable-version:{user_id}'
+
+
+def get_version(user_id):
+    key = version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, new_version(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(user_id):
+    key = version_key(user_id)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        version = new_version()
+        cache.set(key, version, None)
+        return version
+
+
+class CookableIndex:
+    # Every ingredient in the user's recipes gets a bit and every recipe is
+    # the bitmask of its ingredients, so ranking a pantry is an AND and two
+    # popcounts per recipe instead of a join over the through table.
+
+    def __init__(self, pairs, version):
+        self.version = version
+        self.bits = {}
+        self.masks = {}
+        self.next_bit = 0
+        self._lock = threading.Lock()
+        for recipe_id, ingredient_id in pairs:
+            self.add(recipe_id, [ingredient_id])
+
+    def bit(self, ingredient_id):
+        # bits are never handed out twice, a dropped ingredient's bit just
+        # stays clear in every mask
+        if ingredient_id not in self.bits:
+            self.bits[ingredient_id] = 1 << self.next_bit
+            self.next_bit += 1
+        return self.bits[ingredient_id]
+
+    def mask(self, ingredient_ids):
+        mask = 0
+        for ingredient_id in ingredient_ids:
+            mask |= self.bits.get(ingredient_id, 0)
+        return mask
+
+    def add(self, recipe_id, ingredient_ids):
+        with self._lock:
+            mask = self.masks.get(recipe_id, 0)
+            for ingredient_id in ingredient_ids:
+                mask |= self.bit(ingredient_id)
+            self.masks[recipe_id] = mask
+
+    def remove(self, recipe_id, ingredient_ids):
+        with self._lock:
+            mask = self.masks.get(recipe_id, 0) & ~self.mask(ingredient_ids)
+            if mask:
+                self.masks[recipe_id] = mask
+            else:
+                self.masks.pop(recipe_id, None)
+
+    def drop_recipe(self, recipe_id):
+        with self._lock:
+            self.masks.pop(recipe_id, None)
+
+    def drop_ingredient(self, ingredient_id):
+        with self._lock:
+            bit = self.bits.pop(ingredient_id, 0)
+            for recipe_id, mask in list(self.masks.items()):
+                if mask & bit:
+                    if mask == bit:
+                        del self.masks[recipe_id]
+                    else:
+                        self.masks[recipe_id] = mask & ~bit
+
+    def rank(self, ingredient_ids, max_missing=None):
+        # (coverage, missing, recipe_id) for every recipe sharing at least
+        # one ingredient with the pantry, best coverage first
+        with self._lock:
+            have = self.mask(ingredient_ids)
+            masks = list(self.masks.items())
+        ranked = []
+        for recipe_id, mask in masks:
+            matched = bin(mask & have).count('1')
+            if not matched:
+                continue
+            total = bin(mask).count('1')
+            missing = total - matched
+            if max_missing is not None and missing > max_missing:
+                continue
+            ranked.append((matched / total, missing, recipe_id))
+        ranked.sort(key=lambda item: (-item[0], item[1], -item[2]))
+        return ranked
+
+
+def build_index(user_id, version):
+    pairs = Recipe.ingrediant.through.objects.filter(
+        recipe__user_id=user_id
+    ).values_list('recipe_id', 'ingredient_id')
+    return CookableIndex(pairs.iterator(), version)
+
+
+def get_index(user_id):
+    # kept per version, or rebuilt every time when the version can't be
+    # trusted, see core.checks
+    if not cache_is_shared():
+        return build_index(user_id, None)
+    version = get_version(user_id)
+    index = _indexes.get(user_id)
+    if index is None or index.version != version:
+        index = build_index(user_id, version)
+        _indexes.set(user_id, index)
+    return index
+
+
+def update_index(user_id, change):
+    # Applies `change` to this process's index and publishes a new version.
+    # Other processes rebuild when they see it; this one keeps its index
+    # only when the bump moved the version straight from the index's, so
+    # a burst of edits costs no rebuilds here. If anyone else bumped in
+    # between (incr is atomic), their change is not in this index and it
+    # is dropped.
+    if not cache_is_shared():
+        return
+    version = bump_version(user_id)
+    with _update_lock:
+        index = _indexes.get(user_id)
+        if index is not None and index.version is not None and (
+            version == index.version + 1
+        ):
+            change(index)
+            index.version = version
+        else:
+            _indexes.delete(user_id)
+
+
+def relation_change(action, reverse, instance_pk, pk_set):
+    # maps an m2m_changed on Recipe.ingrediant to an index update, or None
+    pk_set = set(pk_set or ())
+    if action == 'post_clear':
+        if reverse:
+            return lambda index: index.drop_ingredient(instance_pk)
+        return lambda index: index.drop_recipe(instance_pk)
+    if action not in ('post_add', 'post_remove') or not pk_set:
+        return None
+
+    def change(index):
+        apply = index.add if action == 'post_add' else index.remove
+        if reverse:
+            for recipe_id in pk_set:
+                apply(recipe_id, [instance_pk])
+        else:
+            apply(instance_pk, pk_set)
+    return change
@@ -0,0 +1,84 @@
+import csv
+import io
+import json
+from itertools import islice
+
+from core.models import Recipe
+
+
+EXPORT_FIELDS = ('id', 'title', 'time_min', 'price', 'link')
+
+
+def iter_chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def related_names(through, target, recipe_ids):
+    names = {}
+    rows = through.objects.filter(recipe_id__in=recipe_ids).values_list(
+        'recipe_id', f'{target}__name'
+    )
+    for recipe_id, name in rows:
+        names.setdefault(recipe_id, []).append(name)
+    return names
+
+
+def export_records(user, chunk_size=2000):
+    # Recipes are read through a server-side cursor and processed one chunk
+    # at a time; tags and ingredients are looked up per chunk, so memory
+    # stays bounded by `chunk_size` whatever the size of the collection.
+    # Records use the same shape the NDJSON importer accepts.
+    rows = (
+        Recipe.objects.filter(user=user)
+        .order_by('id')
+        .values_list(*EXPORT_FIELDS)
+        .iterator(chunk_size=chunk_size)
+    )
+    for chunk in iter_chunks(rows, chunk_size):
+        ids = [row[0] for row in chunk]
+        tags = related_names(Recipe.tags.through, 'tag', ids)
+        ingredients = related_names(
+            Recipe.ingrediant.through, 'ingredient', ids
+        )
+        records = []
+        for row in chunk:
+            record = dict(zip(EXPORT_FIELDS, row))
+            record['price'] = str(record['price'])
+            record['tags'] = tags.get(record['id'], [])
+            record['ingrediant'] = ingredients.get(record['id'], [])
+            records.append(record)
+        yield records
+
+
+def ndjson_stream(chunks):
+    for records in chunks:
+        yield ''.join(json.dumps(record) + '\n' for record in records)
+
+
+def csv_stream(chunks):
+    # list columns are joined with ';'
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS + ('tags', 'ingrediant'))
+    for records in chunks:
+        for record in records:
+            writer.writerow(
+                [record[field] for field in EXPORT_FIELDS]
+                + [';'.join(record['tags']), ';'.join(record['ingrediant'])]
+            )
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+EXPORT_FORMATS = {
+    'ndjson': (ndjson_stream, 'application/x-ndjson'),
+    'csv': (csv_stream, 'text/csv'),
+}
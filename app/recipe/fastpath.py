@@ -0,0 +1,72 @@
+from rest_framework.relations import ManyRelatedField
+from rest_framework.serializers import ListSerializer
+
+from core.models import Recipe
+
+
+# Read-only rendering of RecipeSerializer from values() rows. The fields
+# of a bound serializer decide what is rendered and format each value, so
+# the output matches serializer.data exactly, but no model instances are
+# built and the per-instance attribute lookups are skipped. Many to many
+# fields are filled from one grouped query per relation.
+
+
+def is_relation(field):
+    # primary key lists, or nested serializers when expanded
+    return isinstance(field, (ManyRelatedField, ListSerializer))
+
+
+def scalar_columns(serializer):
+    # the values() columns the serializer's other fields read
+    return [
+        name for name, field in serializer.fields.items()
+        if not is_relation(field)
+    ]
+
+
+def related_values(name, field, recipe_ids):
+    # {recipe_id: [pk, ...]}, or [{field: value, ...}, ...] rendered by the
+    # nested serializer's fields when the relation is expanded. Each list
+    # is in primary key order, like the viewset's prefetches.
+    model = Recipe._meta.get_field(name).related_model
+    related = model.objects.filter(recipe__in=recipe_ids).order_by(
+        'recipe', 'id'
+    )
+    grouped = {}
+    if isinstance(field, ManyRelatedField):
+        for recipe_id, pk in related.values_list('recipe', 'id'):
+            grouped.setdefault(recipe_id, []).append(pk)
+        return grouped
+    nested = list(field.child.fields.items())
+    for recipe_id, *values in related.values_list(
+        'recipe', *[column for column, _ in nested]
+    ):
+        grouped.setdefault(recipe_id, []).append({
+            column: None if value is None else nested_field.to_representation(
+                value
+            )
+            for (column, nested_field), value in zip(nested, values)
+        })
+    return grouped
+
+
+def represent(serializer, rows):
+    recipe_ids = [row['id'] for row in rows]
+    fields = list(serializer.fields.items())
+    relations = {
+        name: related_values(name, field, recipe_ids)
+        for name, field in fields if is_relation(field)
+    }
+    data = []
+    for row in rows:
+        item = {}
+        for name, field in fields:
+            if name in relations:
+                item[name] = relations[name].get(row['id'], [])
+            else:
+                value = row[name]
+                item[name] = (
+                    None if value is None else field.to_representation(value)
+                )
+        data.append(item)
+    return data
@@ -0,0 +1,48 @@
+# Image work for recipe thumbnails. Runs inside worker processes, so it
+# only depends on Pillow and never touches Django.
+import os
+
+from PIL import Image, ImageOps, features
+
+
+def thumbnail_formats():
+    formats = [('jpeg', 'jpg')]
+    if features.check('webp'):
+        formats.insert(0, ('webp', 'webp'))
+    return formats
+
+
+def thumbnail_name(name, width, ext):
+    root, _ = os.path.splitext(name)
+    return f'{root}_w{width}.{ext}'
+
+
+def render_thumbnails(root, name, widths):
+    # Decodes the original once and writes every width in every format
+    # next to it. Returns {width: {format: name}} with names relative to
+    # `root`. Widths larger than the original are skipped.
+    formats = thumbnail_formats()
+    thumbnails = {}
+    with Image.open(os.path.join(root, name)) as original:
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+
+        for width in sorted(widths):
+            if width > image.width:
+                continue
+            height = max(1, round(image.height * width / image.width))
+            resized = image.resize((width, height), Image.LANCZOS)
+            for fmt, ext in formats:
+                target = thumbnail_name(name, width, ext)
+                output = resized
+                if fmt == 'jpeg' and output.mode != 'RGB':
+                    output = output.convert('RGB')
+                output.save(
+                    os.path.join(root, target),
+                    format=fmt.upper(),
+                    quality=80,
+                    optimize=True
+                )
+                thumbnails.setdefault(str(width), {})[fmt] = target
+    return thumbnails
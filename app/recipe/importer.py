@@ -0,0 +1,140 @@
+import json
+
+from django.db import transaction
+from rest_framework import serializers
+
+from core.models import Tag, Ingredient, Recipe
+from recipe.signals import recipes_bulk_created
+
+
+class RecipeImportSerializer(serializers.Serializer):
+    # one NDJSON line, tags and ingredients are referenced by name
+    title = serializers.CharField(max_length=255)
+    time_min = serializers.IntegerField()
+    price = serializers.DecimalField(max_digits=5, decimal_places=2)
+    link = serializers.CharField(
+        max_length=255, allow_blank=True, default=''
+    )
+    tags = serializers.ListField(
+        child=serializers.CharField(max_length=255), default=list
+    )
+    ingrediant = serializers.ListField(
+        child=serializers.CharField(max_length=255), default=list
+    )
+
+
+class RecipeImporter:
+    # Streams NDJSON lines into the user's recipes. Valid rows are buffered
+    # up to `batch_size` and written per batch in their own transaction:
+    # tag and ingredient names are resolved (and created) in bulk, recipes
+    # are bulk inserted and the through-table rows follow in bulk. Invalid
+    # rows are skipped and reported with their line number.
+    max_errors = 1000
+
+    def __init__(self, user, batch_size=1000, progress=None):
+        self.user = user
+        self.batch_size = batch_size
+        self.progress = progress
+        self.lines = 0
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+
+    def run(self, lines):
+        batch = []
+        for number, line in enumerate(lines, 1):
+            self.lines = number
+            row = self.parse(number, line)
+            if row is not None:
+                batch.append(row)
+            if len(batch) >= self.batch_size:
+                self.write(batch)
+                batch = []
+        if batch:
+            self.write(batch)
+        return self.summary()
+
+    def summary(self):
+        return {
+            'lines': self.lines,
+            'created': self.created,
+            'failed': self.failed,
+            'errors': self.errors,
+        }
+
+    def add_error(self, number, errors):
+        self.failed += 1
+        # keep memory bounded on files that are wrong throughout
+        if len(self.errors) < self.max_errors:
+            self.errors.append({'line': number, 'errors': errors})
+
+    def parse(self, number, line):
+        if isinstance(line, bytes):
+            line = line.decode('utf-8', errors='replace')
+        line = line.strip()
+        if not line:
+            return None
+        try:
+            data = json.loads(line)
+        except ValueError as exc:
+            self.add_error(number, [f'Invalid JSON: {exc}'])
+            return None
+
+        serializer = RecipeImportSerializer(data=data)
+        if not serializer.is_valid():
+            self.add_error(number, serializer.errors)
+            return None
+        return serializer.validated_data
+
+    def resolve_names(self, model, names):
+        ids = dict(
+            model.objects.filter(user=self.user, name__in=names)
+            .values_list('name', 'id')
+        )
+        missing = [
+            model(user=self.user, name=name)
+            for name in names if name not in ids
+        ]
+        if missing:
+            for obj in model.objects.bulk_create(missing):
+                ids[obj.name] = obj.id
+        return ids
+
+    @transaction.atomic
+    def write(self, rows):
+        tag_ids = self.resolve_names(
+            Tag, {name for row in rows for name in row['tags']}
+        )
+        ingredient_ids = self.resolve_names(
+            Ingredient, {name for row in rows for name in row['ingrediant']}
+        )
+
+        recipes = Recipe.objects.bulk_create([
+            Recipe(
+                user=self.user,
+                title=row['title'],
+                time_min=row['time_min'],
+                price=row['price'],
+                link=row['link'],
+            )
+            for row in rows
+        ])
+        Recipe.tags.through.objects.bulk_create([
+            Recipe.tags.through(recipe_id=recipe.id, tag_id=tag_ids[name])
+            for recipe, row in zip(recipes, rows)
+            for name in set(row['tags'])
+        ])
+        Recipe.ingrediant.through.objects.bulk_create([
+            Recipe.ingrediant.through(
+                recipe_id=recipe.id, ingredient_id=ingredient_ids[name]
+            )
+            for recipe, row in zip(recipes, rows)
+            for name in set(row['ingrediant'])
+        ])
+
+        recipes_bulk_created.send(
+            sender=Recipe, user=self.user, recipes=recipes
+        )
+        self.created += len(recipes)
+        if self.progress is not None:
+            self.progress(self)
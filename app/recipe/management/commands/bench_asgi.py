@@ -0,0 +1,150 @@
+import asyncio
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import BaseCommand, CommandError
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+
+
+def wsgi_get(application, path, token):
+    status = []
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': '',
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': 'localhost',
+        'HTTP_AUTHORIZATION': f'Token {token}',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    result = application(
+        environ, lambda s, headers, exc=None: status.append(s)
+    )
+    try:
+        b''.join(result)
+    finally:
+        # closing sends request_finished, which releases the connection
+        result.close()
+    return int(status[0].split()[0])
+
+
+async def asgi_get(application, path, token):
+    status = []
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': b'',
+        'root_path': '',
+        'headers': [
+            (b'host', b'localhost'),
+            (b'authorization', f'Token {token}'.encode()),
+        ],
+        'client': ('127.0.0.1', 0),
+        'server': ('localhost', 80),
+    }
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status.append(message['status'])
+
+    await application(scope, receive, send)
+    return status[0]
+
+
+def run_wsgi(path, token, concurrency, requests):
+    from recipes.wsgi import application
+
+    def timed(_):
+        start = time.perf_counter()
+        status = wsgi_get(application, path, token)
+        return status, time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(timed, range(requests)))
+
+
+def run_asgi(path, token, concurrency, requests):
+    from recipes.asgi import application
+
+    async def main():
+        slots = asyncio.Semaphore(concurrency)
+
+        async def timed():
+            async with slots:
+                start = time.perf_counter()
+                status = await asgi_get(application, path, token)
+                return status, time.perf_counter() - start
+
+        return await asyncio.gather(*(timed() for _ in range(requests)))
+
+    return asyncio.run(main())
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the throughput of the WSGI and ASGI entry points under '
+        'concurrent connections. Requests are driven in process, with '
+        'threads for WSGI and tasks for ASGI, so no server is needed; run '
+        'it against PostgreSQL, SQLite serialises concurrent readers.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('email', help='user whose recipes are listed')
+        parser.add_argument(
+            '--concurrency', type=int, nargs='+', default=[1, 10, 50]
+        )
+        parser.add_argument('--requests', type=int, default=500)
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(email=options['email'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'No user with email {options["email"]}')
+        token = Token.objects.get_or_create(user=user)[0].key
+
+        cases = [
+            ('wsgi, sync views', run_wsgi, reverse('recipe:recipe-list')),
+            ('asgi, sync views', run_asgi, reverse('recipe:recipe-list')),
+            ('asgi, async views', run_asgi,
+             reverse('recipe:async-recipe-list')),
+        ]
+        self.stdout.write(
+            f'{"path":<20}{"conns":>6}{"req/s":>10}{"p50 ms":>9}'
+            f'{"p99 ms":>9}{"errors":>8}'
+        )
+        for label, run, path in cases:
+            for concurrency in options['concurrency']:
+                start = time.perf_counter()
+                results = run(path, token, concurrency, options['requests'])
+                elapsed = time.perf_counter() - start
+
+                latencies = sorted(latency for _, latency in results)
+                p99 = latencies[int(len(latencies) * 0.99) - 1]
+                errors = sum(1 for status, _ in results if status != 200)
+                self.stdout.write(
+                    f'{label:<20}{concurrency:>6}'
+                    f'{len(results) / elapsed:>10.1f}'
+                    f'{statistics.median(latencies) * 1000:>9.1f}'
+                    f'{p99 * 1000:>9.1f}{errors:>8}'
+                )
@@ -0,0 +1,73 @@
+import gzip
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from core.models import Recipe
+from core.renderers import (
+    ColumnarJSONRenderer, MessagePackRenderer, ORJSONRenderer
+)
+from recipe import fastpath
+from recipe.serializers import RecipeSerializer
+
+
+RENDERERS = [
+    ('json', JSONRenderer()),
+    ('orjson', ORJSONRenderer()),
+    ('columnar', ColumnarJSONRenderer()),
+    ('msgpack', MessagePackRenderer()),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare payload size and encode time of the response formats on '
+        'pages of a user\'s recipe list'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('email', help='user whose recipes are encoded')
+        parser.add_argument(
+            '--page-size', type=int, nargs='+', default=[20, 100, 1000]
+        )
+        parser.add_argument('--repeat', type=int, default=50)
+        parser.add_argument(
+            '--expand', action='store_true',
+            help='embed tag and ingredient names'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(email=options['email'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'No user with email {options["email"]}')
+
+        serializer = RecipeSerializer(context={
+            'expand': {'tags', 'ingrediant'} if options['expand'] else set(),
+        })
+        self.stdout.write(
+            f'{"format":<10}{"page":>6}{"bytes":>10}{"gzip":>9}'
+            f'{"encode ms":>11}'
+        )
+        for page_size in options['page_size']:
+            rows = list(
+                Recipe.objects.filter(user=user).order_by('-id')
+                .values(*fastpath.scalar_columns(serializer))[:page_size]
+            )
+            data = {
+                'next': None,
+                'previous': None,
+                'results': fastpath.represent(serializer, rows),
+            }
+            for name, renderer in RENDERERS:
+                body = renderer.render(data, renderer.media_type, {})
+                start = time.perf_counter()
+                for _ in range(options['repeat']):
+                    renderer.render(data, renderer.media_type, {})
+                elapsed = (time.perf_counter() - start) / options['repeat']
+                self.stdout.write(
+                    f'{name:<10}{len(rows):>6}{len(body):>10}'
+                    f'{len(gzip.compress(body)):>9}{elapsed * 1000:>11.3f}'
+                )
@@ -0,0 +1,45 @@
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management import BaseCommand, CommandError
+
+from recipe.importer import RecipeImporter
+
+
+class Command(BaseCommand):
+    help = 'Import recipes for a user from an NDJSON file ("-" for stdin)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('email')
+        parser.add_argument('path')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(email=options['email'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'No user with email {options["email"]}')
+
+        importer = RecipeImporter(
+            user,
+            batch_size=options['batch_size'],
+            progress=self.report_progress,
+        )
+        if options['path'] == '-':
+            summary = importer.run(sys.stdin)
+        else:
+            with open(options['path'], encoding='utf-8') as lines:
+                summary = importer.run(lines)
+
+        for error in summary['errors']:
+            self.stderr.write(f'line {error["line"]}: {error["errors"]}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {summary["created"]} recipes from '
+            f'{summary["lines"]} lines, {summary["failed"]} failed.'
+        ))
+
+    def report_progress(self, importer):
+        self.stdout.write(
+            f'{importer.lines} lines read, {importer.created} imported, '
+            f'{importer.failed} failed'
+        )
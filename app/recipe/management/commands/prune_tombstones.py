@@ -0,0 +1,20 @@
+from django.core.management import BaseCommand
+
+from core.models import RecipeTombstone
+from recipe.sync import tombstone_cutoff
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete recipe tombstones older than '
+        'RECIPE_TOMBSTONE_RETENTION_DAYS. Run it daily; sync cursors '
+        'issued before the cutoff are answered with 410 Gone.'
+    )
+
+    def handle(self, *args, **options):
+        deleted, _ = RecipeTombstone.objects.filter(
+            deleted_at__lt=tombstone_cutoff()
+        ).delete()
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {deleted} tombstones.'
+        ))
@@ -0,0 +1,46 @@
+from django.contrib.auth import get_user_model
+from django.core.management import BaseCommand, CommandError
+
+from recipe import stats
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild the per-user recipe statistics from the recipes, or with '
+        '--check only report where they drifted'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'emails', nargs='*', help='Users to process, all by default'
+        )
+        parser.add_argument('--check', action='store_true')
+
+    def handle(self, *args, **options):
+        users = get_user_model().objects.order_by('pk')
+        if options['emails']:
+            users = users.filter(email__in=options['emails'])
+            found = set(users.values_list('email', flat=True))
+            missing = sorted(set(options['emails']) - found)
+            if missing:
+                raise CommandError(f'No user with email {", ".join(missing)}')
+
+        drifted = 0
+        for user_id, email in users.values_list('pk', 'email').iterator():
+            if not options['check']:
+                stats.rebuild(user_id)
+                continue
+            problems = stats.check(user_id)
+            if problems:
+                drifted += 1
+                for key, stored, expected in problems:
+                    self.stderr.write(
+                        f'{email}: {key} is {stored}, expected {expected}'
+                    )
+
+        if drifted:
+            raise CommandError(f'Statistics of {drifted} users drifted.')
+        self.stdout.write(self.style.SUCCESS(
+            'Statistics consistent.' if options['check']
+            else 'Statistics rebuilt.'
+        ))
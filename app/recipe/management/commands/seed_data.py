@@ -0,0 +1,94 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management import BaseCommand, CommandError
+from django.db import connection
+
+from recipe import seeding
+from recipe.seeding import Distribution
+
+
+class Command(BaseCommand):
+    help = (
+        'Fill the database with synthetic users, tags, ingredients and '
+        'recipes, deterministically from --seed. Counts take a number or a '
+        'distribution: uniform:LOW-HIGH, normal:MEAN,SD or '
+        'pareto:ALPHA,MIN[,MAX].'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument(
+            '--recipes', type=Distribution, default='pareto:1.5,20,5000',
+            help='per user'
+        )
+        parser.add_argument(
+            '--tags', type=Distribution, default='uniform:5-50',
+            help='per user'
+        )
+        parser.add_argument(
+            '--ingredients', type=Distribution, default='uniform:20-300',
+            help='per user'
+        )
+        parser.add_argument(
+            '--tags-per-recipe', type=Distribution, default='uniform:0-5'
+        )
+        parser.add_argument(
+            '--ingredients-per-recipe', type=Distribution,
+            default='normal:8,3'
+        )
+        parser.add_argument(
+            '--price', type=Distribution, default='uniform:50-5000',
+            help='in cents'
+        )
+        parser.add_argument(
+            '--time-min', type=Distribution, default='pareto:2,10,600'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--email', default='seed{}@example.com',
+            help='user email pattern, {} is the user number'
+        )
+        parser.add_argument('--password', default='password')
+        parser.add_argument('--batch-size', type=int, default=50000)
+
+    def handle(self, *args, **options):
+        if '{}' not in options['email']:
+            raise CommandError('--email needs a {} for the user number')
+        if get_user_model().objects.filter(
+            email=options['email'].format(0)
+        ).exists():
+            raise CommandError(
+                f'{options["email"].format(0)} exists, pick another --email'
+            )
+
+        self.start = time.perf_counter()
+        self.stdout.write(
+            'Writing with '
+            + ('COPY' if connection.vendor == 'postgresql' else 'INSERT')
+        )
+        user_ids = seeding.seed(
+            users=options['users'],
+            recipes=options['recipes'],
+            tags=options['tags'],
+            ingredients=options['ingredients'],
+            tags_per_recipe=options['tags_per_recipe'],
+            ingredients_per_recipe=options['ingredients_per_recipe'],
+            price=options['price'],
+            time_min=options['time_min'],
+            seed=options['seed'],
+            password=options['password'],
+            email=options['email'],
+            batch_size=options['batch_size'],
+            progress=self.report_progress,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {len(user_ids)} users in '
+            f'{time.perf_counter() - self.start:.1f}s.'
+        ))
+
+    def report_progress(self, rows):
+        elapsed = time.perf_counter() - self.start
+        self.stdout.write(
+            f'{rows} rows in {elapsed:.1f}s, {rows / elapsed:,.0f} rows/s'
+        )
@@ -0,0 +1,46 @@
+import os
+
+from django.conf import settings
+from django.core.management import BaseCommand
+
+from core.models import RECIPE_IMAGE_DIR, Recipe
+from recipe.thumbnails import thumbnail_names
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete recipe images, thumbnails and partial uploads that no '
+        'recipe references and that were not saved within '
+        'RECIPE_IMAGE_GRACE seconds. Run it periodically; deletes done '
+        'right after a recipe lets go of an image skip recently used files.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace', type=int, default=settings.RECIPE_IMAGE_GRACE,
+            help='seconds'
+        )
+
+    def handle(self, *args, **options):
+        storage = Recipe._meta.get_field('image').storage
+        # read before listing the files, anything referenced later was
+        # touched by its upload and is inside the grace period
+        referenced = set()
+        for image, thumbnails in Recipe.objects.exclude(image='').values_list(
+            'image', 'thumbnails'
+        ).iterator():
+            referenced.add(image)
+            referenced.update(thumbnail_names(thumbnails))
+
+        deleted = 0
+        root = storage.path(RECIPE_IMAGE_DIR)
+        for directory, _, filenames in os.walk(root):
+            for filename in filenames:
+                name = os.path.relpath(
+                    os.path.join(directory, filename), storage.location
+                ).replace(os.sep, '/')
+                if name not in referenced and storage.delete_stale(
+                    name, options['grace']
+                ):
+                    deleted += 1
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} files.'))
@@ -0,0 +1,73 @@
+from collections import OrderedDict
+
+from rest_framework.pagination import BasePagination, CursorPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(CursorPagination):
+    # Cursors encode the last id seen, so each page is a
+    # `WHERE user_id = %s AND id < %s ORDER BY id DESC LIMIT n` range scan.
+    # No COUNT(*) or OFFSET is ever issued, deep pages cost the same as the
+    # first one and rows inserted while paging can't shift later pages.
+    ordering = '-id'
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+
+class SearchPagination(BasePagination):
+    # Ranked search results have no column to keyset on, so pages are
+    # addressed by position in the ranking. Only page_size + 1 results are
+    # fetched and nothing is counted.
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    offset_query_param = 'offset'
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+            if page_size > 0:
+                return min(page_size, self.max_page_size)
+        except (KeyError, ValueError):
+            pass
+        return self.page_size
+
+    def get_offset(self, request):
+        try:
+            return max(int(request.query_params[self.offset_query_param]), 0)
+        except (KeyError, ValueError):
+            return 0
+
+    def paginate_queryset(self, results, request, view=None):
+        self.request = request
+        self.limit = self.get_page_size(request)
+        self.offset = self.get_offset(request)
+        page = list(results[self.offset:self.offset + self.limit + 1])
+        self.has_next = len(page) > self.limit
+        return page[:self.limit]
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(
+            url, self.offset_query_param, self.offset + self.limit
+        )
+
+    def get_previous_link(self):
+        if not self.offset:
+            return None
+        url = self.request.build_absolute_uri()
+        offset = self.offset - self.limit
+        if offset <= 0:
+            return remove_query_param(url, self.offset_query_param)
+        return replace_query_param(url, self.offset_query_param, offset)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
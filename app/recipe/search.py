@@ -0,0 +1,138 @@
+import re
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.postgres.search import (
+    SearchQuery, SearchRank, SearchVector, TrigramSimilarity
+)
+from django.db import connection
+from django.db.models import F, Q
+
+from core.authentication import LocalLRUCache
+from core.checks import cache_is_shared
+from recipe.caching import get_list_version
+
+
+# pg_trgm's default similarity threshold
+SIMILARITY_THRESHOLD = 0.3
+
+_indexes = LocalLRUCache(
+    maxsize=settings.SEARCH_INDEX_CACHE_SIZE,
+    ttl=settings.SEARCH_INDEX_CACHE_TTL,
+)
+
+
+def tokenize(text):
+    return re.findall(r'\w+', text.lower())
+
+
+def trigrams(text):
+    # same padding as pg_trgm: two spaces before each word, one after
+    grams = set()
+    for word in tokenize(text):
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class InvertedIndex:
+    # In-process index over one user's rows for databases without full
+    # text search. A query only touches the postings of its own tokens and
+    # trigrams, so cost grows with the number of matches rather than with
+    # the size of the collection.
+
+    def __init__(self, rows):
+        self.tokens = defaultdict(set)
+        self.grams = defaultdict(set)
+        self.gram_counts = {}
+        for pk, text in rows:
+            for token in tokenize(text):
+                self.tokens[token].add(pk)
+            grams = trigrams(text)
+            self.gram_counts[pk] = len(grams)
+            for gram in grams:
+                self.grams[gram].add(pk)
+
+    def search(self, query):
+        query_tokens = set(tokenize(query))
+        query_grams = trigrams(query)
+        if not query_tokens:
+            return []
+
+        token_hits = defaultdict(int)
+        for token in query_tokens:
+            for pk in self.tokens.get(token, ()):
+                token_hits[pk] += 1
+        shared = defaultdict(int)
+        for gram in query_grams:
+            for pk in self.grams.get(gram, ()):
+                shared[pk] += 1
+
+        scores = {}
+        for pk, count in shared.items():
+            union = len(query_grams) + self.gram_counts[pk] - count
+            similarity = count / union
+            if similarity >= SIMILARITY_THRESHOLD or pk in token_hits:
+                scores[pk] = token_hits[pk] / len(query_tokens) + similarity
+        return sorted(scores, key=lambda pk: (-scores[pk], -pk))
+
+
+def get_index(queryset, field, user):
+    # kept per list version, or rebuilt every time when the version can't
+    # be trusted, see core.checks
+    model = queryset.model
+    if not cache_is_shared():
+        return InvertedIndex(
+            model.objects.filter(user=user).values_list('pk', field)
+        )
+    version = get_list_version(model, user.pk)
+    key = (model._meta.label_lower, field, user.pk, version)
+    index = _indexes.get(key)
+    if index is None:
+        index = InvertedIndex(
+            model.objects.filter(user=user).values_list('pk', field)
+        )
+        _indexes.set(key, index)
+    return index
+
+
+class RankedResults:
+    # slices of ranked primary keys resolved through `queryset`, so the
+    # caller's prefetches still apply to each page
+
+    def __init__(self, queryset, pks):
+        self.queryset = queryset
+        self.pks = pks
+
+    def __getitem__(self, index):
+        pks = self.pks[index]
+        found = self.queryset.in_bulk(pks)
+        return [found[pk] for pk in pks if pk in found]
+
+
+def postgres_search(queryset, field, query):
+    # matches either the full text query or the trigram similarity
+    # operator, both served by the GIN indexes from migration 0010
+    search_query = SearchQuery(query, config='simple')
+    return (
+        queryset
+        .annotate(search=SearchVector(field, config='simple'))
+        .filter(
+            Q(search=search_query) | Q(**{f'{field}__trigram_similar': query})
+        )
+        .annotate(
+            rank=SearchRank(F('search'), search_query)
+            + TrigramSimilarity(field, query)
+        )
+        .order_by('-rank', '-pk')
+    )
+
+
+def search(queryset, field, query, user):
+    # returns something that can be sliced into pages of model instances,
+    # best match first
+    if connection.vendor == 'postgresql':
+        return postgres_search(queryset, field, query)
+    return RankedResults(
+        queryset, get_index(queryset, field, user).search(query)
+    )
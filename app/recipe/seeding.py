@@ -0,0 +1,313 @@
+import csv
+import io
+import json
+import random
+from datetime import datetime
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import (
+    DEFAULT_DB_ALIAS, connection, connections, transaction
+)
+from django.db.models import Max
+from django.utils import timezone
+
+from core.models import Tag, Ingredient, Recipe
+from recipe import cookable, stats
+from recipe.caching import bump_list_version
+
+
+WORDS = (
+    'apple basil bean beef broth carrot cheese chicken chili coconut corn '
+    'curry egg garlic ginger honey kale lemon lentil lime mango mint '
+    'mushroom noodle oat onion orange pasta pea peanut pepper pork potato '
+    'rice salmon sesame soup spinach squash tofu tomato tuna walnut yogurt'
+).split()
+
+USER_FIELDS = (
+    'id', 'email', 'name', 'password', 'is_active', 'is_staff',
+    'is_superuser',
+)
+NAME_FIELDS = ('id', 'user_id', 'name')
+# NULL in COPY's csv input, so that empty fields stay empty strings
+COPY_NULL = r'\N'
+CONVERTED_FIELDS = {
+    'BooleanField', 'DateTimeField', 'DecimalField', 'JSONField',
+}
+RECIPE_FIELDS = (
+    'id', 'user_id', 'title', 'time_min', 'price', 'link', 'image',
+    'thumbnails', 'updated_at',
+)
+
+
+class Distribution:
+    # Non-negative integers drawn from one of:
+    #   N                  always N
+    #   uniform:LOW-HIGH   LOW to HIGH inclusive
+    #   normal:MEAN,SD     rounded, negative draws are 0
+    #   pareto:ALPHA,MIN[,MAX]
+    #                      long tailed, most draws near MIN
+    # Invalid specs raise ValueError, so it can be an argparse type.
+
+    def __init__(self, spec):
+        self.spec = str(spec)
+        kind, _, args = self.spec.partition(':')
+        try:
+            if not args:
+                self.kind, self.args = 'fixed', (int(kind),)
+            elif kind == 'uniform':
+                low, high = (int(arg) for arg in args.split('-'))
+                self.kind, self.args = kind, (low, high)
+            elif kind in ('normal', 'pareto'):
+                self.kind = kind
+                self.args = tuple(float(arg) for arg in args.split(','))
+            else:
+                raise ValueError(f'unknown distribution {kind!r}')
+        except (TypeError, ValueError) as exc:
+            raise ValueError(f'invalid distribution {self.spec!r}: {exc}')
+        if kind == 'normal' and len(self.args) != 2 or (
+            kind == 'pareto' and len(self.args) not in (2, 3)
+        ):
+            raise ValueError(f'invalid distribution {self.spec!r}')
+
+    def __str__(self):
+        return self.spec
+
+    def sample(self, rng):
+        if self.kind == 'fixed':
+            value = self.args[0]
+        elif self.kind == 'uniform':
+            value = rng.randint(*self.args)
+        elif self.kind == 'normal':
+            value = round(rng.gauss(*self.args))
+        else:
+            alpha, low, *high = self.args
+            value = round(low * rng.paretovariate(alpha))
+            if high:
+                value = min(value, round(high[0]))
+        return max(value, 0)
+
+
+def as_distribution(value):
+    return value if isinstance(value, Distribution) else Distribution(value)
+
+
+def words(rng, count):
+    return ' '.join(rng.choice(WORDS) for _ in range(count))
+
+
+def next_id(model):
+    return (model.objects.aggregate(top=Max('id'))['top'] or 0) + 1
+
+
+class Writer:
+    # Inserts rows given as tuples of `fields`. PostgreSQL gets one COPY
+    # per call. Other databases get the INSERT bulk_create would issue, run
+    # with executemany on values converted by the fields themselves:
+    # building a model instance per row costs more than the insert.
+
+    def __init__(self):
+        self.copy = connection.vendor == 'postgresql'
+        self.rows = 0
+
+    def write(self, model, fields, rows):
+        if not rows:
+            return
+        self.rows += len(rows)
+        if self.copy:
+            self.copy_rows(model, fields, rows)
+        else:
+            self.insert_rows(model, fields, rows)
+
+    def insert_rows(self, model, fields, rows):
+        fields = [model._meta.get_field(field) for field in fields]
+        sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+            connection.ops.quote_name(model._meta.db_table),
+            ', '.join(connection.ops.quote_name(f.column) for f in fields),
+            ', '.join(['%s'] * len(fields)),
+        )
+        # integers and strings go to the driver as they are
+        converted = [
+            (index, field) for index, field in enumerate(fields)
+            if field.get_internal_type() in CONVERTED_FIELDS
+        ]
+        if converted:
+            db = connections[DEFAULT_DB_ALIAS]
+            rows = [list(row) for row in rows]
+            for row in rows:
+                for index, field in converted:
+                    row[index] = field.get_db_prep_save(row[index], db)
+        with connection.cursor() as cursor:
+            cursor.executemany(sql, rows)
+
+    def copy_rows(self, model, fields, rows):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow([copy_value(value) for value in row])
+        buffer.seek(0)
+        columns = ', '.join(
+            connection.ops.quote_name(model._meta.get_field(field).column)
+            for field in fields
+        )
+        table = connection.ops.quote_name(model._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {table} ({columns}) FROM STDIN "
+                f"WITH (FORMAT csv, NULL '{COPY_NULL}')",
+                buffer
+            )
+
+
+def copy_value(value):
+    if value is None:
+        return COPY_NULL
+    if isinstance(value, dict):
+        return json.dumps(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def seed(users=10, recipes=100, tags=20, ingredients=50,
+         tags_per_recipe='uniform:0-3', ingredients_per_recipe='uniform:0-6',
+         price='uniform:50-5000', time_min='uniform:1-180', seed=0,
+         password='password', email='user{}@example.com',
+         batch_size=50000, progress=None):
+    # Fills `users` users, each with a number of tags, ingredients and
+    # recipes drawn from those distributions, and each recipe linked to a
+    # draw of `tags_per_recipe` and `ingredients_per_recipe` distinct ones
+    # (price is in cents). Rows are written in batches of about
+    # `batch_size` through Writer with ids allocated here, so nothing is
+    # read back. Every user shares one password hash. The same arguments
+    # on the same database produce the same rows.
+    #
+    # Not safe to run alongside other writers: ids continue from the
+    # current maximum. Returns the range of the new user ids.
+    rng = random.Random(seed)
+    recipes, tags, ingredients = map(
+        as_distribution, (recipes, tags, ingredients)
+    )
+    tags_per_recipe, ingredients_per_recipe = map(
+        as_distribution, (tags_per_recipe, ingredients_per_recipe)
+    )
+    price, time_min = map(as_distribution, (price, time_min))
+    password_hash = make_password(password, salt=f'seed{seed}')
+    now = timezone.now()
+    writer = Writer()
+    first_user_id = next_id(get_user_model())
+    user_ids = range(first_user_id, first_user_id + users)
+    ids = {model: next_id(model) for model in (Tag, Ingredient, Recipe)}
+
+    def allocate(model, count):
+        start = ids[model]
+        ids[model] += count
+        return range(start, start + count)
+
+    batch = Batch()
+    with transaction.atomic():
+        writer.write(get_user_model(), USER_FIELDS, [
+            (
+                user_id, email.format(n), words(rng, 2), password_hash,
+                True, False, False,
+            )
+            for n, user_id in enumerate(user_ids)
+        ])
+
+    for user_id in user_ids:
+        tag_ids = allocate(Tag, tags.sample(rng))
+        ingredient_ids = allocate(Ingredient, ingredients.sample(rng))
+        batch.tags.extend(
+            (pk, user_id, f'{words(rng, 1)} {n}')
+            for n, pk in enumerate(tag_ids)
+        )
+        batch.ingredients.extend(
+            (pk, user_id, f'{words(rng, 1)} {n}')
+            for n, pk in enumerate(ingredient_ids)
+        )
+        for recipe_id in allocate(Recipe, recipes.sample(rng)):
+            batch.recipes.append((
+                recipe_id, user_id, words(rng, 3), time_min.sample(rng),
+                Decimal(price.sample(rng)) / 100, '', '', {}, now,
+            ))
+            batch.recipe_tags.extend(
+                (recipe_id, tag_id) for tag_id in rng.sample(
+                    tag_ids, min(tags_per_recipe.sample(rng), len(tag_ids))
+                )
+            )
+            batch.recipe_ingredients.extend(
+                (recipe_id, ingredient_id) for ingredient_id in rng.sample(
+                    ingredient_ids,
+                    min(ingredients_per_recipe.sample(rng),
+                        len(ingredient_ids))
+                )
+            )
+        if len(batch) >= batch_size:
+            batch.flush(writer)
+            if progress is not None:
+                progress(writer.rows)
+    batch.flush(writer)
+    if progress is not None:
+        progress(writer.rows)
+
+    reset_sequences()
+    refresh(user_ids)
+    return user_ids
+
+
+class Batch:
+    # rows waiting to be written, flushed parents first
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.tags = []
+        self.ingredients = []
+        self.recipes = []
+        self.recipe_tags = []
+        self.recipe_ingredients = []
+
+    def __len__(self):
+        return (
+            len(self.tags) + len(self.ingredients) + len(self.recipes)
+            + len(self.recipe_tags) + len(self.recipe_ingredients)
+        )
+
+    def flush(self, writer):
+        with transaction.atomic():
+            writer.write(Tag, NAME_FIELDS, self.tags)
+            writer.write(Ingredient, NAME_FIELDS, self.ingredients)
+            writer.write(Recipe, RECIPE_FIELDS, self.recipes)
+            writer.write(
+                Recipe.tags.through, ('recipe_id', 'tag_id'),
+                self.recipe_tags
+            )
+            writer.write(
+                Recipe.ingrediant.through, ('recipe_id', 'ingredient_id'),
+                self.recipe_ingredients
+            )
+        self.clear()
+
+
+def reset_sequences():
+    # the ids were chosen here, move the sequences past them
+    statements = connection.ops.sequence_reset_sql(no_style(), [
+        get_user_model(), Tag, Ingredient, Recipe,
+        Recipe.tags.through, Recipe.ingrediant.through,
+    ])
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def refresh(user_ids):
+    # what recipe.signals does for recipes_bulk_created, with the
+    # statistics rebuilt from aggregates instead of applied as deltas
+    for user_id in user_ids:
+        for model in (Tag, Ingredient, Recipe):
+            bump_list_version(model, user_id)
+        cookable.bump_version(user_id)
+        stats.rebuild(user_id)
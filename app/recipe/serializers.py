@@ -1,30 +1,164 @@
+from django.core.files.storage import default_storage
 from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
 from core.models import Tag, Ingredient, Recipe
+from recipe.caching import bump_list_version
+
+
+class BulkNameListSerializer(serializers.ListSerializer):
+    # Creates a whole list payload with one bulk INSERT. With the
+    # `get_or_create` context flag, names the user already has are reused
+    # instead of duplicated, so re-running an import is idempotent.
+    max_items = 1000
+
+    def validate(self, attrs):
+        if len(attrs) > self.max_items:
+            raise serializers.ValidationError(
+                f'Ensure this list has no more than {self.max_items} items.'
+            )
+        return attrs
+
+    def create(self, validated_data):
+        model = self.child.Meta.model
+        if not validated_data:
+            return []
+        user = validated_data[0]['user']
+
+        if not self.context.get('get_or_create'):
+            objects = model.objects.bulk_create(
+                [model(**attrs) for attrs in validated_data]
+            )
+            bump_list_version(model, user.pk)
+            return objects
+
+        names = {attrs['name'] for attrs in validated_data}
+        by_name = {
+            obj.name: obj
+            for obj in model.objects.filter(user=user, name__in=names)
+        }
+        missing = []
+        for attrs in validated_data:
+            if attrs['name'] not in by_name:
+                by_name[attrs['name']] = model(**attrs)
+                missing.append(by_name[attrs['name']])
+        if missing:
+            model.objects.bulk_create(missing)
+            bump_list_version(model, user.pk)
+        return [by_name[attrs['name']] for attrs in validated_data]
+
 
 class TagSerializer(serializers.ModelSerializer):
     class Meta:
         model = Tag
         fields = ('id', 'name')
         read_only_fields = ('id',)
+        list_serializer_class = BulkNameListSerializer
 
 class IngredientSerializer(serializers.ModelSerializer):
     class Meta:
         model = Ingredient
         fields = ('id', 'name')
         read_only_fields = ('id',)
+        list_serializer_class = BulkNameListSerializer
+
+class BulkManyRelatedField(serializers.ManyRelatedField):
+    # resolves all submitted pks with a single query instead of one per item
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+
+        child = self.child_relation
+        pks = []
+        for item in data:
+            try:
+                if isinstance(item, bool):
+                    raise TypeError
+                pks.append(int(item))
+            except (TypeError, ValueError):
+                child.fail('incorrect_type', data_type=type(item).__name__)
+
+        found = child.get_queryset().in_bulk(pks)
+        for pk in pks:
+            if pk not in found:
+                child.fail('does_not_exist', pk_value=pk)
+        return [found[pk] for pk in pks]
+
+
+class BulkPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
 
-class RecipeSerializer(serializers.ModelSerializer):
-    ingrediant = serializers.PrimaryKeyRelatedField(
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return BulkManyRelatedField(**list_kwargs)
+
+
+class ThumbnailsField(serializers.ReadOnlyField):
+    # {width: {format: url}} for the derivatives that are ready so far
+
+    def to_representation(self, value):
+        request = self.context.get('request')
+        thumbnails = {}
+        for width, names in value.items():
+            thumbnails[width] = {}
+            for fmt, name in names.items():
+                url = default_storage.url(name)
+                if request is not None:
+                    url = request.build_absolute_uri(url)
+                thumbnails[width][fmt] = url
+        return thumbnails
+
+
+class SparseFieldsMixin:
+    # renders only the fields named in context['fields'] when it is set
+
+    def get_fields(self):
+        fields = super().get_fields()
+        requested = self.context.get('fields')
+        if requested is None:
+            return fields
+        return {
+            name: field for name, field in fields.items() if name in requested
+        }
+
+
+class ExpandMixin:
+    # relations named in context['expand'] render as nested objects
+    # instead of primary keys, using the serializers in `expandable`
+    expandable = {}
+
+    def get_fields(self):
+        fields = super().get_fields()
+        for name in self.context.get('expand') or ():
+            if name in fields:
+                fields[name] = self.expandable[name](many=True, read_only=True)
+        return fields
+
+
+class RecipeSerializer(SparseFieldsMixin, ExpandMixin,
+                       serializers.ModelSerializer):
+    expandable = {'tags': TagSerializer, 'ingrediant': IngredientSerializer}
+    ingrediant = BulkPrimaryKeyRelatedField(
         many=True,
         queryset = Ingredient.objects.all()
     )
-    tags = serializers.PrimaryKeyRelatedField(
+    tags = BulkPrimaryKeyRelatedField(
         many=True,
         queryset= Tag.objects.all()
     )
+    thumbnails = ThumbnailsField()
+
     class Meta:
         model = Recipe
-        fields = ('id', 'title', 'time_min', 'price', 'tags', 'ingrediant','link')
+        fields = (
+            'id', 'title', 'time_min', 'price', 'tags', 'ingrediant', 'link',
+            'thumbnails'
+        )
         read_only_fields = ('id',)
 
 class RecipeDetailSerializer(RecipeSerializer):
@@ -39,7 +173,9 @@ class RecipeDetailSerializer(RecipeSerializer):
 
 
 class RecipeImageSerializer(serializers.ModelSerializer):
+    thumbnails = ThumbnailsField()
+
     class Meta:
         model = Recipe
-        fields = ('id', 'image')
+        fields = ('id', 'image', 'thumbnails')
         read_only_fields = ('id',)
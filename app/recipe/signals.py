@@ -0,0 +1,276 @@
+from functools import partial
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import (
+    post_init, pre_save, post_save, post_delete, pre_delete, m2m_changed
+)
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+from core.models import (
+    Tag, Ingredient, Recipe, RecipeStats, RecipeStatCount, RecipeTombstone,
+    deleting_users
+)
+from recipe import cookable, stats
+from recipe.caching import bump_list_version
+from recipe.thumbnails import release_image
+
+
+# Sent with `user` and `recipes` after recipes and their relations were
+# written with bulk_create, which bypasses the model and m2m signals.
+recipes_bulk_created = Signal()
+
+RELATION_FIELDS = {
+    Recipe.tags.through: 'tags',
+    Recipe.ingrediant.through: 'ingrediant',
+}
+
+
+def touch_recipes(**filters):
+    Recipe.objects.filter(**filters).update(updated_at=timezone.now())
+
+
+@receiver([post_save, post_delete], sender=Tag)
+@receiver([post_save, post_delete], sender=Ingredient)
+def invalidate_list_cache(sender, instance, **kwargs):
+    bump_list_version(sender, instance.user_id)
+
+
+@receiver([post_save, post_delete], sender=Recipe)
+def invalidate_recipe_search_index(sender, instance, **kwargs):
+    bump_list_version(Recipe, instance.user_id)
+
+
+@receiver(recipes_bulk_created)
+def invalidate_list_caches_after_bulk_create(sender, user, **kwargs):
+    bump_list_version(Tag, user.pk)
+    bump_list_version(Ingredient, user.pk)
+    bump_list_version(Recipe, user.pk)
+    transaction.on_commit(partial(cookable.bump_version, user.pk))
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def invalidate_tag_list_cache(sender, instance, action, **kwargs):
+    if action.startswith('post_'):
+        bump_list_version(Tag, instance.user_id)
+
+
+@receiver(m2m_changed, sender=Recipe.ingrediant.through)
+def invalidate_ingredient_list_cache(sender, instance, action, **kwargs):
+    if action.startswith('post_'):
+        bump_list_version(Ingredient, instance.user_id)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingrediant.through)
+def touch_recipe_on_relation_change(sender, instance, action, reverse,
+                                    pk_set, **kwargs):
+    # updated_at drives ETags and delta syncs, so it has to move whenever
+    # the recipe's tags or ingredients do
+    if not reverse:
+        if action == 'post_clear' or (
+            action in ('post_add', 'post_remove') and pk_set
+        ):
+            touch_recipes(pk=instance.pk)
+    elif action in ('post_add', 'post_remove') and pk_set:
+        touch_recipes(pk__in=pk_set)
+    elif action == 'pre_clear':
+        touch_recipes(**{RELATION_FIELDS[sender]: instance})
+
+
+@receiver(m2m_changed, sender=Recipe.ingrediant.through)
+def update_cookable_index(sender, instance, action, reverse, pk_set,
+                          **kwargs):
+    # applied once committed, a rolled back change must not reach the
+    # in-memory index
+    change = cookable.relation_change(action, reverse, instance.pk, pk_set)
+    if change is not None:
+        transaction.on_commit(
+            partial(cookable.update_index, instance.user_id, change)
+        )
+
+
+@receiver(post_delete, sender=Recipe)
+def drop_recipe_from_cookable_index(sender, instance, **kwargs):
+    # cascaded through rows are deleted without m2m signals; the pk is
+    # read now, delete() clears it before the commit
+    transaction.on_commit(partial(
+        cookable.update_index, instance.user_id,
+        partial(cookable.CookableIndex.drop_recipe, recipe_id=instance.pk)
+    ))
+
+
+@receiver(post_delete, sender=Ingredient)
+def drop_ingredient_from_cookable_index(sender, instance, **kwargs):
+    transaction.on_commit(partial(
+        cookable.update_index, instance.user_id,
+        partial(
+            cookable.CookableIndex.drop_ingredient,
+            ingredient_id=instance.pk
+        )
+    ))
+
+
+@receiver(post_save, sender=Tag)
+@receiver(pre_delete, sender=Tag)
+def touch_recipes_for_tag(sender, instance, created=False, **kwargs):
+    # RecipeDetailSerializer embeds tag names
+    if not created:
+        touch_recipes(tags=instance)
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(pre_delete, sender=Ingredient)
+def touch_recipes_for_ingredient(sender, instance, created=False, **kwargs):
+    if not created:
+        touch_recipes(ingrediant=instance)
+
+
+@receiver(post_delete, sender=Recipe)
+def record_tombstone(sender, instance, **kwargs):
+    if instance.user_id in deleting_users.get():
+        return
+    RecipeTombstone.objects.create(
+        user_id=instance.user_id,
+        recipe_id=instance.pk
+    )
+
+
+@receiver(post_delete, sender=get_user_model())
+def drop_tombstones(sender, instance, **kwargs):
+    # deleting a user cascades to their recipes, whose tombstones would
+    # otherwise point at the deleted user
+    RecipeTombstone.objects.filter(user_id=instance.pk).delete()
+
+
+def stored_image_name(instance):
+    # None when the image column was deferred and never loaded
+    image = instance.__dict__.get('image')
+    return getattr(image, 'name', image)
+
+
+@receiver(post_init, sender=Recipe)
+def remember_image(sender, instance, **kwargs):
+    instance._stored_image = stored_image_name(instance)
+    instance._stored_thumbnails = instance.__dict__.get('thumbnails')
+
+
+@receiver(post_save, sender=Recipe)
+def release_replaced_image(sender, instance, **kwargs):
+    current = stored_image_name(instance)
+    previous = instance._stored_image
+    if previous and previous != current:
+        transaction.on_commit(partial(
+            release_image, previous, instance._stored_thumbnails
+        ))
+    instance._stored_image = current
+    instance._stored_thumbnails = instance.__dict__.get('thumbnails')
+
+
+@receiver(post_delete, sender=Recipe)
+def release_deleted_image(sender, instance, **kwargs):
+    name = stored_image_name(instance)
+    if name:
+        transaction.on_commit(partial(
+            release_image, name, instance.__dict__.get('thumbnails')
+        ))
+
+
+@receiver(post_save, sender=get_user_model())
+def start_recipe_stats(sender, instance, created, **kwargs):
+    # so recipe writes only ever update the summary row
+    if created:
+        RecipeStats.objects.create(user=instance)
+
+
+@receiver(pre_save, sender=Recipe)
+def read_stat_values(sender, instance, update_fields=None, **kwargs):
+    # The values being replaced are read from the row rather than
+    # remembered on the instance, which may be stale, and the row stays
+    # locked until Recipe.save() commits so a concurrent save can't apply
+    # a delta from the same values. Deferred columns aren't written by
+    # save() and can't change.
+    instance._stat_values = None
+    if instance._state.adding:
+        return
+    fields = [
+        field for field in stats.STAT_FIELDS
+        if field in instance.__dict__
+        and (update_fields is None or field in update_fields)
+    ]
+    if fields:
+        instance._stat_values = (
+            Recipe.objects.select_for_update().filter(pk=instance.pk)
+            .values(*fields).first()
+        )
+
+
+@receiver(post_save, sender=Recipe)
+def update_recipe_stats(sender, instance, created, **kwargs):
+    if created:
+        stats.apply(instance.user_id, *stats.recipe_delta(instance))
+    elif instance._stat_values:
+        stats.apply(
+            instance.user_id,
+            *stats.value_change(instance._stat_values, instance)
+        )
+
+
+@receiver(pre_delete, sender=Recipe)
+def remove_recipe_from_stats(sender, instance, **kwargs):
+    # before the delete, while the row and its through rows still exist.
+    # A deleted user's statistics are deleted with them.
+    if instance.user_id in deleting_users.get():
+        return
+    stats.remove_recipe(instance.user_id, instance.pk)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingrediant.through)
+def update_relation_stats(sender, instance, action, reverse, pk_set,
+                          **kwargs):
+    # removals are counted in pre_* while the rows still exist, additions
+    # in post_add whose pk_set only holds the rows actually inserted
+    relation = RELATION_FIELDS[sender]
+    kind, _, column = stats.RELATIONS[relation]
+    if not reverse:
+        if action == 'post_add' and pk_set:
+            stats.apply(
+                instance.user_id, counts={(kind, pk): 1 for pk in pk_set}
+            )
+        elif action == 'pre_remove' and pk_set:
+            stats.apply(instance.user_id, removed=[stats.relation_rows(
+                relation, recipe_id=instance.pk, **{f'{column}__in': pk_set}
+            )])
+        elif action == 'pre_clear':
+            stats.apply(instance.user_id, removed=[
+                stats.relation_rows(relation, recipe_id=instance.pk)
+            ])
+    elif action == 'post_add' and pk_set:
+        stats.apply(
+            instance.user_id, counts={(kind, instance.pk): len(pk_set)}
+        )
+    elif action == 'pre_remove' and pk_set:
+        removed = sender.objects.filter(
+            recipe_id__in=pk_set, **{column: instance.pk}
+        ).count()
+        stats.apply(instance.user_id, counts={(kind, instance.pk): -removed})
+    elif action == 'pre_clear':
+        RecipeStatCount.objects.filter(
+            user_id=instance.user_id, kind=kind, value=instance.pk
+        ).update(count=0)
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Ingredient)
+def drop_relation_stats(sender, instance, **kwargs):
+    # the through rows go with it, without m2m signals
+    RecipeStatCount.objects.filter(
+        kind=stats.RELATION_KINDS[sender], value=instance.pk
+    ).delete()
+
+
+@receiver(recipes_bulk_created)
+def add_bulk_created_recipes_to_stats(sender, user, recipes, **kwargs):
+    stats.apply(user.pk, *stats.bulk_delta(recipes))
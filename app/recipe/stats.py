@@ -0,0 +1,303 @@
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from decimal import Decimal
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import (
+    BigIntegerField, Count, F, Q, Subquery, Sum
+)
+from django.db.models.functions import Cast, Round
+
+from core.models import (
+    Recipe, RecipeStats, RecipeStatCount, Tag, Ingredient
+)
+
+
+# Per-user recipe statistics read from the summary tables instead of
+# aggregating over core_recipe and the through tables. recipe.signals
+# applies every change as a delta; compute() is the aggregate version used
+# to rebuild and check them.
+
+STAT_FIELDS = ('price', 'time_min')
+PRICE = RecipeStatCount.PRICE
+TIME = RecipeStatCount.TIME
+RELATIONS = {
+    'tags': (RecipeStatCount.TAG, Tag, 'tag_id'),
+    'ingrediant': (RecipeStatCount.INGREDIENT, Ingredient, 'ingredient_id'),
+}
+RELATION_KINDS = {model: kind for kind, model, _ in RELATIONS.values()}
+
+
+def cents(price):
+    return int((Decimal(str(price)) * 100).to_integral_value())
+
+
+def recipe_delta(recipe):
+    # summary and value count deltas for a new recipe, not including its
+    # relations
+    price = cents(recipe.price)
+    return (
+        {
+            'recipe_count': 1,
+            'price_total': Decimal(price) / 100,
+            'time_total': recipe.time_min,
+        },
+        Counter({(PRICE, price): 1, (TIME, recipe.time_min): 1}),
+    )
+
+
+def bulk_delta(recipes):
+    summary, counts = Counter(), Counter()
+    for recipe in recipes:
+        recipe_summary, recipe_counts = recipe_delta(recipe)
+        summary.update(recipe_summary)
+        counts.update(recipe_counts)
+    ids = [recipe.pk for recipe in recipes]
+    for relation, (kind, _, column) in RELATIONS.items():
+        through = getattr(Recipe, relation).through
+        for value, count in through.objects.filter(
+            recipe_id__in=ids
+        ).values_list(column).annotate(count=Count('id')).order_by():
+            counts[(kind, value)] += count
+    return dict(summary), counts
+
+
+def value_change(previous, recipe):
+    # deltas for saving `recipe` over the `previous` column values
+    summary, counts = {}, Counter()
+    if 'price' in previous:
+        old, new = cents(previous['price']), cents(recipe.price)
+        if old != new:
+            summary['price_total'] = Decimal(new - old) / 100
+            counts[(PRICE, old)] -= 1
+            counts[(PRICE, new)] += 1
+    if 'time_min' in previous:
+        old, new = previous['time_min'], recipe.time_min
+        if old != new:
+            summary['time_total'] = new - old
+            counts[(TIME, old)] -= 1
+            counts[(TIME, new)] += 1
+    return summary, counts
+
+
+def relation_rows(relation, **filters):
+    # matches the counts of the related objects in the through rows
+    # selected by `filters`, to be decremented before those rows are
+    # deleted; only valid while each object appears at most once
+    kind, _, column = RELATIONS[relation]
+    through = getattr(Recipe, relation).through
+    return Q(
+        kind=kind,
+        value__in=through.objects.filter(**filters).values(column)
+    )
+
+
+def remove_recipe(user_id, recipe_id):
+    # decrements everything the stored recipe contributed, read by
+    # subqueries so it must run before the delete
+    row = Recipe.objects.filter(pk=recipe_id)
+    RecipeStats.objects.filter(user_id=user_id).update(
+        recipe_count=F('recipe_count') - 1,
+        price_total=F('price_total') - Subquery(row.values('price')),
+        time_total=F('time_total') - Subquery(row.values('time_min')),
+    )
+    apply(user_id, removed=[
+        Q(kind=PRICE, value__in=row.annotate(
+            cents=Cast(Round(F('price') * 100), BigIntegerField())
+        ).values('cents')),
+        Q(kind=TIME, value__in=row.values('time_min')),
+    ] + [
+        relation_rows(relation, recipe_id=recipe_id)
+        for relation in RELATIONS
+    ])
+
+
+def apply(user_id, summary=None, counts=None, removed=()):
+    # Adds `summary` to the user's totals and `counts` ({(kind, value):
+    # delta}) to the value counts. `removed` are relation_rows() to
+    # decrement by one. Counts are written with one insert for new keys and
+    # one update per distinct delta.
+    if summary:
+        updated = RecipeStats.objects.filter(user_id=user_id).update(**{
+            field: F(field) + delta for field, delta in summary.items()
+        })
+        # a missing row is only started by an added recipe; removals from
+        # users without statistics (or being deleted) are dropped
+        if not updated and summary.get('recipe_count', 0) > 0:
+            try:
+                with transaction.atomic():
+                    RecipeStats.objects.create(user_id=user_id, **summary)
+            except IntegrityError:
+                # created concurrently
+                apply(user_id, summary=summary)
+
+    counts = {key: delta for key, delta in (counts or {}).items() if delta}
+    new_keys = [
+        RecipeStatCount(user_id=user_id, kind=kind, value=value)
+        for (kind, value), delta in counts.items() if delta > 0
+    ]
+    if new_keys:
+        RecipeStatCount.objects.bulk_create(new_keys, ignore_conflicts=True)
+
+    values = defaultdict(lambda: defaultdict(list))
+    for (kind, value), delta in counts.items():
+        values[delta][kind].append(value)
+    conditions = defaultdict(list, {
+        delta: [
+            Q(kind=kind, value__in=kind_values)
+            for kind, kind_values in kinds.items()
+        ]
+        for delta, kinds in values.items()
+    })
+    conditions[-1].extend(removed)
+    for delta, delta_conditions in conditions.items():
+        if delta_conditions:
+            RecipeStatCount.objects.filter(user_id=user_id).filter(
+                reduce(or_, delta_conditions)
+            ).update(count=F('count') + delta)
+
+
+def compute(user_id):
+    # the statistics from scratch: (summary, counts)
+    recipes = Recipe.objects.filter(user_id=user_id)
+    totals = recipes.aggregate(
+        recipe_count=Count('id'),
+        price_total=Sum('price'),
+        time_total=Sum('time_min'),
+    )
+    summary = {
+        'recipe_count': totals['recipe_count'],
+        'price_total': Decimal(totals['price_total'] or 0).quantize(
+            Decimal('0.01')
+        ),
+        'time_total': totals['time_total'] or 0,
+    }
+    counts = Counter()
+    for field, kind in [('price', PRICE), ('time_min', TIME)]:
+        for value, count in recipes.values_list(field).annotate(
+            count=Count('id')
+        ).order_by():
+            key = (kind, cents(value) if kind == PRICE else value)
+            counts[key] += count
+    for relation, (kind, _, column) in RELATIONS.items():
+        through = getattr(Recipe, relation).through
+        for value, count in through.objects.filter(
+            recipe__user_id=user_id
+        ).values_list(column).annotate(count=Count('id')).order_by():
+            counts[(kind, value)] = count
+    return summary, counts
+
+
+def stored_summary(user_id):
+    return RecipeStats.objects.filter(user_id=user_id).values(
+        'recipe_count', 'price_total', 'time_total'
+    ).first() or {
+        'recipe_count': 0, 'price_total': Decimal('0.00'), 'time_total': 0
+    }
+
+
+def stored_counts(user_id):
+    return Counter({
+        (kind, value): count
+        for kind, value, count in RecipeStatCount.objects.filter(
+            user_id=user_id, count__gt=0
+        ).values_list('kind', 'value', 'count')
+    })
+
+
+@transaction.atomic
+def rebuild(user_id):
+    summary, counts = compute(user_id)
+    RecipeStats.objects.update_or_create(user_id=user_id, defaults=summary)
+    RecipeStatCount.objects.filter(user_id=user_id).delete()
+    RecipeStatCount.objects.bulk_create([
+        RecipeStatCount(user_id=user_id, kind=kind, value=value, count=count)
+        for (kind, value), count in counts.items()
+    ], batch_size=1000)
+
+
+def check(user_id):
+    # differences between the stored and the computed statistics, as
+    # (key, stored, expected) tuples
+    summary, counts = compute(user_id)
+    row = stored_summary(user_id)
+    stored = stored_counts(user_id)
+    problems = [
+        (field, row[field], summary[field])
+        for field in summary if row[field] != summary[field]
+    ]
+    for key in sorted(set(counts) | set(stored)):
+        if counts[key] != stored[key]:
+            problems.append((key, stored[key], counts[key]))
+    return problems
+
+
+def histogram(time_counts):
+    # recipes per time_min bucket, each bound inclusive, the last bucket
+    # open ended
+    bounds = settings.RECIPE_STATS_TIME_BUCKETS
+    buckets = [0] * (len(bounds) + 1)
+    for value, count in time_counts:
+        buckets[bisect_left(bounds, value)] += count
+    return [
+        {'le': bound, 'count': count}
+        for bound, count in zip(list(bounds) + [None], buckets)
+    ]
+
+
+def most_used(user_id, relation):
+    kind, model, _ = RELATIONS[relation]
+    top = list(
+        RecipeStatCount.objects.filter(
+            user_id=user_id, kind=kind, count__gt=0
+        ).order_by('-count', 'value').values_list('value', 'count')
+        [:settings.RECIPE_STATS_TOP]
+    )
+    names = dict(
+        model.objects.filter(pk__in=[pk for pk, _ in top])
+        .values_list('id', 'name')
+    )
+    return [
+        {'id': pk, 'name': names[pk], 'count': count}
+        for pk, count in top if pk in names
+    ]
+
+
+def as_price(cents_value):
+    return str(Decimal(cents_value).scaleb(-2))
+
+
+def get_stats(user_id):
+    # reads one summary row plus one row per distinct price, time and
+    # (top) relation, however many recipes the user has
+    row = stored_summary(user_id)
+    count = row['recipe_count']
+    values = {PRICE: [], TIME: []}
+    for kind, value, value_count in RecipeStatCount.objects.filter(
+        user_id=user_id, kind__in=[PRICE, TIME], count__gt=0
+    ).values_list('kind', 'value', 'count'):
+        values[kind].append((value, value_count))
+    # sorted here, both kinds can't be read in value order from one index
+    prices, times = sorted(values[PRICE]), sorted(values[TIME])
+
+    return {
+        'recipe_count': count,
+        'price': {
+            'avg': str(
+                (row['price_total'] / count).quantize(Decimal('0.01'))
+            ) if count else None,
+            'min': as_price(prices[0][0]) if prices else None,
+            'max': as_price(prices[-1][0]) if prices else None,
+        },
+        'time_min': {
+            'avg': round(row['time_total'] / count, 1) if count else None,
+            'min': times[0][0] if times else None,
+            'max': times[-1][0] if times else None,
+            'histogram': histogram(times),
+        },
+        'top_tags': most_used(user_id, 'tags'),
+        'top_ingredients': most_used(user_id, 'ingrediant'),
+    }
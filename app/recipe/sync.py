@@ -0,0 +1,168 @@
+import base64
+import hashlib
+import json
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db.models import Q, Subquery
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+from django.utils.translation import gettext_lazy as _
+from rest_framework import serializers, status
+from rest_framework.exceptions import APIException
+
+from core.models import Recipe, RecipeTombstone
+
+
+def make_etag(request, *parts):
+    # the representation depends on the url (query params), the negotiated
+    # format and whatever version markers the caller passes in
+    accepted = getattr(request, 'accepted_media_type', '')
+    raw = '|'.join(
+        [str(request.user.pk), request.get_full_path(), accepted]
+        + [str(part) for part in parts]
+    )
+    return '"%s"' % hashlib.md5(raw.encode()).hexdigest()
+
+
+def collection_last_modified(user):
+    # newest change or deletion in the user's collection, one query
+    row = type(user).objects.filter(pk=user.pk).values(
+        updated=Subquery(
+            Recipe.objects.filter(user=user)
+            .order_by('-updated_at')
+            .values('updated_at')[:1]
+        ),
+        deleted=Subquery(
+            RecipeTombstone.objects.filter(user=user)
+            .order_by('-deleted_at')
+            .values('deleted_at')[:1]
+        ),
+    ).get()
+    stamps = [stamp for stamp in row.values() if stamp is not None]
+    return max(stamps) if stamps else None
+
+
+def conditional_response(request, etag, last_modified):
+    # returns a 304/412 response if the client's copy is still valid
+    return get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=last_modified and int(last_modified.timestamp()),
+    )
+
+
+def set_validators(response, etag, last_modified):
+    patch_vary_headers(response, ('Accept', 'Authorization'))
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    return response
+
+
+class ResyncRequired(APIException):
+    # the cursor is older than the tombstones kept, deletions may be lost
+    status_code = status.HTTP_410_GONE
+    default_detail = _('Cursor expired, sync again without since.')
+    default_code = 'resync_required'
+
+
+def encode_cursor(position):
+    raw = json.dumps(position, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor):
+    # the stream positions, and when the cursor was issued (None for
+    # cursors from before that was recorded)
+    try:
+        position = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        issued = position.get('issued')
+        return {
+            key: (datetime.fromisoformat(value[0]), int(value[1]))
+            for key, value in position.items()
+            if key in ('changed', 'deleted')
+        }, issued and datetime.fromisoformat(issued)
+    except (ValueError, TypeError, AttributeError, IndexError):
+        raise serializers.ValidationError({'since': 'Invalid cursor.'})
+
+
+def tombstone_cutoff():
+    # tombstones older than this are pruned by prune_tombstones
+    return timezone.now() - timedelta(
+        days=settings.RECIPE_TOMBSTONE_RETENTION_DAYS
+    )
+
+
+def _position(stamp, pk):
+    return [stamp.isoformat(), pk]
+
+
+def _after(queryset, field, position):
+    if position is None:
+        return queryset
+    stamp, pk = position
+    return queryset.filter(
+        Q(**{f'{field}__gt': stamp}) | Q(**{field: stamp, 'pk__gt': pk})
+    )
+
+
+def settled(position, now):
+    # updated_at and deleted_at are set before the transaction commits, so
+    # a row stamped just behind the position may still become visible.
+    # The last page's cursor stays RECIPE_SYNC_OVERLAP seconds behind now
+    # and the next sync reads that window again; clients apply changes by
+    # id, so rows sent twice are harmless.
+    boundary = now - timedelta(seconds=settings.RECIPE_SYNC_OVERLAP)
+    stamp, pk = position
+    return (boundary, 0) if stamp > boundary else position
+
+
+def changes_since(user, recipes, cursor, limit):
+    # Recipes changed and deleted after `cursor`, oldest change first.
+    # `recipes` is the queryset changed rows are read from so the caller
+    # can shape it for its serializer. Both streams are read up to `limit`
+    # rows and `has_more` tells the client to call again with the returned
+    # cursor. Cursors issued before the tombstone retention raise
+    # ResyncRequired.
+    now = timezone.now()
+    position = {}
+    if cursor:
+        position, issued = decode_cursor(cursor)
+        if issued is None or issued < tombstone_cutoff():
+            raise ResyncRequired()
+
+    changed = list(
+        _after(recipes, 'updated_at', position.get('changed'))
+        .order_by('updated_at', 'pk')[:limit + 1]
+    )
+    deleted = list(
+        _after(
+            RecipeTombstone.objects.filter(user=user),
+            'deleted_at',
+            position.get('deleted')
+        ).order_by('deleted_at', 'pk')[:limit + 1]
+    )
+    has_more = len(changed) > limit or len(deleted) > limit
+    changed, deleted = changed[:limit], deleted[:limit]
+
+    if changed:
+        position['changed'] = (changed[-1].updated_at, changed[-1].pk)
+    if deleted:
+        position['deleted'] = (deleted[-1].deleted_at, deleted[-1].pk)
+    if not has_more:
+        position = {
+            key: settled(value, now) for key, value in position.items()
+        }
+    new_position = {
+        key: _position(*value) for key, value in position.items()
+    }
+    new_position['issued'] = now.isoformat()
+
+    return {
+        'changed': changed,
+        'deleted': [tombstone.recipe_id for tombstone in deleted],
+        'cursor': encode_cursor(new_position),
+        'has_more': has_more,
+    }
@@ -0,0 +1,107 @@
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.test import AsyncClient, TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+
+
+ASYNC_TAGS_URL = reverse('recipe:async-tag-list')
+ASYNC_RECIPES_URL = reverse('recipe:async-recipe-list')
+
+
+def async_detail_url(recipe_id):
+    return reverse('recipe:async-recipe-detail', args=[recipe_id])
+
+
+class AsyncRecipeApiTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='test@gmail.com',
+            password='test123'
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_same_representation_as_sync_path(self):
+        recipe = Recipe.objects.create(
+            user=self.user, title='soup', time_min=5, price=1
+        )
+        recipe.tags.add(Tag.objects.create(user=self.user, name='vegan'))
+
+        for sync_url, async_url in [
+            (reverse('recipe:recipe-list'), ASYNC_RECIPES_URL),
+            (reverse('recipe:recipe-detail', args=[recipe.id]),
+             async_detail_url(recipe.id)),
+            (reverse('recipe:tag-list'), ASYNC_TAGS_URL),
+        ]:
+            expected = self.client.get(sync_url)
+            res = self.client.get(async_url)
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertEqual(res.json(), expected.json())
+
+    def test_create(self):
+        tag = Tag.objects.create(user=self.user, name='vegan')
+
+        res = self.client.post(ASYNC_RECIPES_URL, {
+            'title': 'soup', 'time_min': 5, 'price': '1.00',
+            'tags': [tag.id], 'ingrediant': [],
+        }, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        recipe = Recipe.objects.get(id=res.json()['id'])
+        self.assertEqual(list(recipe.tags.all()), [tag])
+
+    def test_validation_errors(self):
+        res = self.client.post(ASYNC_TAGS_URL, {'name': ''}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('name', res.json())
+
+    def test_conditional_get(self):
+        recipe = Recipe.objects.create(
+            user=self.user, title='soup', time_min=5, price=1
+        )
+        res = self.client.get(async_detail_url(recipe.id))
+
+        res = self.client.get(
+            async_detail_url(recipe.id), HTTP_IF_NONE_MATCH=res['ETag']
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_method_not_allowed(self):
+        res = self.client.delete(ASYNC_RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+
+class AsyncClientTests(TestCase):
+
+    async def test_token_auth_over_asgi(self):
+        client = AsyncClient()
+
+        res = await client.get(ASYNC_TAGS_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        token = await self.create_token()
+        res = await client.get(
+            ASYNC_TAGS_URL, authorization=f'Token {token.key}'
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json()['results'], [])
+
+    @staticmethod
+    async def create_token():
+        def create():
+            user = get_user_model().objects.create_user(
+                email='test@gmail.com',
+                password='test123'
+            )
+            return Token.objects.create(user=user)
+        return await sync_to_async(create)()
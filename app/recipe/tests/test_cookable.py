@@ -0,0 +1,157 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Ingredient
+from recipe import cookable
+from recipe.cookable import CookableIndex
+
+
+COOKABLE_URL = reverse('recipe:recipe-cookable')
+
+
+class CookableIndexTests(TestCase):
+
+    def setUp(self):
+        self.index = CookableIndex(
+            [(1, 10), (1, 11), (2, 10), (2, 11), (2, 12), (3, 13)], 1
+        )
+
+    def test_rank_by_coverage(self):
+        ranked = self.index.rank([10, 11])
+
+        self.assertEqual(ranked, [(1.0, 0, 1), (2 / 3, 1, 2)])
+
+    def test_max_missing(self):
+        self.assertEqual(self.index.rank([10], max_missing=1), [(0.5, 1, 1)])
+
+    def test_incremental_updates(self):
+        self.index.add(3, [10])
+        self.index.remove(2, [12])
+        self.index.drop_ingredient(11)
+
+        self.assertEqual(
+            self.index.rank([10]), [(1.0, 0, 2), (1.0, 0, 1), (0.5, 1, 3)]
+        )
+
+
+@override_settings(LOCAL_CACHE_SINGLE_PROCESS=True)
+class CookableApiTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        cookable._indexes.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='test@gmail.com',
+            password='test123'
+        )
+        self.client.force_authenticate(self.user)
+        self.kale, self.salt, self.rice = [
+            Ingredient.objects.create(user=self.user, name=name)
+            for name in ('kale', 'salt', 'rice')
+        ]
+
+    def recipe(self, title, *ingredients):
+        recipe = Recipe.objects.create(
+            user=self.user, title=title, time_min=5, price=1
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe.ingrediant.add(*ingredients)
+        return recipe
+
+    def cookable(self, *ingredients, **params):
+        params['ingredients'] = ','.join(str(i.id) for i in ingredients)
+        return self.client.get(COOKABLE_URL, params)
+
+    def test_ranked_by_coverage(self):
+        salad = self.recipe('salad', self.kale, self.salt)
+        risotto = self.recipe('risotto', self.rice, self.salt, self.kale)
+        self.recipe('plain rice', self.rice)
+
+        res = self.cookable(self.kale, self.salt)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        results = res.data['results']
+        self.assertEqual([r['id'] for r in results], [salad.id, risotto.id])
+        self.assertEqual(results[1]['missing'], 1)
+        self.assertAlmostEqual(results[1]['coverage'], 2 / 3)
+
+    def test_max_missing(self):
+        self.recipe('salad', self.kale, self.salt)
+        self.recipe('risotto', self.rice, self.salt, self.kale)
+
+        res = self.cookable(self.kale, self.salt, max_missing=0)
+
+        self.assertEqual([r['title'] for r in res.data['results']],
+                         ['salad'])
+
+    def test_index_maintained_incrementally(self):
+        salad = self.recipe('salad', self.kale)
+        self.cookable(self.kale)
+        index = cookable.get_index(self.user.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            salad.ingrediant.add(self.salt)
+            self.rice.recipe_set.add(salad)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.kale.delete()
+
+        # updated in place, the ranking reads no through rows
+        with self.assertNumQueries(0):
+            self.assertIs(cookable.get_index(self.user.pk), index)
+        self.assertEqual(index.rank([self.salt.id]), [(0.5, 1, salad.id)])
+
+    def test_interleaved_bump_drops_index(self):
+        salad = self.recipe('salad', self.kale)
+        self.cookable(self.kale)
+        index = cookable.get_index(self.user.pk)
+
+        bump_version = cookable.bump_version
+
+        def bump_after_another_process(user_id):
+            # another process's change lands between this process reading
+            # the version and bumping it
+            bump_version(user_id)
+            return bump_version(user_id)
+
+        with patch.object(cookable, 'bump_version',
+                          bump_after_another_process):
+            with self.captureOnCommitCallbacks(execute=True):
+                salad.ingrediant.add(self.salt)
+
+        self.assertIsNot(cookable.get_index(self.user.pk), index)
+
+    def test_deleted_recipes_dropped(self):
+        salad = self.recipe('salad', self.kale)
+        self.cookable(self.kale)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            salad.delete()
+
+        self.assertEqual(self.cookable(self.kale).data['results'], [])
+
+    def test_limited_to_user(self):
+        user2 = get_user_model().objects.create_user(
+            email='test1@gmail.com',
+            password='test123'
+        )
+        recipe = Recipe.objects.create(
+            user=user2, title='salad', time_min=5, price=1
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe.ingrediant.add(self.kale)
+
+        self.assertEqual(self.cookable(self.kale).data['results'], [])
+
+    def test_invalid_params(self):
+        res = self.client.get(COOKABLE_URL, {'ingredients': 'kale'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.cookable(self.kale, max_missing=-1)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
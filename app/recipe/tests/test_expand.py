@@ -0,0 +1,79 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+class ExpandTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='test@gmail.com',
+            password='test123'
+        )
+        self.client.force_authenticate(self.user)
+
+    def sample_recipe(self, title):
+        recipe = Recipe.objects.create(
+            user=self.user, title=title, time_min=5, price=1
+        )
+        tag = Tag.objects.create(user=self.user, name=f'{title} tag')
+        ingredient = Ingredient.objects.create(
+            user=self.user, name=f'{title} ingredient'
+        )
+        recipe.tags.add(tag)
+        recipe.ingrediant.add(ingredient)
+        return recipe, tag, ingredient
+
+    def test_expand_tags_and_ingredients(self):
+        recipe, tag, ingredient = self.sample_recipe('soup')
+
+        res = self.client.get(RECIPES_URL, {'expand': 'tags,ingrediant'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        result = res.data['results'][0]
+        self.assertEqual(result['tags'], [{'id': tag.id, 'name': tag.name}])
+        self.assertEqual(
+            result['ingrediant'],
+            [{'id': ingredient.id, 'name': ingredient.name}]
+        )
+
+    def test_expand_one_relation(self):
+        recipe, tag, ingredient = self.sample_recipe('soup')
+
+        res = self.client.get(RECIPES_URL, {'expand': 'tags'})
+
+        result = res.data['results'][0]
+        self.assertEqual(result['tags'][0]['name'], tag.name)
+        self.assertEqual(result['ingrediant'], [ingredient.id])
+
+    def test_one_prefetch_per_relation(self):
+        for i in range(20):
+            self.sample_recipe(f'recipe {i}')
+
+        # the collection validator, the page and one query per relation
+        with self.assertNumQueries(4):
+            res = self.client.get(RECIPES_URL, {'expand': 'tags,ingrediant'})
+
+        self.assertEqual(len(res.data['results']), 20)
+
+    def test_expand_with_sparse_fields(self):
+        self.sample_recipe('soup')
+
+        res = self.client.get(
+            RECIPES_URL, {'expand': 'tags,ingrediant', 'fields': 'tags'}
+        )
+
+        self.assertEqual(sorted(res.data['results'][0]), ['id', 'tags'])
+
+    def test_unknown_relation(self):
+        res = self.client.get(RECIPES_URL, {'expand': 'user'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
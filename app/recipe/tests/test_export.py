@@ -0,0 +1,111 @@
+import csv
+import io
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+from recipe.exporter import export_records
+from recipe.importer import RecipeImporter
+
+
+EXPORT_URL = reverse('recipe:recipe-export')
+
+
+def sample_recipe(user, **kwargs):
+    defaults = {'title': 'sample recipe', 'time_min': 10, 'price': 5.00}
+    defaults.update(kwargs)
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class RecipeExportTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='test@gmail.com',
+            password='test123'
+        )
+        self.client.force_authenticate(self.user)
+
+    def content(self, res):
+        return b''.join(res.streaming_content).decode()
+
+    def test_export_ndjson(self):
+        recipe = sample_recipe(self.user, title='soup')
+        recipe.tags.add(Tag.objects.create(user=self.user, name='vegan'))
+        recipe.ingrediant.add(
+            Ingredient.objects.create(user=self.user, name='kale')
+        )
+
+        res = self.client.get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'application/x-ndjson')
+        records = [json.loads(line) for line in self.content(res).splitlines()]
+        self.assertEqual(records, [{
+            'id': recipe.id,
+            'title': 'soup',
+            'time_min': 10,
+            'price': '5.00',
+            'link': '',
+            'tags': ['vegan'],
+            'ingrediant': ['kale'],
+        }])
+
+    def test_export_csv(self):
+        sample_recipe(self.user, title='soup')
+        sample_recipe(self.user, title='salad')
+
+        res = self.client.get(EXPORT_URL, {'output': 'csv'})
+
+        rows = list(csv.DictReader(io.StringIO(self.content(res))))
+        self.assertEqual([row['title'] for row in rows], ['soup', 'salad'])
+        self.assertEqual(rows[0]['tags'], '')
+
+    def test_export_limited_to_user(self):
+        user2 = get_user_model().objects.create_user(
+            email='test1@gmail.com',
+            password='test123'
+        )
+        sample_recipe(user2)
+
+        res = self.client.get(EXPORT_URL)
+
+        self.assertEqual(self.content(res), '')
+
+    def test_invalid_output(self):
+        res = self.client.get(EXPORT_URL, {'output': 'xml'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_records_read_in_chunks(self):
+        for i in range(30):
+            sample_recipe(self.user, title=f'recipe {i}')
+
+        # one cursor over the recipes plus two relation lookups per chunk
+        with self.assertNumQueries(7):
+            chunks = list(export_records(self.user, chunk_size=10))
+
+        self.assertEqual([len(chunk) for chunk in chunks], [10, 10, 10])
+
+    def test_export_round_trips_through_import(self):
+        recipe = sample_recipe(self.user, title='soup', link='http://x')
+        recipe.tags.add(Tag.objects.create(user=self.user, name='vegan'))
+        user2 = get_user_model().objects.create_user(
+            email='test1@gmail.com',
+            password='test123'
+        )
+
+        lines = self.content(self.client.get(EXPORT_URL)).splitlines()
+        summary = RecipeImporter(user2).run(lines)
+
+        self.assertEqual(summary['created'], 1)
+        copy = Recipe.objects.get(user=user2)
+        self.assertEqual(copy.link, 'http://x')
+        self.assertEqual(list(copy.tags.values_list('name', flat=True)),
+                         ['vegan'])
@@ -0,0 +1,156 @@
+import random
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from core.models import Recipe, Tag, Ingredient
+from core.renderers import ORJSONRenderer
+from recipe import fastpath
+from recipe.serializers import RecipeSerializer
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+# characters the encoders are most likely to disagree on
+ALPHABET = 'ab Zé中😀"\\/\n\t\x00\x1f\x7f  '
+
+
+def random_text(rng, size):
+    return ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(0, size)))
+
+
+class FastPathPropertyTests(TestCase):
+    # The values() fast path rendered with orjson must give the same bytes
+    # as RecipeSerializer rendered with JSONRenderer, for random recipes
+    # and random combinations of ?fields= and ?expand=.
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='test@gmail.com',
+            password='test123'
+        )
+        self.request = Request(APIRequestFactory().get(RECIPES_URL))
+
+    def populate(self, rng):
+        tags = [
+            Tag.objects.create(user=self.user, name=random_text(rng, 10))
+            for _ in range(5)
+        ]
+        ingredients = [
+            Ingredient.objects.create(
+                user=self.user, name=random_text(rng, 10)
+            )
+            for _ in range(5)
+        ]
+        for _ in range(10):
+            recipe = Recipe.objects.create(
+                user=self.user,
+                title=random_text(rng, 30),
+                time_min=rng.randint(0, 10 ** 6),
+                price=Decimal(rng.randint(0, 99999)) / 100,
+                link=random_text(rng, 20),
+                thumbnails={
+                    str(rng.randint(1, 999)): {'jpeg': 'a.jpg'}
+                } if rng.random() < 0.5 else {},
+            )
+            recipe.tags.set(rng.sample(tags, rng.randint(0, 3)))
+            recipe.ingrediant.set(rng.sample(ingredients, rng.randint(0, 3)))
+
+    def render_both(self, context):
+        serializer = RecipeSerializer(context=context)
+        rows = list(
+            Recipe.objects.filter(user=self.user).order_by('-id')
+            .values(*fastpath.scalar_columns(serializer))
+        )
+        fast = ORJSONRenderer().render(fastpath.represent(serializer, rows))
+
+        recipes = Recipe.objects.filter(user=self.user).order_by('-id')
+        slow = JSONRenderer().render(
+            RecipeSerializer(recipes, many=True, context=context).data
+        )
+        return fast, slow
+
+    def test_fast_path_matches_serializer(self):
+        names = list(RecipeSerializer.Meta.fields)
+        for seed in range(20):
+            rng = random.Random(seed)
+            Recipe.objects.all().delete()
+            self.populate(rng)
+            context = {
+                'request': self.request,
+                'fields': (
+                    set(rng.sample(names, rng.randint(1, len(names))))
+                    | {'id'}
+                ) if rng.random() < 0.5 else None,
+                'expand': set(rng.sample(
+                    ['tags', 'ingrediant'], rng.randint(0, 2)
+                )),
+            }
+
+            fast, slow = self.render_both(context)
+
+            self.assertEqual(fast, slow, f'seed {seed}')
+
+
+class FastPathApiTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='test@gmail.com',
+            password='test123'
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_list_uses_fast_path(self):
+        recipe = Recipe.objects.create(
+            user=self.user, title='soup', time_min=5, price=1
+        )
+        recipe.tags.add(Tag.objects.create(user=self.user, name='vegan'))
+
+        with self.assertNumQueries(4):
+            res = self.client.get(RECIPES_URL, {'expand': 'tags'})
+
+        self.assertEqual(res['Content-Type'], 'application/json')
+        self.assertEqual(res.json()['results'], [{
+            'id': recipe.id,
+            'title': 'soup',
+            'time_min': 5,
+            'price': '1.00',
+            'tags': [{'id': recipe.tags.get().id, 'name': 'vegan'}],
+            'ingrediant': [],
+            'link': '',
+            'thumbnails': {},
+        }])
+
+    def test_indented_output_falls_back(self):
+        res = self.client.get(
+            RECIPES_URL, HTTP_ACCEPT='application/json; indent=2'
+        )
+
+        self.assertIn(b'\n  "next"', res.content)
+
+    def test_relations_in_primary_key_order(self):
+        recipe = Recipe.objects.create(
+            user=self.user, title='soup', time_min=5, price=1
+        )
+        tags = [
+            Tag.objects.create(user=self.user, name=name)
+            for name in ('vegan', 'quick', 'cheap')
+        ]
+        recipe.tags.add(*reversed(tags))
+
+        fast = self.client.get(RECIPES_URL, {'expand': 'tags'})
+        slow = self.client.get(
+            RECIPES_URL, {'expand': 'tags'},
+            HTTP_ACCEPT='application/json; indent=2'
+        )
+
+        expected = [{'id': tag.id, 'name': tag.name} for tag in tags]
+        self.assertEqual(fast.json()['results'][0]['tags'], expected)
+        self.assertEqual(slow.json()['results'][0]['tags'], expected)
@@ -0,0 +1,103 @@
+import json
+
+import msgpack
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+from core.parsers import from_columns
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+MSGPACK = 'application/msgpack'
+COLUMNAR = 'application/vnd.recipe.columnar+json'
+
+
+class ResponseFormatTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='test@gmail.com',
+            password='test123'
+        )
+        self.client.force_authenticate(self.user)
+        for i in range(3):
+            recipe = Recipe.objects.create(
+                user=self.user, title=f'recipe {i}', time_min=i, price=1
+            )
+            recipe.tags.add(Tag.objects.create(user=self.user, name=f'{i}'))
+
+    def test_msgpack_response(self):
+        expected = self.client.get(RECIPES_URL, {'expand': 'tags'}).json()
+
+        res = self.client.get(
+            RECIPES_URL, {'expand': 'tags'}, HTTP_ACCEPT=MSGPACK
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], MSGPACK)
+        self.assertEqual(msgpack.unpackb(res.content), expected)
+
+    def test_columnar_response(self):
+        expected = self.client.get(RECIPES_URL).json()
+
+        res = self.client.get(RECIPES_URL, HTTP_ACCEPT=COLUMNAR)
+
+        body = json.loads(res.content)
+        self.assertEqual(body['results']['columns'][:2], ['id', 'title'])
+        self.assertEqual(len(body['results']['rows']), 3)
+        self.assertEqual(from_columns(body['results']), expected['results'])
+
+    def test_columnar_smaller_than_json(self):
+        json_size = len(self.client.get(TAGS_URL).content)
+        columnar_size = len(
+            self.client.get(TAGS_URL, HTTP_ACCEPT=COLUMNAR).content
+        )
+
+        self.assertLess(columnar_size, json_size)
+
+
+class RequestFormatTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='test@gmail.com',
+            password='test123'
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_create_recipe_from_msgpack(self):
+        tag = Tag.objects.create(user=self.user, name='vegan')
+        body = msgpack.packb({
+            'title': 'soup', 'time_min': 5, 'price': '1.00',
+            'tags': [tag.id], 'ingrediant': [],
+        })
+
+        res = self.client.post(RECIPES_URL, body, content_type=MSGPACK)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Recipe.objects.get().tags.get(), tag)
+
+    def test_bulk_create_tags_from_columnar(self):
+        body = json.dumps(
+            {'columns': ['name'], 'rows': [['vegan'], ['quick']]}
+        )
+
+        res = self.client.post(TAGS_URL, body, content_type=COLUMNAR)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            sorted(Tag.objects.values_list('name', flat=True)),
+            ['quick', 'vegan']
+        )
+
+    def test_invalid_msgpack(self):
+        res = self.client.post(TAGS_URL, b'\xc1', content_type=MSGPACK)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
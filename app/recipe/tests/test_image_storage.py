@@ -0,0 +1,139 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from rest_framework.test import APIClient
+
+from core.models import Recipe
+
+
+def image_upload_url(recipe_id):
+    return reverse('recipe:recipe-upload-image', args=[recipe_id])
+
+
+@override_settings(RECIPE_THUMBNAIL_WORKERS=0, RECIPE_THUMBNAIL_WIDTHS=(8,),
+                   RECIPE_IMAGE_GRACE=0)
+class RecipeImageStorageTests(TestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='test@gmail.com',
+            password='test123'
+        )
+        self.client.force_authenticate(self.user)
+
+    def sample_recipe(self):
+        return Recipe.objects.create(
+            user=self.user, title='soup', time_min=5, price=1
+        )
+
+    def upload(self, recipe, color='red'):
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as ntf:
+            Image.new(mode='RGB', size=(20, 20), color=color).save(ntf)
+            ntf.seek(0)
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(
+                    image_upload_url(recipe.id),
+                    {'image': ntf},
+                    format='multipart'
+                )
+        recipe.refresh_from_db()
+        return recipe.image.name
+
+    def stored_files(self):
+        return sorted(
+            name
+            for _, _, names in os.walk(self.media_root)
+            for name in names
+        )
+
+    def test_same_image_stored_and_processed_once(self):
+        first, second = self.sample_recipe(), self.sample_recipe()
+        self.upload(first)
+
+        with self.assertNumQueries(5):
+            self.upload(second)
+
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertEqual(first.thumbnails, second.thumbnails)
+        # original plus one jpeg and maybe one webp thumbnail
+        self.assertLessEqual(len(self.stored_files()), 3)
+
+    def test_file_kept_while_referenced(self):
+        first, second = self.sample_recipe(), self.sample_recipe()
+        name = self.upload(first)
+        self.upload(second)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+
+        self.assertTrue(os.path.exists(os.path.join(self.media_root, name)))
+
+    def test_orphan_removed_on_delete(self):
+        recipe = self.sample_recipe()
+        self.upload(recipe)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(
+                reverse('recipe:recipe-detail', args=[recipe.id])
+            )
+
+        self.assertEqual(self.stored_files(), [])
+
+    def test_orphan_removed_on_replace(self):
+        recipe = self.sample_recipe()
+        old = self.upload(recipe, color='red')
+
+        new = self.upload(recipe, color='blue')
+
+        self.assertNotEqual(old, new)
+        self.assertFalse(os.path.exists(os.path.join(self.media_root, old)))
+        self.assertTrue(os.path.exists(os.path.join(self.media_root, new)))
+
+    def test_recorded_thumbnails_removed_after_widths_change(self):
+        recipe = self.sample_recipe()
+        self.upload(recipe)
+
+        with override_settings(RECIPE_THUMBNAIL_WIDTHS=(4,)):
+            with self.captureOnCommitCallbacks(execute=True):
+                recipe.delete()
+
+        self.assertEqual(self.stored_files(), [])
+
+    @override_settings(RECIPE_IMAGE_GRACE=3600)
+    def test_recently_saved_files_left_for_the_sweep(self):
+        recipe = self.sample_recipe()
+        name = self.upload(recipe)
+        kept = self.sample_recipe()
+        self.upload(kept, color='blue')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe.delete()
+        self.assertTrue(os.path.exists(os.path.join(self.media_root, name)))
+
+        call_command('sweep_images', stdout=StringIO())
+        self.assertTrue(os.path.exists(os.path.join(self.media_root, name)))
+        call_command('sweep_images', grace=0, stdout=StringIO())
+
+        self.assertFalse(os.path.exists(os.path.join(self.media_root, name)))
+        kept.refresh_from_db()
+        self.assertTrue(os.path.exists(kept.image.path))
+        self.assertTrue(kept.thumbnails)
+        for names in kept.thumbnails.values():
+            for thumbnail in names.values():
+                self.assertTrue(os.path.exists(
+                    os.path.join(self.media_root, thumbnail)
+                ))
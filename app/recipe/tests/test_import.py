@@ -0,0 +1,152 @@
+import json
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+from recipe.importer import RecipeImporter
+
+
+IMPORT_URL = reverse('recipe:recipe-import-recipes')
+
+
+def ndjson(*rows):
+    return '\n'.join(
+        row if isinstance(row, str) else json.dumps(row) for row in rows
+    ) + '\n'
+
+
+def sample_row(**kwargs):
+    row = {
+        'title': 'soup',
+        'time_min': 10,
+        'price': '5.00',
+        'tags': ['vegan'],
+        'ingrediant': ['kale', 'salt'],
+    }
+    row.update(kwargs)
+    return row
+
+
+class RecipeImporterTests(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='test@gmail.com',
+            password='test123'
+        )
+
+    def test_import_resolves_and_creates_names(self):
+        Tag.objects.create(user=self.user, name='vegan')
+
+        summary = RecipeImporter(self.user).run(ndjson(
+            sample_row(title='soup'),
+            sample_row(title='salad', tags=['vegan', 'quick']),
+        ).splitlines())
+
+        self.assertEqual(summary['created'], 2)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(Ingredient.objects.filter(user=self.user).count(), 2)
+        salad = Recipe.objects.get(title='salad')
+        self.assertEqual(
+            sorted(salad.tags.values_list('name', flat=True)),
+            ['quick', 'vegan']
+        )
+
+    def test_queries_per_batch_are_constant(self):
+        rows = [
+            sample_row(title=f'recipe {i}', tags=[f'tag {i}'])
+            for i in range(100)
+        ]
+
+        # name lookup + insert for tags and ingredients, the recipes, the
+        # two through tables, the savepoint pair and the recipe statistics
+        # (two relation counts, the summary, new keys and one update per
+        # distinct delta)
+        with self.assertNumQueries(15):
+            RecipeImporter(self.user, batch_size=100).run(
+                ndjson(*rows).splitlines()
+            )
+
+        self.assertEqual(Recipe.objects.count(), 100)
+        self.assertEqual(Recipe.tags.through.objects.count(), 100)
+        self.assertEqual(Recipe.ingrediant.through.objects.count(), 200)
+
+    def test_invalid_rows_reported_and_skipped(self):
+        progress = []
+
+        summary = RecipeImporter(
+            self.user, batch_size=1, progress=progress.append
+        ).run(ndjson(
+            sample_row(),
+            '{not json',
+            sample_row(price='free'),
+            '',
+            sample_row(title='second'),
+        ).splitlines())
+
+        self.assertEqual(summary['created'], 2)
+        self.assertEqual(summary['failed'], 2)
+        self.assertEqual(
+            [error['line'] for error in summary['errors']], [2, 3]
+        )
+        self.assertIn('price', summary['errors'][1]['errors'])
+        self.assertEqual(len(progress), 2)
+
+
+class RecipeImportApiTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='test@gmail.com',
+            password='test123'
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_import_endpoint(self):
+        body = ndjson(sample_row(), sample_row(title='salad'), '[]')
+
+        res = self.client.post(
+            IMPORT_URL, body, content_type='application/x-ndjson'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['created'], 2)
+        self.assertEqual(res.data['failed'], 1)
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 2)
+
+    def test_import_empty_body(self):
+        res = self.client.post(
+            IMPORT_URL, '', content_type='application/x-ndjson'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['created'], 0)
+
+
+class ImportRecipesCommandTests(TestCase):
+
+    def test_import_recipes_command(self):
+        user = get_user_model().objects.create_user(
+            email='test@gmail.com',
+            password='test123'
+        )
+        out = StringIO()
+
+        with tempfile.NamedTemporaryFile('w', suffix='.ndjson') as ntf:
+            ntf.write(ndjson(*[sample_row() for _ in range(5)]))
+            ntf.flush()
+            call_command(
+                'import_recipes', user.email, ntf.name,
+                batch_size=2, stdout=out
+            )
+
+        self.assertEqual(Recipe.objects.filter(user=user).count(), 5)
+        self.assertIn('Imported 5 recipes', out.getvalue())
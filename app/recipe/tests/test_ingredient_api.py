@@ -40,7 +40,7 @@ class PrivetIngredientApiTests(TestCase):
         serializer = IngredientSerializer(tags, many=True)
         
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_tags_limited_user(self):
         user2 = get_user_model().objects.create_user(
@@ -52,8 +52,8 @@ class PrivetIngredientApiTests(TestCase):
         res = self.client.get(INGREDIENT_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]['name'], tag.name)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['name'], tag.name)
 
     def test_create_tag_successful(self):
         payload = {
@@ -68,4 +68,28 @@ class PrivetIngredientApiTests(TestCase):
         payload = {'name' : ''}
         res = self.client.post(INGREDIENT_URL, payload)
 
-        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_create_ingredients(self):
+        payload = [{'name': f'ingredient {i}'} for i in range(50)]
+
+        with self.assertNumQueries(1):
+            res = self.client.post(INGREDIENT_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            Ingredient.objects.filter(user=self.user).count(), 50
+        )
+
+    def test_bulk_get_or_create_ingredients(self):
+        Ingredient.objects.create(user=self.user, name='Salt')
+        url = INGREDIENT_URL + '?get_or_create=1'
+        payload = [{'name': 'Salt'}, {'name': 'Kale'}]
+
+        with self.assertNumQueries(2):
+            res = self.client.post(url, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            Ingredient.objects.filter(user=self.user).count(), 2
+        )
@@ -0,0 +1,113 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core.checks import check_shared_cache
+from core.models import Tag, Ingredient, Recipe
+from recipe.caching import list_cache_key
+
+
+TAG_URL = reverse('recipe:tag-list')
+INGREDIENT_URL = reverse('recipe:ingredient-list')
+
+
+@override_settings(LOCAL_CACHE_SINGLE_PROCESS=True)
+class ListCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='test@gmail.com',
+            password='test123'
+        )
+        self.client.force_authenticate(self.user)
+
+    def names(self, url):
+        return [item['name'] for item in self.client.get(url).data['results']]
+
+    def test_repeated_list_skips_database(self):
+        Tag.objects.create(user=self.user, name='Vegan')
+        first = self.client.get(TAG_URL)
+
+        with self.assertNumQueries(0):
+            second = self.client.get(TAG_URL)
+
+        self.assertEqual(first.data, second.data)
+
+    def test_pages_cached_separately(self):
+        Tag.objects.create(user=self.user, name='Vegan')
+        Tag.objects.create(user=self.user, name='Dessert')
+
+        self.assertEqual(self.names(TAG_URL + '?page_size=1'), ['Dessert'])
+        self.assertEqual(self.names(TAG_URL), ['Dessert', 'Vegan'])
+
+    def test_create_invalidates(self):
+        self.names(TAG_URL)
+
+        self.client.post(TAG_URL, {'name': 'Vegan'})
+
+        self.assertEqual(self.names(TAG_URL), ['Vegan'])
+
+    def test_update_and_delete_invalidate(self):
+        ingredient = Ingredient.objects.create(user=self.user, name='Kale')
+        self.names(INGREDIENT_URL)
+
+        ingredient.name = 'Salt'
+        ingredient.save()
+        self.assertEqual(self.names(INGREDIENT_URL), ['Salt'])
+
+        ingredient.delete()
+        self.assertEqual(self.names(INGREDIENT_URL), [])
+
+    def test_page_cached_before_commit_invalidated(self):
+        ingredient = Ingredient.objects.create(user=self.user, name='Kale')
+        stale = self.client.get(INGREDIENT_URL).data
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ingredient.delete()
+            # a concurrent request still reading the committed rows
+            cache.set(list_cache_key(
+                Ingredient, self.user.pk, 'http://testserver' + INGREDIENT_URL
+            ), stale)
+
+        self.assertEqual(self.names(INGREDIENT_URL), [])
+
+    def test_recipe_relation_change_invalidates(self):
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        recipe = Recipe.objects.create(
+            user=self.user, title='soup', time_min=5, price=1
+        )
+        self.client.get(TAG_URL)
+
+        recipe.tags.add(tag)
+
+        with self.assertNumQueries(1):
+            self.client.get(TAG_URL)
+
+    def test_cache_is_per_user(self):
+        user2 = get_user_model().objects.create_user(
+            email='test1@gmail.com',
+            password='test123'
+        )
+        Tag.objects.create(user=user2, name='Biriyani')
+        Tag.objects.create(user=self.user, name='Vegan')
+        self.names(TAG_URL)
+
+        self.client.force_authenticate(user2)
+
+        self.assertEqual(self.names(TAG_URL), ['Biriyani'])
+
+    @override_settings(LOCAL_CACHE_SINGLE_PROCESS=False)
+    def test_process_local_cache_bypassed(self):
+        # another worker's bump would never reach this process
+        Tag.objects.create(user=self.user, name='Vegan')
+        self.client.get(TAG_URL)
+
+        with self.assertNumQueries(1):
+            self.client.get(TAG_URL)
+
+        warnings = check_shared_cache(None)
+        self.assertEqual([warning.id for warning in warnings], ['core.W001'])
@@ -0,0 +1,92 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+
+
+RECIPE_URL = reverse('recipe:recipe-list')
+TAG_URL = reverse('recipe:tag-list')
+INGREDIENT_URL = reverse('recipe:ingredient-list')
+
+
+class KeysetPaginationTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='test@gmail.com',
+            password='test123'
+        )
+        self.client.force_authenticate(self.user)
+
+    def create_recipes(self, count):
+        return Recipe.objects.bulk_create([
+            Recipe(user=self.user, title=f'recipe {i}', time_min=i, price=1)
+            for i in range(count)
+        ])
+
+    def collect_pages(self, url):
+        ids = []
+        while url:
+            res = self.client.get(url)
+            ids.extend(item['id'] for item in res.data['results'])
+            url = res.data['next']
+        return ids
+
+    def test_pages_cover_all_rows_newest_first(self):
+        recipes = self.create_recipes(25)
+
+        ids = self.collect_pages(RECIPE_URL + '?page_size=10')
+
+        self.assertEqual(ids, sorted((r.id for r in recipes), reverse=True))
+
+    def test_page_size_query_param(self):
+        self.create_recipes(3)
+
+        res = self.client.get(RECIPE_URL, {'page_size': 1})
+
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertIsNotNone(res.data['next'])
+        self.assertIsNone(res.data['previous'])
+
+    def test_no_count_or_offset_on_deep_pages(self):
+        self.create_recipes(30)
+        res = self.client.get(RECIPE_URL, {'page_size': 10})
+        next_url = self.client.get(res.data['next']).data['next']
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(next_url)
+
+        sql = ' '.join(query['sql'].upper() for query in queries)
+        self.assertNotIn('COUNT(', sql)
+        self.assertNotIn('OFFSET', sql)
+
+    def test_cursor_stable_under_concurrent_inserts(self):
+        recipes = self.create_recipes(10)
+        res = self.client.get(RECIPE_URL, {'page_size': 5})
+        first_page = [item['id'] for item in res.data['results']]
+
+        self.create_recipes(3)
+        second = self.client.get(res.data['next'])
+        second_page = [item['id'] for item in second.data['results']]
+
+        expected = sorted((r.id for r in recipes), reverse=True)
+        self.assertEqual(first_page + second_page, expected)
+
+    def test_tags_and_ingredients_paginated(self):
+        Tag.objects.bulk_create([
+            Tag(user=self.user, name=f'tag {i}') for i in range(3)
+        ])
+        Ingredient.objects.bulk_create([
+            Ingredient(user=self.user, name=f'ingredient {i}')
+            for i in range(3)
+        ])
+
+        self.assertEqual(len(self.collect_pages(TAG_URL + '?page_size=2')), 3)
+        self.assertEqual(
+            len(self.collect_pages(INGREDIENT_URL + '?page_size=2')), 3
+        )
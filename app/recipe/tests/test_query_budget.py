@@ -0,0 +1,122 @@
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from core.models import Recipe, Tag, Ingredient
+
+
+RECIPE_URL = reverse('recipe:recipe-list')
+
+# maximum number of queries each /api/recipe/ endpoint may issue, no
+# matter how many rows the user owns
+QUERY_BUDGET = {
+    'list': 4,
+    'retrieve': 3,
+    'create': 20,
+    'partial_update': 12,
+    'destroy': 7,
+}
+
+
+def detail_url(recipe_id):
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+def seed_recipes(user, count, tags_per_recipe=3, ingredients_per_recipe=5):
+    tags = Tag.objects.bulk_create([
+        Tag(user=user, name=f'tag {i}') for i in range(tags_per_recipe)
+    ])
+    ingredients = Ingredient.objects.bulk_create([
+        Ingredient(user=user, name=f'ingredient {i}')
+        for i in range(ingredients_per_recipe)
+    ])
+    recipes = Recipe.objects.bulk_create([
+        Recipe(user=user, title=f'recipe {i}', time_min=i, price=5.00)
+        for i in range(count)
+    ])
+    Recipe.tags.through.objects.bulk_create([
+        Recipe.tags.through(recipe_id=recipe.id, tag_id=tag.id)
+        for recipe in recipes for tag in tags
+    ])
+    Recipe.ingrediant.through.objects.bulk_create([
+        Recipe.ingrediant.through(
+            recipe_id=recipe.id, ingredient_id=ingredient.id
+        )
+        for recipe in recipes for ingredient in ingredients
+    ])
+    return recipes, tags, ingredients
+
+
+class RecipeQueryBudgetTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='test@gmail.com',
+            password='test123'
+        )
+        self.client.force_authenticate(self.user)
+
+    def assert_within_budget(self, action, request):
+        # run the same request against a small and a large dataset
+        for count in (5, 200):
+            Recipe.objects.filter(user=self.user).delete()
+            recipes, tags, ingredients = seed_recipes(self.user, count)
+            with self.assertNumQueries(QUERY_BUDGET[action]):
+                res = request(recipes, tags, ingredients)
+            self.assertLess(res.status_code, 300)
+
+    def test_list_budget(self):
+        self.assert_within_budget(
+            'list', lambda *args: self.client.get(RECIPE_URL)
+        )
+
+    def test_retrieve_budget(self):
+        self.assert_within_budget(
+            'retrieve',
+            lambda recipes, *args: self.client.get(detail_url(recipes[0].id))
+        )
+
+    def test_create_budget(self):
+        def create(recipes, tags, ingredients):
+            payload = {
+                'title': 'new recipe',
+                'time_min': 10,
+                'price': 5.00,
+                'tags': [tag.id for tag in tags],
+                'ingrediant': [ingredient.id for ingredient in ingredients],
+            }
+            return self.client.post(RECIPE_URL, payload)
+        self.assert_within_budget('create', create)
+
+    def test_partial_update_budget(self):
+        def update(recipes, tags, ingredients):
+            payload = {'title': 'renamed', 'tags': [tags[0].id]}
+            return self.client.patch(detail_url(recipes[0].id), payload)
+        self.assert_within_budget('partial_update', update)
+
+    def test_destroy_budget(self):
+        self.assert_within_budget(
+            'destroy',
+            lambda recipes, *args: self.client.delete(
+                detail_url(recipes[0].id)
+            )
+        )
+
+    def test_create_validates_related_ids_in_one_query(self):
+        tags = Tag.objects.bulk_create([
+            Tag(user=self.user, name=f'tag {i}') for i in range(20)
+        ])
+        payload = {
+            'title': 'new recipe',
+            'time_min': 10,
+            'price': 5.00,
+            'tags': [tag.id for tag in tags] + [0],
+        }
+        with self.assertNumQueries(1):
+            res = self.client.post(RECIPE_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('tags', res.data)
@@ -0,0 +1,234 @@
+import json
+import re
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+from recipe import stats
+
+
+# tables that must never be read with a full scan to answer a request
+GUARDED_TABLES = {
+    'core_tag',
+    'core_ingredient',
+    'core_recipe',
+    'core_recipe_tags',
+    'core_recipe_ingrediant',
+    'core_recipetombstone',
+    'core_recipestats',
+    'core_recipestatcount',
+}
+
+USERS = 20
+RECIPES_PER_USER = 250
+TAGS_PER_USER = 30
+INGREDIENTS_PER_USER = 60
+
+
+def seed(users):
+    # every user gets the same shape of data, so the requesting user's
+    # rows are a small share of each table like in production
+    for user in users:
+        tags = Tag.objects.bulk_create([
+            Tag(user=user, name=f'tag {i}') for i in range(TAGS_PER_USER)
+        ])
+        ingredients = Ingredient.objects.bulk_create([
+            Ingredient(user=user, name=f'ingredient {i}')
+            for i in range(INGREDIENTS_PER_USER)
+        ])
+        recipes = Recipe.objects.bulk_create([
+            Recipe(
+                user=user, title=f'recipe {i}', time_min=i % 120,
+                price=(i % 50) + 0.5
+            )
+            for i in range(RECIPES_PER_USER)
+        ])
+        Recipe.tags.through.objects.bulk_create([
+            Recipe.tags.through(
+                recipe_id=recipe.id, tag_id=tags[(i + j) % len(tags)].id
+            )
+            for i, recipe in enumerate(recipes) for j in range(3)
+        ])
+        Recipe.ingrediant.through.objects.bulk_create([
+            Recipe.ingrediant.through(
+                recipe_id=recipe.id,
+                ingredient_id=ingredients[(i + j) % len(ingredients)].id
+            )
+            for i, recipe in enumerate(recipes) for j in range(5)
+        ])
+        stats.rebuild(user.pk)
+
+
+def postgres_problems(cursor, sql):
+    # The fixture's tables are small enough that the planner would pick a
+    # Seq Scan or a Sort for some of them whatever the indexes, so both
+    # are priced out first: one that still shows up has no index to use
+    # instead.
+    cursor.execute('SET LOCAL enable_seqscan = off')
+    cursor.execute('SET LOCAL enable_sort = off')
+    try:
+        cursor.execute('EXPLAIN (FORMAT JSON) ' + sql)
+        plan = cursor.fetchone()[0]
+    finally:
+        cursor.execute('RESET enable_seqscan')
+        cursor.execute('RESET enable_sort')
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    problems, nodes = [], [plan[0]['Plan']]
+    while nodes:
+        node = nodes.pop()
+        nodes.extend(node.get('Plans', []))
+        table = node.get('Relation Name')
+        if node['Node Type'] == 'Seq Scan' and table in GUARDED_TABLES:
+            problems.append(f'full scan of {table}')
+        elif node['Node Type'] == 'Sort':
+            problems.append('sort')
+    return problems
+
+
+def sqlite_problems(cursor, sql):
+    # "SCAN table" is a full table or index scan, "SEARCH table" a lookup
+    # on an index; subqueries are named by their alias
+    cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+    aliases = dict(
+        (alias, table) for table, alias in
+        re.findall(r'(?:FROM|JOIN) "(\w+)" ([UT]\d+)\b', sql)
+    )
+    problems = []
+    for row in cursor.fetchall():
+        detail = row[-1]
+        match = re.match(r'SCAN (\w+)', detail)
+        table = match and aliases.get(match.group(1), match.group(1))
+        if table in GUARDED_TABLES:
+            problems.append(f'full scan of {table}')
+        elif detail.startswith('USE TEMP B-TREE FOR ORDER BY'):
+            problems.append('sort')
+    return problems
+
+
+def plan_problems(sql):
+    # Full scans of the core tables, and ORDER BYs no index could serve.
+    # Either one makes a request slower the more rows there are, the
+    # requesting user's or anyone else's.
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            return postgres_problems(cursor, sql)
+        return sqlite_problems(cursor, sql)
+
+
+class QueryPlanTests(TestCase):
+    # Runs each API request against a seeded database and fails when the
+    # plan of any of its queries has a problem, see plan_problems()
+
+    @classmethod
+    def setUpTestData(cls):
+        users = [
+            get_user_model().objects.create_user(
+                email=f'user{i}@gmail.com', password='test123'
+            )
+            for i in range(USERS)
+        ]
+        seed(users)
+        cls.user = users[USERS // 2]
+        cls.recipe = Recipe.objects.filter(user=cls.user).first()
+        cls.tag = Tag.objects.filter(user=cls.user).first()
+        cls.ingredient = Ingredient.objects.filter(user=cls.user).first()
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def assert_indexed(self, method, url, data=None, sorts=False,
+                       **kwargs):
+        with CaptureQueriesContext(connection) as queries:
+            res = getattr(self.client, method)(url, data, **kwargs)
+            if res.streaming:
+                b''.join(res.streaming_content)
+        self.assertLess(res.status_code, 400)
+
+        selects = [
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith('SELECT')
+        ]
+        self.assertTrue(selects)
+        for sql in selects:
+            problems = plan_problems(sql)
+            if sorts:
+                problems = [p for p in problems if p != 'sort']
+            self.assertEqual(problems, [], sql)
+
+    def test_recipe_list(self):
+        url = reverse('recipe:recipe-list')
+        self.assert_indexed('get', url)
+        self.assert_indexed('get', url, {'fields': 'id,title'})
+        self.assert_indexed('get', url, {'expand': 'tags,ingrediant'})
+        # ranked by relevance, the matches have to be sorted
+        self.assert_indexed('get', url, {'q': 'recipe 12'}, sorts=True)
+
+    def test_recipe_list_next_page(self):
+        url = reverse('recipe:recipe-list')
+        next_url = self.client.get(url, {'page_size': 20}).data['next']
+
+        self.assert_indexed('get', next_url)
+
+    def test_recipe_detail(self):
+        url = reverse('recipe:recipe-detail', args=[self.recipe.id])
+
+        self.assert_indexed('get', url)
+        self.assert_indexed('patch', url, {'title': 'renamed'})
+        self.assert_indexed('delete', url)
+
+    def test_recipe_create(self):
+        self.assert_indexed('post', reverse('recipe:recipe-list'), {
+            'title': 'soup', 'time_min': 5, 'price': '2.00',
+            'tags': [self.tag.id], 'ingrediant': [self.ingredient.id],
+        }, format='json')
+
+    def test_recipe_actions(self):
+        self.assert_indexed('get', reverse('recipe:recipe-changes'))
+        self.assert_indexed('get', reverse('recipe:recipe-stats'))
+        self.assert_indexed('get', reverse('recipe:recipe-cookable'), {
+            'ingredients': str(self.ingredient.id)
+        })
+        self.assert_indexed('get', reverse('recipe:recipe-export'))
+
+    def test_tag_and_ingredient_lists(self):
+        self.assert_indexed('get', reverse('recipe:tag-list'))
+        self.assert_indexed('get', reverse('recipe:ingredient-list'))
+        self.assert_indexed(
+            'post', reverse('recipe:tag-list') + '?get_or_create=1',
+            [{'name': 'tag 3'}, {'name': 'brand new'}], format='json'
+        )
+
+    def test_relation_changes(self):
+        self.assert_indexed(
+            'delete', reverse('recipe:recipe-detail', args=[self.recipe.id])
+        )
+        with CaptureQueriesContext(connection) as queries:
+            self.tag.recipe_set.clear()
+            self.ingredient.delete()
+        for query in queries.captured_queries:
+            if query['sql'].startswith(('SELECT', 'UPDATE', 'DELETE')):
+                self.assertEqual(
+                    plan_problems(query['sql']), [], query['sql']
+                )
+
+    def test_detects_full_scan(self):
+        # link isn't indexed
+        self.assertEqual(
+            plan_problems("SELECT id FROM core_recipe WHERE link = 'x'"),
+            ['full scan of core_recipe']
+        )
+        self.assertEqual(
+            plan_problems(
+                'SELECT id FROM core_recipe WHERE user_id = 1 ORDER BY link'
+            ),
+            ['sort']
+        )
@@ -0,0 +1,108 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+from recipe.search import InvertedIndex, trigrams
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+
+
+def sample_recipe(user, **kwargs):
+    defaults = {'title': 'sample recipe', 'time_min': 10, 'price': 5.00}
+    defaults.update(kwargs)
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class InvertedIndexTests(TestCase):
+
+    def test_trigrams_padded_like_pg_trgm(self):
+        self.assertEqual(trigrams('Cat'), {'  c', ' ca', 'cat', 'at '})
+
+    def test_exact_tokens_rank_first(self):
+        index = InvertedIndex([
+            (1, 'tomato soup'),
+            (2, 'tomato and basil soup'),
+            (3, 'basil pesto'),
+        ])
+
+        self.assertEqual(index.search('tomato soup')[:2], [1, 2])
+        self.assertEqual(index.search('pesto'), [3])
+
+    def test_fuzzy_match(self):
+        index = InvertedIndex([(1, 'spaghetti carbonara'), (2, 'soup')])
+
+        self.assertEqual(index.search('spagetti'), [1])
+        self.assertEqual(index.search('   '), [])
+
+
+@override_settings(LOCAL_CACHE_SINGLE_PROCESS=True)
+class RecipeSearchApiTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='test@gmail.com',
+            password='test123'
+        )
+        self.client.force_authenticate(self.user)
+
+    def titles(self, res):
+        return [recipe['title'] for recipe in res.data['results']]
+
+    def test_search_recipes_ranked(self):
+        sample_recipe(self.user, title='chicken curry')
+        sample_recipe(self.user, title='thai green curry')
+        sample_recipe(self.user, title='apple pie')
+
+        res = self.client.get(RECIPES_URL, {'q': 'green curry'})
+
+        self.assertEqual(self.titles(res), ['thai green curry',
+                                            'chicken curry'])
+
+    def test_search_limited_to_user(self):
+        user2 = get_user_model().objects.create_user(
+            email='test1@gmail.com',
+            password='test123'
+        )
+        sample_recipe(user2, title='curry')
+
+        res = self.client.get(RECIPES_URL, {'q': 'curry'})
+
+        self.assertEqual(res.data['results'], [])
+
+    def test_search_sees_new_recipes(self):
+        sample_recipe(self.user, title='curry')
+        self.client.get(RECIPES_URL, {'q': 'curry'})
+        sample_recipe(self.user, title='red curry')
+
+        res = self.client.get(RECIPES_URL, {'q': 'curry'})
+
+        self.assertEqual(len(res.data['results']), 2)
+
+    def test_search_pagination(self):
+        for i in range(5):
+            sample_recipe(self.user, title=f'curry {i}')
+
+        res = self.client.get(RECIPES_URL, {'q': 'curry', 'page_size': 2})
+        self.assertEqual(len(res.data['results']), 2)
+        self.assertIsNone(res.data['previous'])
+
+        seen = self.titles(res)
+        while res.data['next']:
+            res = self.client.get(res.data['next'])
+            seen += self.titles(res)
+
+        self.assertEqual(sorted(seen), [f'curry {i}' for i in range(5)])
+
+    def test_search_tags(self):
+        Tag.objects.create(user=self.user, name='vegetarian')
+        Tag.objects.create(user=self.user, name='dessert')
+
+        res = self.client.get(TAGS_URL, {'q': 'vegitarian'})
+
+        self.assertEqual([tag['name'] for tag in res.data['results']],
+                         ['vegetarian'])
@@ -0,0 +1,83 @@
+import random
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from core.models import Recipe, Tag
+from recipe import stats
+from recipe.seeding import Distribution, seed
+
+
+class DistributionTests(TestCase):
+
+    def test_samples_stay_in_range(self):
+        rng = random.Random(0)
+        cases = {
+            '7': (7, 7),
+            'uniform:2-4': (2, 4),
+            'normal:1,5': (0, None),
+            'pareto:1.5,10,50': (10, 50),
+        }
+        for spec, (low, high) in cases.items():
+            samples = [Distribution(spec).sample(rng) for _ in range(200)]
+            self.assertGreaterEqual(min(samples), low, spec)
+            if high is not None:
+                self.assertLessEqual(max(samples), high, spec)
+
+    def test_invalid_specs(self):
+        for spec in ('', 'many', 'uniform:1', 'normal:1', 'zipf:2',
+                     'pareto:1,2,3,4'):
+            with self.assertRaises(ValueError, msg=spec):
+                Distribution(spec)
+
+
+class SeedTests(TestCase):
+
+    def test_seed_is_deterministic(self):
+        first = seed(users=2, recipes=5, email='a{}@example.com')
+        second = seed(users=2, recipes=5, email='b{}@example.com')
+
+        def rows(user_id):
+            return list(
+                Recipe.objects.filter(user_id=user_id).order_by('id')
+                .values_list('title', 'time_min', 'price')
+            )
+        self.assertEqual(rows(first[1]), rows(second[1]))
+        users = get_user_model().objects.filter(pk__in=[first[0], second[0]])
+        self.assertEqual(len({user.password for user in users}), 1)
+        self.assertTrue(users[0].check_password('password'))
+
+    def test_rows_are_linked_and_counted(self):
+        user_ids = seed(
+            users=3, recipes='uniform:0-20', tags=4,
+            tags_per_recipe=10, batch_size=10
+        )
+
+        for user_id in user_ids:
+            self.assertEqual(stats.check(user_id), [])
+        recipe = Recipe.objects.filter(user_id=user_ids[0]).first()
+        self.assertEqual(recipe.tags.count(), 4)
+        self.assertEqual(set(recipe.tags.values_list('user', flat=True)),
+                         {user_ids[0]})
+        # sequences continue after the explicit ids
+        last = Tag.objects.order_by('-id').first()
+        tag = Tag.objects.create(user_id=user_ids[0], name='after seeding')
+        self.assertGreater(tag.id, last.id)
+
+    def test_command(self):
+        out = StringIO()
+        call_command(
+            'seed_data', users=2, recipes='3', tags='2', ingredients='2',
+            stdout=out
+        )
+
+        self.assertIn('Seeded 2 users', out.getvalue())
+        self.assertEqual(
+            Recipe.objects.filter(user__email__startswith='seed').count(), 6
+        )
+        with self.assertRaises(CommandError):
+            call_command('seed_data', users=1, stdout=out)
+        with self.assertRaises(CommandError):
+            call_command('seed_data', email='fixed@example.com', stdout=out)
@@ -0,0 +1,75 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+def detail_url(recipe_id):
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+class SparseFieldsTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='test@gmail.com',
+            password='test123'
+        )
+        self.client.force_authenticate(self.user)
+        self.recipe = Recipe.objects.create(
+            user=self.user, title='soup', time_min=5, price=1
+        )
+        self.recipe.tags.add(Tag.objects.create(user=self.user, name='vegan'))
+
+    def test_list_single_narrow_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(RECIPES_URL, {'fields': 'title,price'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data['results'],
+            [{'id': self.recipe.id, 'title': 'soup', 'price': '1.00'}]
+        )
+        # the collection validator, then one query for the page
+        self.assertEqual(len(queries), 2)
+        self.assertNotIn('"image"', queries[1]['sql'])
+        self.assertNotIn('"link"', queries[1]['sql'])
+
+    def test_only_requested_relations_prefetched(self):
+        with self.assertNumQueries(3):
+            res = self.client.get(RECIPES_URL, {'fields': 'tags'})
+
+        self.assertEqual(res.data['results'][0]['tags'], [
+            self.recipe.tags.get().id
+        ])
+
+    def test_retrieve(self):
+        res = self.client.get(
+            detail_url(self.recipe.id), {'fields': 'title,tags'}
+        )
+
+        self.assertEqual(sorted(res.data), ['id', 'tags', 'title'])
+        self.assertEqual(res.data['tags'][0]['name'], 'vegan')
+
+    def test_unknown_field(self):
+        res = self.client.get(RECIPES_URL, {'fields': 'title,secret'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_writes_ignore_fields(self):
+        res = self.client.patch(
+            detail_url(self.recipe.id) + '?fields=title', {'price': '2.00'}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['price'], '2.00')
+        self.assertIn('tags', res.data)
@@ -0,0 +1,214 @@
+import random
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models.signals import pre_save
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import (
+    Recipe, RecipeStats, RecipeStatCount, RecipeTombstone, Tag, Ingredient
+)
+from recipe import stats
+from recipe.importer import RecipeImporter
+
+
+STATS_URL = reverse('recipe:recipe-stats')
+
+
+def sample_recipe(user, **kwargs):
+    defaults = {'title': 'sample recipe', 'time_min': 10, 'price': 5.00}
+    defaults.update(kwargs)
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class RecipeStatsTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='test@gmail.com',
+            password='test123'
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_stats_endpoint(self):
+        vegan = Tag.objects.create(user=self.user, name='vegan')
+        quick = Tag.objects.create(user=self.user, name='quick')
+        kale = Ingredient.objects.create(user=self.user, name='kale')
+        soup = sample_recipe(self.user, time_min=5, price=2.50)
+        salad = sample_recipe(self.user, time_min=25, price=4.00)
+        sample_recipe(self.user, time_min=200, price=10.00)
+        soup.tags.add(vegan, quick)
+        salad.tags.add(vegan)
+        salad.ingrediant.add(kale)
+
+        res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['recipe_count'], 3)
+        self.assertEqual(
+            res.data['price'], {'avg': '5.50', 'min': '2.50', 'max': '10.00'}
+        )
+        self.assertEqual(res.data['time_min']['avg'], 76.7)
+        self.assertEqual(res.data['time_min']['min'], 5)
+        self.assertEqual(res.data['time_min']['max'], 200)
+        histogram = {
+            bucket['le']: bucket['count']
+            for bucket in res.data['time_min']['histogram']
+        }
+        self.assertEqual(histogram[10], 1)
+        self.assertEqual(histogram[30], 1)
+        self.assertEqual(histogram[None], 1)
+        self.assertEqual(res.data['top_tags'], [
+            {'id': vegan.id, 'name': 'vegan', 'count': 2},
+            {'id': quick.id, 'name': 'quick', 'count': 1},
+        ])
+        self.assertEqual(res.data['top_ingredients'], [
+            {'id': kale.id, 'name': 'kale', 'count': 1},
+        ])
+
+    def test_stats_without_recipes(self):
+        res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.data['recipe_count'], 0)
+        self.assertIsNone(res.data['price']['avg'])
+        self.assertEqual(res.data['top_tags'], [])
+
+    def test_stats_read_does_not_scan_recipes(self):
+        for i in range(20):
+            sample_recipe(self.user, time_min=i)
+
+        # summary row, price and time counts, top tags and ingredients
+        with self.assertNumQueries(4):
+            stats.get_stats(self.user.pk)
+
+    def test_stats_follow_random_changes(self):
+        rng = random.Random(21)
+        tags = [
+            Tag.objects.create(user=self.user, name=f'tag {i}')
+            for i in range(4)
+        ]
+        ingredients = [
+            Ingredient.objects.create(user=self.user, name=f'ingredient {i}')
+            for i in range(4)
+        ]
+        recipes = []
+        for step in range(150):
+            choice = rng.randrange(9) if recipes else 0
+            if choice == 0:
+                recipes.append(sample_recipe(
+                    self.user,
+                    time_min=rng.randrange(100),
+                    price=rng.randrange(1000) / 100
+                ))
+            elif choice == 1:
+                recipe = Recipe.objects.only('title').get(
+                    pk=rng.choice(recipes).pk
+                )
+                recipe.price = rng.randrange(1000) / 100
+                recipe.save()
+            elif choice == 2:
+                recipe = rng.choice(recipes)
+                recipe.time_min = rng.randrange(100)
+                recipe.save()
+            elif choice == 3:
+                rng.choice(recipes).tags.add(*rng.sample(tags, 2))
+            elif choice == 4:
+                rng.choice(recipes).ingrediant.remove(
+                    *rng.sample(ingredients, 2)
+                )
+            elif choice == 5:
+                rng.choice(recipes).ingrediant.set(
+                    rng.sample(ingredients, 2)
+                )
+            elif choice == 6:
+                relation = rng.choice([tags, ingredients])
+                obj = rng.choice(relation)
+                manager = obj.recipe_set
+                sample = rng.sample(recipes, min(3, len(recipes)))
+                if rng.random() < 0.5:
+                    manager.add(*sample)
+                elif rng.random() < 0.8:
+                    manager.remove(*sample)
+                else:
+                    manager.clear()
+            elif choice == 7:
+                recipe = recipes.pop(rng.randrange(len(recipes)))
+                recipe.delete()
+            else:
+                RecipeImporter(self.user).run([
+                    '{"title": "imported", "time_min": 3, "price": "1.10",'
+                    ' "tags": ["tag 0", "new"], "ingrediant": ["salt"]}'
+                ])
+                recipes.append(Recipe.objects.latest('id'))
+            if step % 30 == 29:
+                tags.pop(0).delete()
+                tags.append(
+                    Tag.objects.create(user=self.user, name=f'tag {step}')
+                )
+
+        self.assertEqual(stats.check(self.user.pk), [])
+
+    def test_rebuild_command(self):
+        sample_recipe(self.user).tags.add(
+            Tag.objects.create(user=self.user, name='vegan')
+        )
+        RecipeStatCount.objects.filter(user=self.user).update(count=7)
+        out = StringIO()
+
+        with self.assertRaisesMessage(CommandError, '1 users drifted'):
+            call_command(
+                'rebuild_recipe_stats', '--check',
+                stdout=out, stderr=StringIO()
+            )
+        call_command('rebuild_recipe_stats', self.user.email, stdout=out)
+        call_command('rebuild_recipe_stats', '--check', stdout=out)
+
+        self.assertIn('Statistics consistent.', out.getvalue())
+        self.assertEqual(stats.check(self.user.pk), [])
+
+    def test_user_delete_skips_per_recipe_stats(self):
+        def delete_user(email, recipes):
+            user = get_user_model().objects.create_user(email, 'test123')
+            tag = Tag.objects.create(user=user, name='vegan')
+            for i in range(recipes):
+                sample_recipe(user, price=i).tags.add(tag)
+            with CaptureQueriesContext(connection) as queries:
+                user.delete()
+            return len(queries)
+
+        self.assertEqual(
+            delete_user('one@gmail.com', 1), delete_user('five@gmail.com', 5)
+        )
+        self.assertFalse(RecipeStats.objects.exclude(user=self.user).exists())
+        self.assertFalse(RecipeTombstone.objects.exists())
+
+
+class RecipeStatsLockTests(TransactionTestCase):
+
+    def test_replaced_values_read_in_the_save_transaction(self):
+        user = get_user_model().objects.create_user(
+            email='test@gmail.com',
+            password='test123'
+        )
+        recipe = sample_recipe(user)
+        atomic = []
+
+        def record(sender, **kwargs):
+            atomic.append(connection.in_atomic_block)
+
+        pre_save.connect(record, sender=Recipe)
+        try:
+            recipe.price = 7
+            recipe.save()
+        finally:
+            pre_save.disconnect(record, sender=Recipe)
+
+        self.assertEqual(atomic, [True])
+        self.assertEqual(stats.check(user.pk), [])
@@ -0,0 +1,214 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, RecipeTombstone, Tag
+from recipe.sync import encode_cursor
+
+
+RECIPE_URL = reverse('recipe:recipe-list')
+CHANGES_URL = reverse('recipe:recipe-changes')
+
+
+def detail_url(recipe_id):
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+def sample_recipe(user, **kwargs):
+    defaults = {'title': 'sample recipe', 'time_min': 10, 'price': 5.00}
+    defaults.update(kwargs)
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class ConditionalGetTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='test@gmail.com',
+            password='test123'
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_detail_not_modified(self):
+        recipe = sample_recipe(self.user)
+        res = self.client.get(detail_url(recipe.id))
+        self.assertIn('Last-Modified', res)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(
+                detail_url(recipe.id), HTTP_IF_NONE_MATCH=res['ETag']
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_detail_etag_changes_with_tags(self):
+        recipe = sample_recipe(self.user)
+        etag = self.client.get(detail_url(recipe.id))['ETag']
+
+        recipe.tags.add(Tag.objects.create(user=self.user, name='Vegan'))
+        res = self.client.get(detail_url(recipe.id), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+
+    def test_detail_etag_changes_with_tag_rename(self):
+        recipe = sample_recipe(self.user)
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        recipe.tags.add(tag)
+        etag = self.client.get(detail_url(recipe.id))['ETag']
+
+        tag.name = 'Vegetarian'
+        tag.save()
+        res = self.client.get(detail_url(recipe.id), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_list_not_modified_until_change(self):
+        sample_recipe(self.user)
+        etag = self.client.get(RECIPE_URL)['ETag']
+
+        res = self.client.get(RECIPE_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        sample_recipe(self.user, title='another')
+        res = self.client.get(RECIPE_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_list_etag_changes_on_delete(self):
+        recipe = sample_recipe(self.user)
+        sample_recipe(self.user)
+        etag = self.client.get(RECIPE_URL)['ETag']
+
+        recipe.delete()
+        res = self.client.get(RECIPE_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_list_etag_depends_on_query(self):
+        sample_recipe(self.user)
+
+        first = self.client.get(RECIPE_URL)['ETag']
+        second = self.client.get(RECIPE_URL, {'page_size': 1})['ETag']
+
+        self.assertNotEqual(first, second)
+
+
+# no overlap, so each cursor picks up exactly where the last page ended
+@override_settings(RECIPE_SYNC_OVERLAP=0)
+class DeltaSyncTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='test@gmail.com',
+            password='test123'
+        )
+        self.client.force_authenticate(self.user)
+
+    def sync(self, cursor=None, **params):
+        if cursor:
+            params['since'] = cursor
+        return self.client.get(CHANGES_URL, params).data
+
+    def test_initial_sync_returns_everything(self):
+        recipes = [sample_recipe(self.user) for _ in range(3)]
+
+        data = self.sync()
+
+        self.assertEqual(
+            [item['id'] for item in data['changed']], [r.id for r in recipes]
+        )
+        self.assertEqual(data['deleted'], [])
+        self.assertFalse(data['has_more'])
+
+    def test_delta_contains_only_changes_and_tombstones(self):
+        kept = sample_recipe(self.user)
+        updated = sample_recipe(self.user)
+        deleted = sample_recipe(self.user)
+        cursor = self.sync()['cursor']
+
+        updated.title = 'renamed'
+        updated.save()
+        deleted_id = deleted.id
+        deleted.delete()
+        created = sample_recipe(self.user)
+        data = self.sync(cursor)
+
+        changed = [item['id'] for item in data['changed']]
+        self.assertEqual(changed, [updated.id, created.id])
+        self.assertNotIn(kept.id, changed)
+        self.assertEqual(data['deleted'], [deleted_id])
+
+        data = self.sync(data['cursor'])
+        self.assertEqual(data['changed'], [])
+        self.assertEqual(data['deleted'], [])
+
+    def test_sync_pages_through_changes(self):
+        recipes = [sample_recipe(self.user) for _ in range(5)]
+
+        seen = []
+        data = {'cursor': None, 'has_more': True}
+        while data['has_more']:
+            data = self.sync(data['cursor'], page_size=2)
+            seen.extend(item['id'] for item in data['changed'])
+
+        self.assertEqual(seen, [r.id for r in recipes])
+
+    def test_invalid_cursor(self):
+        res = self.client.get(CHANGES_URL, {'since': 'not-a-cursor'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_deleting_user_removes_tombstones(self):
+        sample_recipe(self.user)
+
+        self.user.delete()
+
+        self.assertFalse(RecipeTombstone.objects.exists())
+
+    @override_settings(RECIPE_SYNC_OVERLAP=60)
+    def test_late_commit_reported(self):
+        seen = sample_recipe(self.user)
+        cursor = self.sync()['cursor']
+        # stamped before the cursor was issued, committed after it
+        late = sample_recipe(self.user)
+        Recipe.objects.filter(pk=late.pk).update(
+            updated_at=timezone.now() - timedelta(seconds=5)
+        )
+
+        data = self.sync(cursor)
+
+        # the overlap also sends the already seen recipe again
+        self.assertEqual(
+            [item['id'] for item in data['changed']], [late.id, seen.id]
+        )
+
+    def test_expired_cursor_needs_resync(self):
+        issued = timezone.now() - timedelta(days=31)
+        old = encode_cursor({'issued': issued.isoformat()})
+
+        for cursor in (old, encode_cursor({})):
+            res = self.client.get(CHANGES_URL, {'since': cursor})
+
+            self.assertEqual(res.status_code, status.HTTP_410_GONE)
+            self.assertEqual(res.data['detail'].code, 'resync_required')
+
+    def test_prune_tombstones(self):
+        sample_recipe(self.user).delete()
+        sample_recipe(self.user).delete()
+        RecipeTombstone.objects.filter(
+            pk=RecipeTombstone.objects.first().pk
+        ).update(deleted_at=timezone.now() - timedelta(days=31))
+
+        call_command('prune_tombstones', stdout=StringIO())
+
+        self.assertEqual(RecipeTombstone.objects.count(), 1)
@@ -38,7 +38,7 @@ class PrivetApiTests(TestCase):
         serializer = TagSerializer(tags, many=True)
         
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_tags_limited_user(self):
         user2 = get_user_model().objects.create_user(
@@ -50,8 +50,8 @@ class PrivetApiTests(TestCase):
         res = self.client.get(TAG_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]['name'], tag.name)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['name'], tag.name)
 
     def test_create_tag_successful(self):
         payload = {
@@ -67,4 +67,43 @@ class PrivetApiTests(TestCase):
         res = self.client.post(TAG_URL, payload)
 
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
-        
\ No newline at end of file
+
+    def test_bulk_create_tags(self):
+        payload = [{'name': f'tag {i}'} for i in range(50)]
+
+        with self.assertNumQueries(1):
+            res = self.client.post(TAG_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data), 50)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 50)
+        self.assertTrue(all(item['id'] for item in res.data))
+
+    def test_bulk_create_tags_invalid_item(self):
+        payload = [{'name': 'Vegan'}, {'name': ''}]
+        res = self.client.post(TAG_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Tag.objects.exists())
+
+    def test_bulk_get_or_create_tags_idempotent(self):
+        existing = Tag.objects.create(user=self.user, name='Vegan')
+        url = TAG_URL + '?get_or_create=true'
+        payload = [{'name': 'Vegan'}, {'name': 'Dessert'}, {'name': 'Dessert'}]
+
+        res = self.client.post(url, payload, format='json')
+        self.assertEqual(res.data[0]['id'], existing.id)
+        self.assertEqual(res.data[1]['id'], res.data[2]['id'])
+
+        with self.assertNumQueries(1):
+            res = self.client.post(url, payload, format='json')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 2)
+
+    def test_bulk_create_invalidates_list_cache(self):
+        self.client.get(TAG_URL)
+
+        self.client.post(TAG_URL, [{'name': 'Vegan'}], format='json')
+        res = self.client.get(TAG_URL)
+
+        self.assertEqual(len(res.data['results']), 1)
@@ -0,0 +1,102 @@
+import os
+import shutil
+import tempfile
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe
+from recipe.imaging import render_thumbnails, thumbnail_formats
+
+
+def image_upload_url(recipe_id):
+    return reverse('recipe:recipe-upload-image', args=[recipe_id])
+
+
+class RenderThumbnailsTests(TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+
+    def test_renders_every_width_and_format(self):
+        Image.new('RGBA', (400, 200)).save(os.path.join(self.root, 'a.png'))
+
+        thumbnails = render_thumbnails(self.root, 'a.png', (100, 200, 800))
+
+        self.assertEqual(sorted(thumbnails), ['100', '200'])
+        for fmt, ext in thumbnail_formats():
+            name = thumbnails['100'][fmt]
+            self.assertEqual(name, f'a_w100.{ext}')
+            with Image.open(os.path.join(self.root, name)) as thumb:
+                self.assertEqual(thumb.size, (100, 50))
+
+
+@override_settings(RECIPE_THUMBNAIL_WIDTHS=(8, 16))
+class ThumbnailPipelineTests(TestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='test@gmail.com',
+            password='test123'
+        )
+        self.client.force_authenticate(self.user)
+        self.recipe = Recipe.objects.create(
+            user=self.user, title='soup', time_min=5, price=1
+        )
+
+    def upload(self):
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as ntf:
+            Image.new(mode='RGB', size=(20, 20)).save(ntf)
+            ntf.seek(0)
+            with self.captureOnCommitCallbacks(execute=True):
+                return self.client.post(
+                    image_upload_url(self.recipe.id),
+                    {'image': ntf},
+                    format='multipart'
+                )
+
+    @override_settings(RECIPE_THUMBNAIL_WORKERS=0)
+    def test_thumbnails_exposed_once_ready(self):
+        self.upload()
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(sorted(self.recipe.thumbnails), ['16', '8'])
+        res = self.client.get(
+            reverse('recipe:recipe-detail', args=[self.recipe.id])
+        )
+        url = res.data['thumbnails']['8']['jpeg']
+        self.assertTrue(url.startswith('http://testserver/'))
+        self.assertTrue(url.endswith('_w8.jpg'))
+
+    @override_settings(RECIPE_THUMBNAIL_WORKERS=2)
+    def test_upload_does_not_wait_for_thumbnails(self):
+        with patch('recipe.thumbnails.get_executor') as get_executor:
+            res = self.upload()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['thumbnails'], {})
+        submit = get_executor.return_value.submit
+        submit.assert_called_once()
+        self.assertIs(submit.call_args[0][0], render_thumbnails)
+
+    @override_settings(RECIPE_THUMBNAIL_WORKERS=0)
+    def test_new_upload_resets_thumbnails(self):
+        self.upload()
+        with patch('recipe.thumbnails.get_executor'):
+            with override_settings(RECIPE_THUMBNAIL_WORKERS=1):
+                res = self.upload()
+
+        self.assertEqual(res.data['thumbnails'], {})
@@ -0,0 +1,97 @@
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from core.models import Recipe
+from recipe.imaging import render_thumbnails
+
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawned rather than forked: the workers only need Pillow and
+            # must not inherit the server's threads or database sockets
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.RECIPE_THUMBNAIL_WORKERS,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return _executor
+
+
+def store_thumbnails(recipe_id, name, thumbnails):
+    # only applies if the recipe still has the image the thumbnails were
+    # made from; updated_at moves so ETags and delta syncs pick them up
+    Recipe.objects.filter(pk=recipe_id, image=name).update(
+        thumbnails=thumbnails,
+        updated_at=timezone.now()
+    )
+
+
+def _on_done(recipe_id, name, future):
+    # runs on the executor's callback thread, which has its own connection
+    try:
+        store_thumbnails(recipe_id, name, future.result())
+    except Exception:
+        logger.exception('Thumbnail generation failed for %s', name)
+    finally:
+        connection.close()
+
+
+def enqueue_thumbnails(recipe):
+    # Schedule derivative generation for the recipe's current image and
+    # return immediately. With RECIPE_THUMBNAIL_WORKERS = 0 the work is
+    # done inline instead, which is what the tests use.
+    name = recipe.image.name
+    # images are content addressed, so another recipe with the same file
+    # may already have its thumbnails
+    existing = (
+        Recipe.objects.filter(image=name)
+        .exclude(pk=recipe.pk)
+        .exclude(thumbnails={})
+        .values_list('thumbnails', flat=True)
+        .first()
+    )
+    if existing:
+        store_thumbnails(recipe.pk, name, existing)
+        return
+
+    args = (settings.MEDIA_ROOT, name, settings.RECIPE_THUMBNAIL_WIDTHS)
+    if not settings.RECIPE_THUMBNAIL_WORKERS:
+        store_thumbnails(recipe.pk, name, render_thumbnails(*args))
+        return
+    future = get_executor().submit(render_thumbnails, *args)
+    future.add_done_callback(partial(_on_done, recipe.pk, name))
+
+
+def thumbnail_names(thumbnails):
+    # the files recorded in a recipe's thumbnails
+    return [
+        name for formats in (thumbnails or {}).values()
+        for name in formats.values()
+    ]
+
+
+def release_image(name, thumbnails=None):
+    # Delete an image and the thumbnails recorded for it once no recipe
+    # references it. Called after commit, so the reference count reflects
+    # committed rows. An upload of the same content that is still in
+    # flight has touched the file, so files saved within the last
+    # RECIPE_IMAGE_GRACE seconds are kept and left to sweep_images.
+    if not name or Recipe.objects.filter(image=name).exists():
+        return
+    storage = Recipe._meta.get_field('image').storage
+    for stored in [name, *thumbnail_names(thumbnails)]:
+        storage.delete_stale(stored, settings.RECIPE_IMAGE_GRACE)
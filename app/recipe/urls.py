@@ -2,6 +2,7 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from recipe.views import RecipeViewSet
 from recipe import views    
+from recipe import async_views
 
 router = DefaultRouter()
 router.register('tags', views.TagViewSet)
@@ -13,5 +14,11 @@ app_name = 'recipe'
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('async/tags/', async_views.tag_list, name='async-tag-list'),
+    path('async/ingredient/', async_views.ingredient_list,
+         name='async-ingredient-list'),
+    path('async/recipe/', async_views.recipe_list, name='async-recipe-list'),
+    path('async/recipe/<int:pk>/', async_views.recipe_detail,
+         name='async-recipe-detail'),
 ]
 
@@ -1,61 +1,296 @@
+from functools import partial
 from rest_framework import viewsets, mixins, status
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
+from django.db.models import Prefetch, prefetch_related_objects
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from core.authentication import CachedTokenAuthentication
 from core.models import Tag, Ingredient, Recipe
+from core.timing import timed
+from . import cookable
+from . import fastpath
 from . import serializers
+from . import search
+from . import stats
+from . import sync
+from .caching import CachedListMixin
+from .exporter import EXPORT_FORMATS, export_records
+from .importer import RecipeImporter
+from .pagination import SearchPagination
+from .thumbnails import enqueue_thumbnails
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 
-class TagViewSet(viewsets.GenericViewSet, 
-                 mixins.ListModelMixin,
-                 mixins.CreateModelMixin):
-    authentication_classes = (TokenAuthentication, )
+class SearchMixin:
+    # ?q= turns the list action into a ranked search over `search_field`
+    search_field = 'name'
+
+    def list(self, request, *args, **kwargs):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return super().list(request, *args, **kwargs)
+
+        results = search.search(
+            self.get_queryset(), self.search_field, query, request.user
+        )
+        paginator = SearchPagination()
+        page = paginator.paginate_queryset(results, request, view=self)
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+
+class BaseRecipeAttrViewSet(CachedListMixin,
+                            SearchMixin,
+                            viewsets.GenericViewSet,
+                            mixins.ListModelMixin,
+                            mixins.CreateModelMixin):
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
-    queryset = Tag.objects.all()
-    serializer_class = serializers.TagSerializer
 
     def get_queryset(self):
         return self.queryset.filter(user=self.request.user)
 
+    def get_serializer(self, *args, **kwargs):
+        # a list payload creates every item in one batch
+        if isinstance(kwargs.get('data'), list):
+            kwargs['many'] = True
+        return super().get_serializer(*args, **kwargs)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['get_or_create'] = self.request.query_params.get(
+            'get_or_create', ''
+        ).lower() in ('1', 'true')
+        return context
+
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
 
-class IngredientViewSet(viewsets.GenericViewSet, 
-                        mixins.ListModelMixin,
-                        mixins.CreateModelMixin):
-    authentication_classes = (TokenAuthentication, )
-    permission_classes = (IsAuthenticated,)
+class TagViewSet(BaseRecipeAttrViewSet):
+    queryset = Tag.objects.all()
+    serializer_class = serializers.TagSerializer
+
+
+class IngredientViewSet(BaseRecipeAttrViewSet):
     queryset = Ingredient.objects.all()
     serializer_class = serializers.IngredientSerializer
 
-    def get_queryset(self):
-        return self.queryset.filter(user=self.request.user)
 
-    def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+RELATIONS = {'tags': Tag, 'ingrediant': Ingredient}
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
-    authentication_classes = (TokenAuthentication,)
+class RecipeViewSet(SearchMixin, viewsets.ModelViewSet):
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
     queryset = Recipe.objects.all()
+    search_field = 'title'
 
     def get_queryset(self):
-        return self.queryset.filter(user=self.request.user)
+        # shape the query for the serializer each action uses, so the
+        # number of queries stays constant no matter how many recipes,
+        # tags or ingredients the user has
+        queryset = self.queryset.filter(user=self.request.user)
+        if self.action == 'upload_image':
+            return queryset.only(
+                'id', 'user', 'image', 'thumbnails', 'updated_at'
+            )
+        if self.action == 'destroy':
+            return queryset
+
+        fields = self.get_sparse_fields()
+        if fields is not None:
+            columns = [name for name in fields if name not in RELATIONS]
+            if self.action in ('retrieve', 'changes'):
+                # validators and sync cursors are built from it
+                columns.append('updated_at')
+            queryset = queryset.only('id', *columns)
+        if self.action == 'retrieve':
+            # relations are prefetched by retrieve once the conditional
+            # check has passed
+            return queryset
+        # RecipeSerializer only renders the related primary keys, unless
+        # the relation is expanded; recipe.fastpath reads the same columns
+        # in the same order
+        expand = self.get_expand()
+        expandable = serializers.RecipeSerializer.expandable
+        return queryset.prefetch_related(*[
+            Prefetch(name, queryset=RELATIONS[name].objects.only(
+                *(expandable[name].Meta.fields if name in expand else ('id',))
+            ).order_by('recipe', 'id'))
+            for name in self.get_relations()
+        ])
+
+    def get_sparse_fields(self):
+        # ?fields=title,price on reads, None when every field is wanted.
+        # The id is always included.
+        param = self.request.query_params.get('fields')
+        if self.request.method != 'GET' or not param:
+            return None
+        fields = {name.strip() for name in param.split(',') if name.strip()}
+        fields.add('id')
+        unknown = fields - set(self.get_serializer_class().Meta.fields)
+        if unknown:
+            raise ValidationError(
+                {'fields': f'Unknown fields: {", ".join(sorted(unknown))}.'}
+            )
+        return fields
+
+    def get_expand(self):
+        # ?expand=tags,ingrediant on reads embeds those relations
+        param = self.request.query_params.get('expand')
+        if self.request.method != 'GET' or not param:
+            return set()
+        expand = {name.strip() for name in param.split(',') if name.strip()}
+        unknown = expand - set(RELATIONS)
+        if unknown:
+            raise ValidationError(
+                {'expand': f'Cannot expand: {", ".join(sorted(unknown))}.'}
+            )
+        return expand
+
+    def get_relations(self):
+        # the many to many fields the response needs
+        fields = self.get_sparse_fields()
+        return [name for name in RELATIONS if fields is None or name in fields]
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['fields'] = self.get_sparse_fields()
+        context['expand'] = self.get_expand()
+        return context
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
+    def list(self, request, *args, **kwargs):
+        last_modified = sync.collection_last_modified(request.user)
+        etag = sync.make_etag(request, last_modified)
+        response = sync.conditional_response(request, etag, last_modified)
+        if response is None:
+            if request.query_params.get('q', '').strip():
+                response = super().list(request, *args, **kwargs)
+            else:
+                response = self.list_values(request)
+        return sync.set_validators(response, etag, last_modified)
+
+    def list_values(self, request):
+        # ListModelMixin.list() without model instances, see recipe.fastpath.
+        # The relations are read by fastpath instead of the prefetches.
+        serializer = self.get_serializer()
+        queryset = self.filter_queryset(self.get_queryset()).prefetch_related(
+            None
+        ).values(*fastpath.scalar_columns(serializer))
+        page = self.paginate_queryset(queryset)
+        with timed('serialize'):
+            data = fastpath.represent(serializer, page)
+        return self.get_paginated_response(data)
+
+    def retrieve(self, request, *args, **kwargs):
+        recipe = self.get_object()
+        etag = sync.make_etag(request, recipe.pk, recipe.updated_at)
+        response = sync.conditional_response(
+            request, etag, recipe.updated_at
+        )
+        if response is None:
+            prefetch_related_objects([recipe], *self.get_relations())
+            response = Response(self.get_serializer(recipe).data)
+        return sync.set_validators(response, etag, recipe.updated_at)
+
+    @action(methods=['GET'], detail=False)
+    def changes(self, request):
+        # delta sync: recipes changed plus ids deleted since ?since=<cursor>,
+        # 410 Gone when the cursor outlived the tombstones
+        changes = sync.changes_since(
+            request.user,
+            self.get_queryset(),
+            request.query_params.get('since'),
+            self.paginator.get_page_size(request),
+        )
+        changes['changed'] = self.get_serializer(
+            changes['changed'], many=True
+        ).data
+        return Response(changes)
+
+    @action(methods=['GET'], detail=False)
+    def cookable(self, request):
+        # ?ingredients=1,2,3[&max_missing=n]: recipes ranked by the share of
+        # their ingredients the user has on hand
+        try:
+            ingredient_ids = [
+                int(pk) for pk in
+                request.query_params.get('ingredients', '').split(',') if pk
+            ]
+        except ValueError:
+            raise ValidationError(
+                {'ingredients': 'Expected comma separated ingredient ids.'}
+            )
+        max_missing = request.query_params.get('max_missing')
+        if max_missing is not None:
+            if not max_missing.isdigit():
+                raise ValidationError(
+                    {'max_missing': 'Expected a non-negative integer.'}
+                )
+            max_missing = int(max_missing)
+
+        ranked = cookable.get_index(request.user.pk).rank(
+            ingredient_ids, max_missing
+        )
+        scores = {
+            recipe_id: (coverage, missing)
+            for coverage, missing, recipe_id in ranked
+        }
+        results = search.RankedResults(
+            self.get_queryset(), [recipe_id for _, _, recipe_id in ranked]
+        )
+        paginator = SearchPagination()
+        page = paginator.paginate_queryset(results, request, view=self)
+        data = self.get_serializer(page, many=True).data
+        for recipe in data:
+            recipe['coverage'], recipe['missing'] = scores[recipe['id']]
+        return paginator.get_paginated_response(data)
+
+    @action(methods=['GET'], detail=False)
+    def stats(self, request):
+        # read from the per-user summary tables kept by recipe.signals
+        return Response(stats.get_stats(request.user.pk))
+
+    @action(methods=['POST'], detail=False, url_path='import')
+    def import_recipes(self, request):
+        # the body is read line by line straight from the request stream,
+        # so uploads of any size are never held in memory
+        stream = request.stream
+        importer = RecipeImporter(request.user)
+        summary = importer.run(stream if stream is not None else [])
+        return Response(summary, status=status.HTTP_200_OK)
+
+    @action(methods=['GET'], detail=False)
+    def export(self, request):
+        # ?output=ndjson|csv, `format` is taken by DRF's renderer override
+        output = request.query_params.get('output', 'ndjson')
+        if output not in EXPORT_FORMATS:
+            raise ValidationError(
+                {'output': f'Choose one of {", ".join(EXPORT_FORMATS)}.'}
+            )
+        stream, content_type = EXPORT_FORMATS[output]
+        response = StreamingHttpResponse(
+            stream(export_records(request.user)),
+            content_type=content_type
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="recipes.{output}"'
+        )
+        return response
+
     def get_serializer_class(self):
-        if self.action == 'retrive':
-            self.queryset = Recipe.objects.filter(user=self.request.user)
+        if self.action == 'retrieve':
             return serializers.RecipeDetailSerializer
         if self.action == 'upload_image':
             return serializers.RecipeImageSerializer
         return serializers.RecipeSerializer
 
-    @action(methods='POST', detail=True, url_path='upload-image')
+    @action(methods=['POST'], detail=True, url_path='upload-image')
     def upload_image(self, request, pk=None):
         recipe = self.get_object()
         serializer = self.get_serializer(
@@ -63,7 +298,10 @@ class RecipeViewSet(viewsets.ModelViewSet):
             data=request.data
         )
         if serializer.is_valid():
-            serializer.save()
+            # thumbnails of the previous image no longer apply, new ones
+            # are rendered in the background once the upload is committed
+            recipe = serializer.save(thumbnails={})
+            transaction.on_commit(partial(enqueue_thumbnails, recipe))
             return Response(
                 serializer.data,
                 status=status.HTTP_200_OK
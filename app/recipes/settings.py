@@ -38,6 +38,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework.authtoken',
     'core',
@@ -47,6 +48,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.CompressionMiddleware',
+    'core.middleware.TimingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -85,11 +88,82 @@ DATABASES = {
         'HOST': os.environ.get('DB_HOST'),
         'NAME': os.environ.get('DB_NAME'),
         'USER': os.environ.get('DB_USER'),
-        'PASSWORD': os.environ.get('DB_PASS')
+        'PASSWORD': os.environ.get('DB_PASS'),
+        # seconds a connection is reused across requests, 0 closes it
+        # after each one
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 0)),
     }
 }
 
 
+# Cache
+# Local memory by default; point CACHE_BACKEND/CACHE_LOCATION at a shared
+# backend (memcached, redis) in production so every worker sees the same
+# list versions and token entries.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
+    }
+}
+
+# Set when one process serves every request (runserver, serve --workers
+# 1): a local memory cache is then as good as a shared one. Otherwise
+# version keyed caches are bypassed on LocMemCache, see core.checks.
+LOCAL_CACHE_SINGLE_PROCESS = (
+    os.environ.get('LOCAL_CACHE_SINGLE_PROCESS', '') == '1'
+)
+LIST_CACHE_TIMEOUT = 60 * 60
+
+# Response compression, see core.middleware.CompressionMiddleware. Routes
+# are keyed by url name, a level of 0 turns compression off.
+COMPRESSION_MIN_SIZE = 1024
+COMPRESSION_LEVELS = {'br': 5, 'gzip': 6}
+COMPRESSION_ROUTE_LEVELS = {
+    # exports are large and streamed, favour throughput over ratio
+    'recipe:recipe-export': {'br': 1, 'gzip': 1},
+}
+COMPRESSION_SKIP_TYPES = (
+    'image/', 'video/', 'audio/', 'application/zip', 'application/gzip',
+    'application/x-gzip',
+)
+
+# Per view timings, see core.middleware.TimingMiddleware. The header
+# exposes query counts and timings to every client.
+REQUEST_TIMING = True
+SERVER_TIMING_HEADER = os.environ.get('SERVER_TIMING_HEADER', '') == '1'
+
+# Bearer token Prometheus scrapes /metrics with. The endpoint answers 404
+# to everyone while it is unset.
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+# Where manage.py serve's workers keep their metrics so any of them can
+# report the totals, a temporary directory when unset
+METRICS_DIR = os.environ.get('METRICS_DIR', '')
+
+# Per-process search indexes used when the database has no full text search
+SEARCH_INDEX_CACHE_SIZE = 256
+SEARCH_INDEX_CACHE_TTL = 60 * 5
+
+# Per-process ingredient bitsets behind the recipe cookable endpoint
+COOKABLE_INDEX_CACHE_SIZE = 256
+COOKABLE_INDEX_CACHE_TTL = 60 * 10
+
+# Delta sync, see recipe.sync. Cursors re-read the last RECIPE_SYNC_OVERLAP
+# seconds, which must cover the longest write transaction. Clients that
+# last synced before the tombstone retention must sync from scratch.
+RECIPE_SYNC_OVERLAP = 60
+RECIPE_TOMBSTONE_RETENTION_DAYS = 30
+
+# Upper bounds (inclusive) of the time_min histogram in the recipe stats
+# endpoint, plus an open ended last bucket
+RECIPE_STATS_TIME_BUCKETS = (10, 20, 30, 45, 60, 90, 120)
+RECIPE_STATS_TOP = 10
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.0/ref/settings/#auth-password-validators
 
@@ -131,6 +205,38 @@ STATIC_ROOT = '/vol/web/static'
 
 AUTH_USER_MODEL = 'core.User'
 
+# Derivatives generated for every uploaded recipe image, see
+# recipe.thumbnails. 0 workers renders them inline in the request.
+RECIPE_THUMBNAIL_WIDTHS = (160, 320, 640)
+RECIPE_THUMBNAIL_WORKERS = int(os.environ.get('RECIPE_THUMBNAIL_WORKERS', 2))
+
+# Unreferenced images saved more recently than this are left for
+# sweep_images, so an upload of the same file in flight keeps it
+RECIPE_IMAGE_GRACE = 60 * 60
+
+REST_FRAMEWORK = {
+    'DEFAULT_PAGINATION_CLASS': 'recipe.pagination.KeysetPagination',
+    'PAGE_SIZE': int(os.environ.get('API_PAGE_SIZE', 100)),
+    'DEFAULT_RENDERER_CLASSES': (
+        'core.renderers.ORJSONRenderer',
+        'core.renderers.ColumnarJSONRenderer',
+        'core.renderers.MessagePackRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'rest_framework.parsers.JSONParser',
+        'core.parsers.ColumnarJSONParser',
+        'core.parsers.MessagePackParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
+}
+
+# Token -> user lookups cached by core.authentication.CachedTokenAuthentication
+AUTH_TOKEN_CACHE_TIMEOUT = 60 * 60
+AUTH_TOKEN_LOCAL_CACHE_SIZE = 10000
+AUTH_TOKEN_LOCAL_CACHE_TTL = 5
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.0/ref/settings/#default-auto-field
 